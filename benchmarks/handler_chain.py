@@ -0,0 +1,84 @@
+"""
+Per-update cost of the handler chain for ordinary group messages.
+
+Builds the real Application with every module handler and the core layers from
+main.py, then feeds synthetic group updates through Application.process_update
+one at a time. Nothing is sent to Telegram, so the figure is the bot's own
+dispatch and lookup cost. The script reports the median microseconds per update
+over several rounds. Run it on two checkouts to compare a change to the chain.
+
+Run from the repository root with the bot's .env in place:
+    python -m benchmarks.handler_chain --updates 2000 --rounds 5
+"""
+import argparse
+import asyncio
+import logging
+import statistics
+import time
+from telegram import Chat, Message, Update, User
+from telegram.ext import ApplicationBuilder
+
+from wuufbot.core.database import init_db, add_or_update_filter
+from wuufbot.main import discover_and_register_handlers, register_core_handlers
+from wuufbot.modules.userlogger import user_buffer
+
+CHAT_ID = -1001000
+USERS = 200
+FILTERS = 50
+WARMUP = 300
+TEXTS = ("hello there everyone", "just chatting about stuff", "#hashtag nothing", "what is up", "ok")
+
+
+async def build_application():
+    application = ApplicationBuilder().token("123:bench").build()
+    # Stand in for get_me: the bot identity is all CommandHandler needs to match /cmd@bot.
+    application.bot._bot_user = User(999, "bench", True, username="bench_bot")
+    application.bot._bot_initialized = application.bot._requests_initialized = True
+    discover_and_register_handlers(application)
+    register_core_handlers(application)
+    await application.initialize()
+    return application
+
+def make_updates(application, first_id: int, total: int) -> list[Update]:
+    chat = Chat(CHAT_ID, Chat.SUPERGROUP, title="bench")
+    users = [User(1000 + i, f"user {i}", False, username=f"bench_user{i}") for i in range(USERS)]
+    updates = []
+    for i in range(first_id, first_id + total):
+        message = Message(i, time.time(), chat, from_user=users[i % USERS], text=TEXTS[i % len(TEXTS)])
+        update = Update(i, message=message)
+        update.set_bot(application.bot)
+        updates.append(update)
+    return updates
+
+async def measure(total: int, rounds: int) -> list[float]:
+    application = await build_application()
+    for update in make_updates(application, 1, WARMUP):
+        await application.process_update(update)
+    results = []
+    for r in range(rounds):
+        updates = make_updates(application, (r + 1) * 1_000_000, total)
+        start = time.perf_counter()
+        for update in updates:
+            await application.process_update(update)
+        results.append((time.perf_counter() - start) / total * 1e6)
+    # The userlogger buffer is flushed by a job that never runs here; drop what it collected.
+    user_buffer._pending.clear()
+    await application.shutdown()
+    return results
+
+async def main(total: int, rounds: int) -> None:
+    init_db()
+    for i in range(FILTERS):
+        add_or_update_filter(CHAT_ID, f"keyword{i}", {"filter_type": "keyword", "reply_text": "bench"})
+    print(f"{total} group text updates per round, {rounds} rounds, {USERS} users, {FILTERS} filters")
+    results = await measure(total, rounds)
+    print(f"median {statistics.median(results):.1f} us/update (rounds: {', '.join(f'{x:.0f}' for x in results)})")
+
+
+if __name__ == "__main__":
+    logging.disable(logging.WARNING)
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--updates", type=int, default=2000)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+    asyncio.run(main(args.updates, args.rounds))
@@ -0,0 +1,88 @@
+"""
+Throughput of the update processors with N simulated chats.
+
+Every handler sleeps for a fixed latency. One update in SLOW_EVERY, picked at
+random across chats, stands in for a Tenor or Gemini call with a much longer sleep. The script
+reports updates per second for sequential processing, PTB's
+SimpleUpdateProcessor (no ordering), and ChatOrderedUpdateProcessor. It also
+counts per-chat ordering violations. The sequential run only processes the
+first SEQUENTIAL_SAMPLE updates.
+
+Run from the repository root with the bot's .env in place:
+    python -m benchmarks.update_processor --chats 1 10 100 --updates 2000
+"""
+import argparse
+import asyncio
+import random
+import time
+from telegram import Chat, Message, Update, User
+from telegram.ext import SimpleUpdateProcessor
+
+from wuufbot.core.update_processor import ChatOrderedUpdateProcessor
+
+HANDLER_LATENCY = 0.002
+SLOW_LATENCY = 0.25
+SLOW_EVERY = 200
+SEQUENTIAL_SAMPLE = 400
+
+
+def make_updates(chats: int, total: int) -> list[Update]:
+    user = User(1, "bench", False)
+    chat_objs = [Chat(-1000 - i, Chat.SUPERGROUP, title=f"bench {i}") for i in range(chats)]
+    return [
+        Update(i, message=Message(i, 0, chat_objs[i % chats], from_user=user, text="hi"))
+        for i in range(total)
+    ]
+
+def pick_slow(total: int) -> frozenset[int]:
+    return frozenset(random.Random(0).sample(range(total), total // SLOW_EVERY))
+
+async def handle(update: Update, slow: frozenset[int], last_started: dict[int, int], busy: set[int], violations: list[int]) -> None:
+    """Counts an update that overlaps another one of its chat or starts after a newer one."""
+    chat_id = update.effective_chat.id
+    if chat_id in busy or last_started.get(chat_id, -1) > update.update_id:
+        violations.append(update.update_id)
+    last_started[chat_id] = update.update_id
+    busy.add(chat_id)
+    await asyncio.sleep(SLOW_LATENCY if update.update_id in slow else HANDLER_LATENCY)
+    busy.discard(chat_id)
+
+async def run(processor, updates: list[Update], slow: frozenset[int]) -> tuple[float, int]:
+    last_started: dict[int, int] = {}
+    busy: set[int] = set()
+    violations: list[int] = []
+    start = time.perf_counter()
+    if processor is None:
+        for update in updates:
+            await handle(update, slow, last_started, busy, violations)
+    else:
+        # Mirrors Application._update_fetcher: one task per update, created in fetch order.
+        await asyncio.gather(*(
+            processor.process_update(update, handle(update, slow, last_started, busy, violations)) for update in updates
+        ))
+    return len(updates) / (time.perf_counter() - start), len(violations)
+
+async def main(chat_counts: list[int], total: int, concurrency: int) -> None:
+    print(f"{total} updates, {HANDLER_LATENCY * 1000:.0f} ms handlers, 1 in {SLOW_EVERY} takes {SLOW_LATENCY * 1000:.0f} ms, concurrency {concurrency}")
+    print(f"{'chats':>6} {'processor':<12} {'updates/s':>10} {'order violations':>17}")
+    for chats in chat_counts:
+        updates = make_updates(chats, total)
+        slow = pick_slow(total)
+        processors = {
+            "sequential": None,
+            "simple": SimpleUpdateProcessor(concurrency),
+            "chat-ordered": ChatOrderedUpdateProcessor(concurrency),
+        }
+        for name, processor in processors.items():
+            # Sequential runs take minutes at full size, and their rate does not depend on the count.
+            rate, violations = await run(processor, updates[:SEQUENTIAL_SAMPLE] if processor is None else updates, slow)
+            print(f"{chats:>6} {name:<12} {rate:>10.0f} {violations:>17}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--chats", type=int, nargs="+", default=[1, 10, 100, 1000])
+    parser.add_argument("--updates", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    args = parser.parse_args()
+    asyncio.run(main(args.chats, args.updates, args.concurrency))
@@ -80,6 +80,35 @@ else:
     
 LOG_CHAT_USERNAME = os.getenv("LOG_CHAT_USERNAME")
 
+RUN_MODE = os.getenv("BOT_RUN_MODE", "polling").strip().lower()
+if RUN_MODE not in ("polling", "webhook"):
+    logger.error(f"Invalid BOT_RUN_MODE: '{RUN_MODE}'. Falling back to polling.")
+    RUN_MODE = "polling"
+logger.info(f"Run mode: {RUN_MODE}")
+
+WEBHOOK_URL = os.getenv("WEBHOOK_URL")
+WEBHOOK_LISTEN = os.getenv("WEBHOOK_LISTEN", "127.0.0.1")
+WEBHOOK_PATH = "/" + os.getenv("WEBHOOK_PATH", "webhook").strip("/")
+WEBHOOK_SECRET_TOKEN = os.getenv("WEBHOOK_SECRET_TOKEN")
+
+try:
+    WEBHOOK_PORT = int(os.getenv("WEBHOOK_PORT", "8443"))
+except ValueError:
+    logger.error(f"Invalid WEBHOOK_PORT: '{os.getenv('WEBHOOK_PORT')}'. Falling back to 8443.")
+    WEBHOOK_PORT = 8443
+
+try:
+    WEBHOOK_MAX_CONNECTIONS = min(max(int(os.getenv("WEBHOOK_MAX_CONNECTIONS", "40")), 1), 100)
+except ValueError:
+    logger.error(f"Invalid WEBHOOK_MAX_CONNECTIONS: '{os.getenv('WEBHOOK_MAX_CONNECTIONS')}'. Falling back to 40.")
+    WEBHOOK_MAX_CONNECTIONS = 40
+
+if RUN_MODE == "webhook":
+    if not WEBHOOK_SECRET_TOKEN:
+        logger.warning("WARNING: WEBHOOK_SECRET_TOKEN not set. Webhook requests will not be authenticated.")
+    if not WEBHOOK_URL:
+        logger.warning("WARNING: WEBHOOK_URL not set. The webhook will not be registered with Telegram.")
+
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 DB_NAME = os.path.join(BASE_DIR, "wuufbot_data.db")
 SESSION_NAME = "wuufbot_user_session"
@@ -87,3 +116,53 @@ SESSION_NAME = "wuufbot_user_session"
 BOT_START_TIME = datetime.now()
 MAX_WARNS = 3
 PUBLIC_AI_ENABLED = False
+GEMINI_MODEL = "gemini-2.5-flash-preview-05-20"
+AI_STREAM_RESPONSES = True
+AI_STREAM_EDIT_INTERVAL = 1.5
+
+MAX_CONCURRENT_UPDATES = 32
+
+OUTBOUND_GLOBAL_RATE = 30
+OUTBOUND_GROUP_RATE = 20 / 60
+OUTBOUND_GROUP_BURST = 5
+OUTBOUND_PRIVATE_RATE = 1
+OUTBOUND_PRIVATE_BURST = 3
+OUTBOUND_MAX_RETRIES = 2
+
+BROADCAST_CONCURRENCY = 25
+BROADCAST_PAGE_SIZE = 200
+BROADCAST_PROGRESS_INTERVAL = 10
+
+CHAT_SWEEP_CONCURRENCY = 20
+CHAT_SWEEP_PAGE_SIZE = 200
+CHAT_SWEEP_INTERVAL = 24 * 3600
+CHAT_SWEEP_BATCH = 2000
+CHAT_SWEEP_PROGRESS_INTERVAL = 10
+CHAT_ACTIVITY_FLUSH_INTERVAL = 60
+CHAT_ACTIVITY_WRITE_INTERVAL = 600
+
+UNBAN_PROPAGATION_CONCURRENCY = 20
+
+DB_READ_CONNECTIONS = 4
+DB_CACHE_SIZE_KIB = 16384
+DB_MMAP_SIZE = 256 * 1024 * 1024
+
+USERLOGGER_FLUSH_INTERVAL = 30
+USERLOGGER_LAST_SEEN_INTERVAL = 300
+USERLOGGER_TRACKED_USERS = 100_000
+
+CHAT_SETTINGS_CACHE_SIZE = 5000
+
+ADMIN_CACHE_TTL = 300
+ADMIN_CACHE_CHATS = 5000
+
+USERNAME_CACHE_SIZE = 20_000
+
+NOTE_INDEX_CHATS = 5000
+NOTE_CONTENT_CACHE_SIZE = 2000
+
+TENOR_CACHE_TTL = 6 * 3600
+TENOR_TIMEOUT = 4.0
+TENOR_RESULTS_PER_TERM = 5
+TENOR_RETRY_AFTER = 60
+GIF_FILE_ID_POOL_SIZE = TENOR_RESULTS_PER_TERM
@@ -0,0 +1,97 @@
+import asyncio
+import logging
+import time
+from telegram import Update, ChatMember
+from telegram.constants import ChatMemberStatus
+from telegram.ext import ContextTypes
+
+from ..config import ADMIN_CACHE_TTL, ADMIN_CACHE_CHATS
+from .caches import LRUCache
+
+logger = logging.getLogger(__name__)
+
+ADMIN_STATUSES = (ChatMemberStatus.OWNER, ChatMemberStatus.ADMINISTRATOR)
+
+
+# --- ADMIN ROSTER ---
+class AdminRoster:
+    """Administrators of one chat plus the bot's own membership, as fetched at `fetched_at`."""
+
+    __slots__ = ("admins", "bot_member", "fetched_at")
+
+    def __init__(self, admins: dict[int, ChatMember], bot_member: ChatMember):
+        self.admins = admins
+        self.bot_member = bot_member
+        self.fetched_at = time.monotonic()
+
+    def is_fresh(self, ttl: float) -> bool:
+        return time.monotonic() - self.fetched_at < ttl
+
+
+class ChatAdminCache:
+    """
+    Per-chat admin rosters kept for `ttl` seconds. Concurrent misses for the
+    same chat share one fetch, so a burst of commands costs two API calls.
+    """
+
+    def __init__(self, ttl: float = ADMIN_CACHE_TTL, max_chats: int = ADMIN_CACHE_CHATS):
+        self.ttl = ttl
+        self._rosters: LRUCache[int, AdminRoster] = LRUCache(max_chats)
+        self._inflight: dict[int, asyncio.Task] = {}
+
+    async def roster(self, context: ContextTypes.DEFAULT_TYPE, chat_id: int) -> AdminRoster:
+        roster = self._rosters.get(chat_id)
+        if roster is not None and roster.is_fresh(self.ttl):
+            return roster
+
+        task = self._inflight.get(chat_id)
+        if task is None:
+            task = asyncio.create_task(self._fetch(context, chat_id))
+            self._inflight[chat_id] = task
+            task.add_done_callback(lambda _: self._inflight.pop(chat_id, None))
+        return await asyncio.shield(task)
+
+    async def _fetch(self, context: ContextTypes.DEFAULT_TYPE, chat_id: int) -> AdminRoster:
+        generation = self._rosters.generation
+        # getChatAdministrators leaves bots out, so the bot's own rights need their own call.
+        administrators, bot_member = await asyncio.gather(
+            context.bot.get_chat_administrators(chat_id),
+            context.bot.get_chat_member(chat_id, context.bot.id),
+        )
+        roster = AdminRoster({member.user.id: member for member in administrators}, bot_member)
+        self._rosters.put(chat_id, roster, generation)
+        return roster
+
+    def invalidate(self, chat_id: int) -> None:
+        self._rosters.pop(chat_id)
+
+admin_cache = ChatAdminCache()
+
+
+# --- LOOKUPS ---
+async def get_admin_member(context: ContextTypes.DEFAULT_TYPE, chat_id: int, user_id: int) -> ChatMember | None:
+    """Returns the cached ChatMember if the user is the creator or an admin, else None."""
+    roster = await admin_cache.roster(context, chat_id)
+    if user_id == context.bot.id:
+        return roster.bot_member if roster.bot_member.status in ADMIN_STATUSES else None
+    return roster.admins.get(user_id)
+
+async def is_chat_admin(context: ContextTypes.DEFAULT_TYPE, chat_id: int, user_id: int) -> bool:
+    return await get_admin_member(context, chat_id, user_id) is not None
+
+async def get_bot_member(context: ContextTypes.DEFAULT_TYPE, chat_id: int) -> ChatMember:
+    return (await admin_cache.roster(context, chat_id)).bot_member
+
+
+# --- INVALIDATION ---
+async def invalidate_admin_cache(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    member_update = update.chat_member or update.my_chat_member
+    if not member_update:
+        return
+
+    if update.my_chat_member or (
+        member_update.old_chat_member.status in ADMIN_STATUSES
+        or member_update.new_chat_member.status in ADMIN_STATUSES
+    ):
+        admin_cache.invalidate(member_update.chat.id)
+        logger.debug(f"Admin roster for chat {member_update.chat.id} invalidated.")
@@ -0,0 +1,191 @@
+"""
+Awaitable versions of the helpers in database.py. Every call runs on the
+dedicated database executor, so a slow commit never blocks the event loop.
+"""
+from ..config import MAX_WARNS
+from . import database
+from .async_utils import aioify_db
+from .caches import ChatSettings
+
+# --- MAINTENANCE ---
+checkpoint_db = aioify_db(database.checkpoint_db)
+
+# --- MODULES ---
+disable_module = aioify_db(database.disable_module)
+enable_module = aioify_db(database.enable_module)
+
+# --- DISABLERS ---
+disable_command_in_chat = aioify_db(database.disable_command_in_chat)
+enable_command_in_chat = aioify_db(database.enable_command_in_chat)
+
+# --- BLACKLIST ---
+add_to_blacklist = aioify_db(database.add_to_blacklist)
+remove_from_blacklist = aioify_db(database.remove_from_blacklist)
+get_blacklist_reason = aioify_db(database.get_blacklist_reason)
+
+# --- WHITELIST ---
+add_to_whitelist = aioify_db(database.add_to_whitelist)
+remove_from_whitelist = aioify_db(database.remove_from_whitelist)
+get_all_whitelist_users_from_db = aioify_db(database.get_all_whitelist_users_from_db)
+
+# --- SUPPORT ---
+add_support_user = aioify_db(database.add_support_user)
+remove_support_user = aioify_db(database.remove_support_user)
+get_all_support_users_from_db = aioify_db(database.get_all_support_users_from_db)
+
+# --- SUDO ---
+add_sudo_user = aioify_db(database.add_sudo_user)
+remove_sudo_user = aioify_db(database.remove_sudo_user)
+get_all_sudo_users_from_db = aioify_db(database.get_all_sudo_users_from_db)
+
+# --- DEVELOPER ---
+add_dev_user = aioify_db(database.add_dev_user)
+remove_dev_user = aioify_db(database.remove_dev_user)
+get_all_dev_users_from_db = aioify_db(database.get_all_dev_users_from_db)
+
+# --- GLOBAL BANS ---
+add_to_gban = aioify_db(database.add_to_gban)
+remove_from_gban = aioify_db(database.remove_from_gban)
+get_gban_reason = aioify_db(database.get_gban_reason)
+is_gban_enforced = aioify_db(database.is_gban_enforced)
+set_gban_enforcement = aioify_db(database.set_gban_enforcement)
+
+# --- BAN LEDGER ---
+record_ban = aioify_db(database.record_ban)
+get_ban_ledger_chats = aioify_db(database.get_ban_ledger_chats)
+prune_ban_ledger = aioify_db(database.prune_ban_ledger)
+remove_ban_records = aioify_db(database.remove_ban_records)
+
+# --- USERS ---
+update_user_in_db = aioify_db(database.update_user_in_db)
+update_users_in_db = aioify_db(database.update_users_in_db)
+delete_user_from_db = aioify_db(database.delete_user_from_db)
+get_user_from_db_by_username = aioify_db(database.get_user_from_db_by_username)
+get_user_from_db_by_id = aioify_db(database.get_user_from_db_by_id)
+
+# --- CHATS ---
+add_chat_to_db = aioify_db(database.add_chat_to_db)
+remove_chat_from_db = aioify_db(database.remove_chat_from_db)
+get_all_bot_chats_from_db = aioify_db(database.get_all_bot_chats_from_db)
+get_all_bot_chat_ids = aioify_db(database.get_all_bot_chat_ids)
+remove_chat_from_db_by_id = aioify_db(database.remove_chat_from_db_by_id)
+remove_chats_from_db = aioify_db(database.remove_chats_from_db)
+get_bot_chat_ids_after = aioify_db(database.get_bot_chat_ids_after)
+
+# --- CHAT SETTINGS ---
+_load_chat_settings = aioify_db(database.get_chat_settings)
+
+async def get_chat_settings(chat_id: int) -> ChatSettings:
+    """Cache hits are served inline; only a miss is sent to the executor."""
+    settings = database.chat_settings_cache.get(chat_id)
+    if settings is not None:
+        return settings
+    return await _load_chat_settings(chat_id)
+
+# The getters below read the ChatSettings snapshot, so they share its inline cache-hit path.
+async def get_welcome_settings(chat_id: int) -> tuple[bool, str | None]:
+    settings = await get_chat_settings(chat_id)
+    return settings.welcome_enabled, settings.custom_welcome
+
+async def get_goodbye_settings(chat_id: int) -> tuple[bool, str | None]:
+    settings = await get_chat_settings(chat_id)
+    return settings.goodbye_enabled, settings.custom_goodbye
+
+async def should_clean_service(chat_id: int) -> bool:
+    return (await get_chat_settings(chat_id)).clean_service
+
+async def get_warn_limit(chat_id: int) -> int:
+    limit = (await get_chat_settings(chat_id)).warn_limit
+    if limit is not None and limit > 0:
+        return limit
+    return MAX_WARNS
+
+async def get_rules(chat_id: int) -> str | None:
+    return (await get_chat_settings(chat_id)).rules_text
+
+set_welcome_setting = aioify_db(database.set_welcome_setting)
+set_welcome_enabled = aioify_db(database.set_welcome_enabled)
+set_goodbye_setting = aioify_db(database.set_goodbye_setting)
+set_clean_service = aioify_db(database.set_clean_service)
+set_warn_limit = aioify_db(database.set_warn_limit)
+set_rules = aioify_db(database.set_rules)
+clear_rules = aioify_db(database.clear_rules)
+
+# --- NOTES ---
+add_note = aioify_db(database.add_note)
+remove_note = aioify_db(database.remove_note)
+_get_note = aioify_db(database.get_note)
+
+async def get_note(chat_id: int, note_name: str) -> str | None:
+    """Unknown names and cached notes are answered inline; anything else goes to the executor."""
+    note_name = note_name.lower()
+    names = database.note_index.get(chat_id)
+    if names is not None and note_name not in names:
+        return None
+    content = database.note_contents.get((chat_id, note_name))
+    if content is not None:
+        return content
+    return await _get_note(chat_id, note_name)
+
+_get_all_notes = aioify_db(database.get_all_notes)
+
+async def get_all_notes(chat_id: int) -> list[str]:
+    """Served from the note index when the chat is cached; a miss goes to the executor."""
+    names = database.note_index.get(chat_id)
+    if names is not None:
+        return sorted(names)
+    return await _get_all_notes(chat_id)
+
+# --- WARNINGS ---
+add_warning = aioify_db(database.add_warning)
+remove_warning_by_id = aioify_db(database.remove_warning_by_id)
+get_warnings = aioify_db(database.get_warnings)
+reset_warnings = aioify_db(database.reset_warnings)
+
+# --- AFK ---
+set_afk = aioify_db(database.set_afk)
+clear_afk = aioify_db(database.clear_afk)
+
+# --- JOINFILTERS ---
+get_chat_join_settings = aioify_db(database.get_chat_join_settings)
+update_chat_join_settings = aioify_db(database.update_chat_join_settings)
+
+# --- FILTERS ---
+add_or_update_filter = aioify_db(database.add_or_update_filter)
+remove_filter = aioify_db(database.remove_filter)
+get_all_filters_for_chat = aioify_db(database.get_all_filters_for_chat)
+
+# --- BLACKLIST CHAT ---
+blacklist_chat = aioify_db(database.blacklist_chat)
+unblacklist_chat = aioify_db(database.unblacklist_chat)
+is_chat_blacklisted = aioify_db(database.is_chat_blacklisted)
+get_blacklisted_chats = aioify_db(database.get_blacklisted_chats)
+
+# --- BROADCASTS ---
+create_broadcast = aioify_db(database.create_broadcast)
+set_broadcast_status_message = aioify_db(database.set_broadcast_status_message)
+get_broadcast = aioify_db(database.get_broadcast)
+get_running_broadcasts = aioify_db(database.get_running_broadcasts)
+save_broadcast_progress = aioify_db(database.save_broadcast_progress)
+finish_broadcast = aioify_db(database.finish_broadcast)
+
+# --- CHAT LIVENESS ---
+count_live_bot_chats = aioify_db(database.count_live_bot_chats)
+mark_chat_dead = aioify_db(database.mark_chat_dead)
+ensure_chat_in_db = aioify_db(database.ensure_chat_in_db)
+record_chat_activity = aioify_db(database.record_chat_activity)
+
+# --- CHAT SWEEPS ---
+get_chats_due_for_sweep = aioify_db(database.get_chats_due_for_sweep)
+create_chat_sweep = aioify_db(database.create_chat_sweep)
+save_chat_sweep_progress = aioify_db(database.save_chat_sweep_progress)
+finish_chat_sweep = aioify_db(database.finish_chat_sweep)
+abandon_running_chat_sweeps = aioify_db(database.abandon_running_chat_sweeps)
+get_recent_chat_sweeps = aioify_db(database.get_recent_chat_sweeps)
+
+# --- GIF FILE IDS ---
+save_gif_file_id = aioify_db(database.save_gif_file_id)
+remove_gif_file_id = aioify_db(database.remove_gif_file_id)
+
+# --- STATS ---
+get_table_counts = aioify_db(database.get_table_counts)
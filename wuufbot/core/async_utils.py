@@ -3,22 +3,29 @@ from concurrent.futures import ThreadPoolExecutor
 from typing import TypeVar, ParamSpec, Callable, Awaitable
 from functools import wraps
 
+from ..config import DB_READ_CONNECTIONS
+
 P = ParamSpec("P")
 T = TypeVar("T")
 
 _executor = ThreadPoolExecutor()
+# Sized to the SQLite pool: one thread per reader plus one for the writer.
+_db_executor = ThreadPoolExecutor(max_workers=DB_READ_CONNECTIONS + 1, thread_name_prefix="wuufbot-db")
 
-def aioify(func: Callable[P, T]) -> Callable[P, Awaitable[T]]:
+def aioify(func: Callable[P, T], executor: ThreadPoolExecutor | None = None) -> Callable[P, Awaitable[T]]:
     @wraps(func)
     async def wrapper(*args: P.args, **kwargs: P.kwargs) -> T:
         if asyncio.iscoroutinefunction(func):
             raise TypeError("Cannot aioify a coroutine function.")
-        
+
         loop = asyncio.get_running_loop()
-        
+
         return await loop.run_in_executor(
-            _executor, 
+            executor or _executor,
             lambda: func(*args, **kwargs)
         )
 
     return wrapper
+
+def aioify_db(func: Callable[P, T]) -> Callable[P, Awaitable[T]]:
+    return aioify(func, _db_executor)
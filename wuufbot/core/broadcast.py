@@ -0,0 +1,141 @@
+import asyncio
+import logging
+import time
+from telegram import Bot
+from telegram.constants import ParseMode
+from telegram.error import TelegramError
+from telegram.ext import Application, ContextTypes
+
+from ..config import BROADCAST_CONCURRENCY, BROADCAST_PAGE_SIZE, BROADCAST_PROGRESS_INTERVAL
+from .async_database import (
+    get_bot_chat_ids_after, get_broadcast, get_running_broadcasts,
+    save_broadcast_progress, finish_broadcast
+)
+from .rate_limiter import Priority
+from .utils import is_dead_chat_error
+
+logger = logging.getLogger(__name__)
+
+_running: dict[int, "BroadcastJob"] = {}
+
+
+# --- BROADCAST JOB ---
+class BroadcastJob:
+    """
+    Sends one broadcast to every chat in bot_chats, walking them in chat_id order
+    one page at a time. Each page is sent with bounded concurrency at BULK
+    priority, so the outbound scheduler paces it against Telegram's limits.
+    After each page the cursor, the counters and the pruning of dead chats are
+    committed together. A restarted bot resumes after the last finished page.
+    """
+
+    def __init__(self, bot: Bot, row: dict):
+        self.bot = bot
+        self.id: int = row["id"]
+        self.text: str | None = row["text"]
+        self.from_chat_id: int | None = row["from_chat_id"]
+        self.message_id: int | None = row["message_id"]
+        self.status_chat_id: int | None = row["status_chat_id"]
+        self.status_message_id: int | None = row["status_message_id"]
+        self.last_chat_id: int | None = row["last_chat_id"]
+        self.total: int = row["total"]
+        self.sent: int = row["sent"]
+        self.failed: int = row["failed"]
+        self.removed: int = row["removed"]
+        self.cancelled = False
+        self._slots = asyncio.Semaphore(BROADCAST_CONCURRENCY)
+
+    @property
+    def processed(self) -> int:
+        return self.sent + self.failed
+
+    async def _deliver(self, chat_id: int) -> str:
+        async with self._slots:
+            try:
+                if self.from_chat_id is not None:
+                    await self.bot.copy_message(chat_id, self.from_chat_id, self.message_id, rate_limit_args=Priority.BULK)
+                else:
+                    await self.bot.send_message(chat_id=chat_id, text=self.text, rate_limit_args=Priority.BULK)
+                return "sent"
+            except Exception as e:
+                if is_dead_chat_error(e):
+                    logger.info(f"Broadcast #{self.id}: chat {chat_id} is gone ({e}).")
+                    return "dead"
+                logger.warning(f"Broadcast #{self.id}: failed to send to {chat_id}: {e}")
+                return "failed"
+
+    async def run(self) -> None:
+        logger.info(f"Broadcast #{self.id} running from cursor {self.last_chat_id} ({self.processed}/{self.total} done).")
+        last_report = time.monotonic()
+        try:
+            while not self.cancelled:
+                chat_ids = await get_bot_chat_ids_after(self.last_chat_id, BROADCAST_PAGE_SIZE)
+                if not chat_ids:
+                    break
+
+                results = await asyncio.gather(*(self._deliver(chat_id) for chat_id in chat_ids))
+                dead = [chat_id for chat_id, result in zip(chat_ids, results) if result == "dead"]
+                sent = results.count("sent")
+                removed = await save_broadcast_progress(self.id, chat_ids[-1], sent, len(results) - sent, dead)
+                if removed is None:
+                    logger.error(f"Broadcast #{self.id} could not save its progress, stopping.")
+                    return
+
+                self.last_chat_id = chat_ids[-1]
+                self.sent += sent
+                self.failed += len(results) - sent
+                self.removed += removed
+
+                if time.monotonic() - last_report >= BROADCAST_PROGRESS_INTERVAL:
+                    await self._report("📢 Broadcasting")
+                    last_report = time.monotonic()
+
+            state = "cancelled" if self.cancelled else "done"
+            await finish_broadcast(self.id, state)
+            await self._report("🛑 Broadcast cancelled" if self.cancelled else "✅ Broadcast complete")
+            logger.info(f"Broadcast #{self.id} {state}: sent {self.sent}, failed {self.failed}, removed {self.removed}.")
+        finally:
+            _running.pop(self.id, None)
+
+    async def _report(self, title: str) -> None:
+        if not self.status_chat_id or not self.status_message_id:
+            return
+        text = (
+            f"{title} <code>#{self.id}</code>\n\n"
+            f"<b>• Progress:</b> <code>{self.processed}/{max(self.total, self.processed)}</code>\n"
+            f"<b>• Sent:</b> <code>{self.sent}</code>\n"
+            f"<b>• Failed:</b> <code>{self.failed}</code>\n"
+            f"<b>• Dead chats removed:</b> <code>{self.removed}</code>"
+        )
+        try:
+            await self.bot.edit_message_text(text, self.status_chat_id, self.status_message_id, parse_mode=ParseMode.HTML)
+        except TelegramError as e:
+            logger.warning(f"Could not update status of broadcast #{self.id}: {e}")
+
+
+# --- CONTROL ---
+def start_broadcast_job(application: Application, row: dict) -> BroadcastJob:
+    job = BroadcastJob(application.bot, row)
+    _running[job.id] = job
+    application.create_task(job.run(), name=f"broadcast-{job.id}")
+    return job
+
+async def start_broadcast(application: Application, broadcast_id: int) -> BroadcastJob | None:
+    row = await get_broadcast(broadcast_id)
+    return start_broadcast_job(application, row) if row else None
+
+def get_running_broadcast_jobs() -> list[BroadcastJob]:
+    return list(_running.values())
+
+async def cancel_broadcast(broadcast_id: int | None = None) -> list[int]:
+    """Stops the given running broadcast, or all of them. Returns the ids that were stopped."""
+    jobs = [job for job in _running.values() if broadcast_id is None or job.id == broadcast_id]
+    for job in jobs:
+        job.cancelled = True
+    return [job.id for job in jobs]
+
+async def resume_broadcasts(context: ContextTypes.DEFAULT_TYPE) -> None:
+    for row in await get_running_broadcasts():
+        if row["id"] not in _running:
+            logger.info(f"Resuming interrupted broadcast #{row['id']}.")
+            start_broadcast_job(context.application, row)
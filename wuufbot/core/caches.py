@@ -0,0 +1,305 @@
+import logging
+import threading
+from collections import OrderedDict
+from typing import Generic, Hashable, Iterable, TypeVar
+
+logger = logging.getLogger(__name__)
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+# --- RANKS ---
+class RankRegistry:
+    """
+    Process-wide view of the rank tables (dev, sudo, support, whitelist, blacklist).
+    Each rank is a frozenset swapped on write, so lookups need no locking.
+    """
+
+    RANKS = ("dev", "sudo", "support", "whitelist", "blacklist")
+
+    def __init__(self, owner_id: int):
+        self.owner = frozenset({owner_id})
+        self.loaded = False
+        self._lock = threading.Lock()
+        self._members: dict[str, frozenset[int]] = {rank: frozenset() for rank in self.RANKS}
+
+    def load(self, members: dict[str, Iterable[int]]) -> None:
+        with self._lock:
+            for rank in self.RANKS:
+                self._members[rank] = frozenset(members.get(rank, ()))
+            self.loaded = True
+        logger.info("Rank registry loaded: " + ", ".join(f"{rank}={len(ids)}" for rank, ids in self._members.items()))
+
+    def add(self, rank: str, user_id: int) -> None:
+        with self._lock:
+            self._members[rank] = self._members[rank] | {user_id}
+
+    def discard(self, rank: str, user_id: int) -> None:
+        with self._lock:
+            self._members[rank] = self._members[rank] - {user_id}
+
+    def has(self, rank: str, user_id: int) -> bool:
+        return user_id in self._members[rank]
+
+    def members(self, rank: str) -> frozenset[int]:
+        return self._members[rank]
+
+    def is_privileged(self, user_id: int) -> bool:
+        return (
+            user_id in self.owner
+            or user_id in self._members["dev"]
+            or user_id in self._members["sudo"]
+            or user_id in self._members["support"]
+        )
+
+
+# --- ID SETS ---
+class IdSet(Generic[K]):
+    """Copy-on-write set of keys mirroring a single-key table (e.g. global_bans)."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.loaded = False
+        self._lock = threading.Lock()
+        self._ids: frozenset[K] = frozenset()
+
+    def __contains__(self, item: K) -> bool:
+        return item in self._ids
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def snapshot(self) -> frozenset[K]:
+        return self._ids
+
+    def load(self, ids: Iterable[K]) -> None:
+        with self._lock:
+            self._ids = frozenset(ids)
+            self.loaded = True
+        logger.info(f"Loaded {len(self._ids)} id(s) into {self.name} set.")
+
+    def add(self, item: K) -> None:
+        with self._lock:
+            self._ids = self._ids | {item}
+
+    def discard(self, item: K) -> None:
+        with self._lock:
+            self._ids = self._ids - {item}
+
+
+class TableMirror(Generic[K, V]):
+    """Copy-on-write key -> row map mirroring a small table that is read far more often than written."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.loaded = False
+        self._lock = threading.Lock()
+        self._rows: dict[K, V] = {}
+
+    def __contains__(self, key: K) -> bool:
+        return key in self._rows
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def load(self, rows: Iterable[tuple[K, V]]) -> None:
+        with self._lock:
+            self._rows = dict(rows)
+            self.loaded = True
+        logger.info(f"Loaded {len(self._rows)} row(s) into {self.name} mirror.")
+
+    def get(self, key: K) -> V | None:
+        return self._rows.get(key)
+
+    def set(self, key: K, value: V) -> None:
+        with self._lock:
+            rows = dict(self._rows)
+            rows[key] = value
+            self._rows = rows
+
+    def pop(self, key: K) -> None:
+        with self._lock:
+            if key in self._rows:
+                rows = dict(self._rows)
+                del rows[key]
+                self._rows = rows
+
+
+class ChatSets(Generic[K]):
+    """Per-chat copy-on-write sets mirroring a (chat_id, key) table such as disabled_commands_per_chat."""
+
+    _EMPTY: frozenset = frozenset()
+
+    def __init__(self, name: str):
+        self.name = name
+        self.loaded = False
+        self._lock = threading.Lock()
+        self._sets: dict[int, frozenset[K]] = {}
+
+    def load(self, rows: Iterable[tuple[int, K]]) -> None:
+        grouped: dict[int, set[K]] = {}
+        for chat_id, key in rows:
+            grouped.setdefault(chat_id, set()).add(key)
+        with self._lock:
+            self._sets = {chat_id: frozenset(keys) for chat_id, keys in grouped.items()}
+            self.loaded = True
+        logger.info(f"Loaded {self.name} for {len(self._sets)} chat(s).")
+
+    def get(self, chat_id: int) -> frozenset[K]:
+        return self._sets.get(chat_id, self._EMPTY)
+
+    def add(self, chat_id: int, key: K) -> None:
+        with self._lock:
+            self._sets[chat_id] = self.get(chat_id) | {key}
+
+    def discard(self, chat_id: int, key: K) -> None:
+        with self._lock:
+            remaining = self.get(chat_id) - {key}
+            if remaining:
+                self._sets[chat_id] = remaining
+            else:
+                self._sets.pop(chat_id, None)
+
+
+
+class ChatVersions:
+    """
+    Per-chat change counters. A reader remembers the version it built a cache
+    from and rebuilds only when it differs; chats never bumped report 0.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counter = 0
+        self._versions: dict[int, int] = {}
+
+    def get(self, chat_id: int) -> int:
+        return self._versions.get(chat_id, 0)
+
+    def bump(self, chat_id: int) -> int:
+        with self._lock:
+            self._counter += 1
+            self._versions[chat_id] = self._counter
+            return self._counter
+
+
+# --- LRU ---
+class LRUCache(Generic[K, V]):
+    """
+    Small thread-safe LRU map; get() returns None on a miss.
+    `generation` is bumped by every invalidation so a loader can refuse to
+    cache a value it read before a concurrent write landed.
+    """
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self.generation = 0
+        self._lock = threading.Lock()
+        self._data: OrderedDict[K, V] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: K) -> V | None:
+        with self._lock:
+            value = self._data.get(key)
+            if value is not None:
+                self._data.move_to_end(key)
+            return value
+
+    def put(self, key: K, value: V, generation: int | None = None) -> None:
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key: K) -> None:
+        with self._lock:
+            self.generation += 1
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self.generation += 1
+            self._data.clear()
+
+
+
+class UsernameCache(Generic[V]):
+    """
+    LRU of lowercase username -> resolved user. A user's previous username is
+    tracked too, so a rename drops the stale entry instead of leaving it behind.
+    """
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self._by_name: OrderedDict[str, tuple[int, V]] = OrderedDict()
+        self._by_id: dict[int, str] = {}
+
+    def __len__(self) -> int:
+        return len(self._by_name)
+
+    def get(self, username: str) -> V | None:
+        with self._lock:
+            entry = self._by_name.get(username)
+            if entry is None:
+                return None
+            self._by_name.move_to_end(username)
+            return entry[1]
+
+    def put(self, username: str, user_id: int, value: V) -> None:
+        with self._lock:
+            self._forget(user_id, username)
+            self._by_name[username] = (user_id, value)
+            self._by_id[user_id] = username
+            while len(self._by_name) > self.maxsize:
+                _, (evicted_id, _) = self._by_name.popitem(last=False)
+                self._by_id.pop(evicted_id, None)
+
+    def forget(self, user_id: int, username: str | None = None) -> None:
+        with self._lock:
+            self._forget(user_id, username)
+
+    def _forget(self, user_id: int, username: str | None) -> None:
+        old_name = self._by_id.pop(user_id, None)
+        if old_name is not None:
+            self._by_name.pop(old_name, None)
+        if username is not None:
+            entry = self._by_name.pop(username, None)
+            if entry is not None:
+                self._by_id.pop(entry[0], None)
+
+
+# --- CHAT SETTINGS ---
+class ChatSettings:
+    """Snapshot of the per-chat columns of a bot_chats row. Defaults match a chat with no row."""
+
+    __slots__ = (
+        "enforce_gban", "welcome_enabled", "custom_welcome", "goodbye_enabled",
+        "custom_goodbye", "clean_service", "warn_limit", "rules_text",
+    )
+
+    def __init__(
+        self,
+        enforce_gban: bool = True,
+        welcome_enabled: bool = True,
+        custom_welcome: str | None = None,
+        goodbye_enabled: bool = True,
+        custom_goodbye: str | None = None,
+        clean_service: bool = False,
+        warn_limit: int | None = None,
+        rules_text: str | None = None,
+    ):
+        self.enforce_gban = enforce_gban
+        self.welcome_enabled = welcome_enabled
+        self.custom_welcome = custom_welcome
+        self.goodbye_enabled = goodbye_enabled
+        self.custom_goodbye = custom_goodbye
+        self.clean_service = clean_service
+        self.warn_limit = warn_limit
+        self.rules_text = rules_text
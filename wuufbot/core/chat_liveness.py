@@ -0,0 +1,85 @@
+import logging
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from telegram import Update
+from telegram.constants import ChatType
+from telegram.ext import Application, ContextTypes
+
+from ..config import CHAT_ACTIVITY_WRITE_INTERVAL, USERLOGGER_TRACKED_USERS
+from .database import is_chat_dead
+from .async_database import mark_chat_dead, record_chat_activity
+from .utils import is_dead_chat_error
+
+logger = logging.getLogger(__name__)
+
+
+# --- WRITE-BEHIND CHAT ACTIVITY ---
+class ChatActivityBuffer:
+    """
+    Coalesces inbound activity by chat_id and writes last_activity in one batch.
+    A chat is only rewritten once its last write is older than
+    CHAT_ACTIVITY_WRITE_INTERVAL, unless it was flagged dead in the meantime.
+    """
+
+    def __init__(self, write_interval: float = CHAT_ACTIVITY_WRITE_INTERVAL, max_tracked: int = USERLOGGER_TRACKED_USERS):
+        self.write_interval = write_interval
+        self.max_tracked = max_tracked
+        self._pending: dict[int, str] = {}
+        self._written: OrderedDict[int, float] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def add(self, chat_id: int) -> None:
+        written = self._written.get(chat_id)
+        if written and time.monotonic() - written < self.write_interval and not is_chat_dead(chat_id):
+            return
+        self._pending[chat_id] = datetime.now(timezone.utc).isoformat()
+
+    async def flush(self) -> int:
+        if not self._pending:
+            return 0
+        batch, self._pending = self._pending, {}
+        if not await record_chat_activity(list(batch.items())):
+            for chat_id, last_activity in batch.items():
+                self._pending.setdefault(chat_id, last_activity)
+            return 0
+
+        now = time.monotonic()
+        for chat_id in batch:
+            self._written[chat_id] = now
+            self._written.move_to_end(chat_id)
+        while len(self._written) > self.max_tracked:
+            self._written.popitem(last=False)
+        return len(batch)
+
+chat_activity = ChatActivityBuffer()
+
+async def record_inbound_activity(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    chat = update.effective_chat
+    if chat and chat.type != ChatType.PRIVATE:
+        chat_activity.add(chat.id)
+
+async def flush_chat_activity(context: ContextTypes.DEFAULT_TYPE | None = None) -> None:
+    written = await chat_activity.flush()
+    if written:
+        logger.debug(f"Recorded activity for {written} chat(s).")
+
+
+# --- DEAD CHAT TRACKING ---
+def dead_chat_tracker(application: Application):
+    """
+    Returns the OutboundScheduler hook that flags a chat as dead when any Bot
+    API call to it fails with a Forbidden or "chat not found" error.
+    """
+    async def on_chat_error(chat_id: int | str, error: Exception) -> None:
+        # Private chats are not kept in bot_chats, and usernames cannot be matched to rows.
+        if not isinstance(chat_id, int) or chat_id > 0 or not is_dead_chat_error(error):
+            return
+        if await mark_chat_dead(chat_id):
+            known_chats = application.bot_data.get("known_chats")
+            if known_chats is not None:
+                known_chats.discard(chat_id)
+            logger.info(f"Chat {chat_id} flagged as dead after an API error: {error}")
+    return on_chat_error
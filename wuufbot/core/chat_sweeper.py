@@ -0,0 +1,146 @@
+import asyncio
+import logging
+import time
+from telegram import Bot
+from telegram.constants import ParseMode
+from telegram.error import TelegramError
+from telegram.ext import Application, ContextTypes
+
+from ..config import CHAT_SWEEP_CONCURRENCY, CHAT_SWEEP_PAGE_SIZE, CHAT_SWEEP_BATCH, CHAT_SWEEP_PROGRESS_INTERVAL
+from .async_database import (
+    get_chats_due_for_sweep, create_chat_sweep, save_chat_sweep_progress,
+    finish_chat_sweep, abandon_running_chat_sweeps, get_table_counts, prune_ban_ledger
+)
+from .rate_limiter import Priority
+from .utils import is_dead_chat_error
+
+logger = logging.getLogger(__name__)
+
+_current: "ChatSweep | None" = None
+_start_lock = asyncio.Lock()
+
+
+# --- CHAT SWEEP ---
+class ChatSweep:
+    """
+    Probes the given chats with get_chat and removes the ones the bot can no
+    longer reach. Chats are probed with bounded concurrency at BULK priority, so
+    the sweep never crowds out interactive traffic. Results are saved per page:
+    chats that answered get a fresh last_checked_at, dead ones are deleted in
+    one executemany.
+    """
+
+    def __init__(self, bot: Bot, sweep_id: int, chat_ids: list[int]):
+        self.bot = bot
+        self.id = sweep_id
+        self.chat_ids = chat_ids
+        self.status_chat_id: int | None = None
+        self.status_message_id: int | None = None
+        self.checked = 0
+        self.removed = 0
+        self.errors = 0
+        self.cancelled = False
+        self._slots = asyncio.Semaphore(CHAT_SWEEP_CONCURRENCY)
+
+    @property
+    def total(self) -> int:
+        return len(self.chat_ids)
+
+    async def _probe(self, chat_id: int) -> str:
+        async with self._slots:
+            try:
+                await self.bot.get_chat(chat_id, rate_limit_args=Priority.BULK)
+                return "alive"
+            except Exception as e:
+                if is_dead_chat_error(e):
+                    logger.info(f"Chat {chat_id} not found or access is forbidden. Removing from cache.")
+                    return "dead"
+                logger.warning(f"Unexpected API error while checking chat {chat_id}: {e}")
+                return "error"
+
+    async def run(self) -> None:
+        global _current
+        logger.info(f"Chat sweep #{self.id} started for {self.total} chats.")
+        last_report = time.monotonic()
+        try:
+            for start in range(0, self.total, CHAT_SWEEP_PAGE_SIZE):
+                if self.cancelled:
+                    break
+                page = self.chat_ids[start:start + CHAT_SWEEP_PAGE_SIZE]
+                results = await asyncio.gather(*(self._probe(chat_id) for chat_id in page))
+                alive = [chat_id for chat_id, result in zip(page, results) if result == "alive"]
+                dead = [chat_id for chat_id, result in zip(page, results) if result == "dead"]
+                errors = results.count("error")
+                removed = await save_chat_sweep_progress(self.id, alive, dead, errors)
+                if removed is None:
+                    logger.error(f"Chat sweep #{self.id} could not save its progress, stopping.")
+                    await finish_chat_sweep(self.id, "failed")
+                    return
+
+                self.checked += len(page)
+                self.removed += removed
+                self.errors += errors
+
+                if time.monotonic() - last_report >= CHAT_SWEEP_PROGRESS_INTERVAL:
+                    await self._report("🧹 Checking chats")
+                    last_report = time.monotonic()
+
+            state = "cancelled" if self.cancelled else "done"
+            await finish_chat_sweep(self.id, state)
+            await self._report("🛑 Cleanup cancelled" if self.cancelled else "✅ Cleanup complete!")
+            logger.info(f"Chat sweep #{self.id} {state}: checked {self.checked}, removed {self.removed}, errors {self.errors}.")
+        finally:
+            if _current is self:
+                _current = None
+
+    async def _report(self, title: str) -> None:
+        if not self.status_chat_id or not self.status_message_id:
+            return
+        text = (
+            f"<b>{title}</b> <code>#{self.id}</code>\n\n"
+            f"• Checked: <code>{self.checked}/{self.total}</code> chats\n"
+            f"• Removed: <code>{self.removed}</code> inactive/invalid entries\n"
+            f"• API errors: <code>{self.errors}</code>"
+        )
+        try:
+            await self.bot.edit_message_text(text, self.status_chat_id, self.status_message_id, parse_mode=ParseMode.HTML)
+        except TelegramError as e:
+            logger.warning(f"Could not update status of chat sweep #{self.id}: {e}")
+
+
+# --- CONTROL ---
+def get_current_sweep() -> ChatSweep | None:
+    return _current
+
+async def start_chat_sweep(application: Application, trigger: str, limit: int | None = None) -> ChatSweep | None:
+    """
+    Starts a background sweep of the `limit` chats checked longest ago, or of
+    every chat. Returns None when a sweep is already running or there is nothing to check.
+    """
+    global _current
+    async with _start_lock:
+        if _current is not None:
+            return None
+        if await abandon_running_chat_sweeps():
+            logger.info("Closed chat sweeps left running by a previous process.")
+        if limit is None:
+            counts = await get_table_counts()
+            limit = counts["bot_chats"] if counts else 0
+        chat_ids = await get_chats_due_for_sweep(limit) if limit else []
+        if not chat_ids:
+            return None
+        sweep_id = await create_chat_sweep(trigger, len(chat_ids))
+        if sweep_id is None:
+            return None
+
+        _current = ChatSweep(application.bot, sweep_id, chat_ids)
+        application.create_task(_current.run(), name=f"chat-sweep-{sweep_id}")
+        return _current
+
+async def run_scheduled_chat_sweep(context: ContextTypes.DEFAULT_TYPE) -> None:
+    """JobQueue callback: checks the CHAT_SWEEP_BATCH chats that have gone longest without a check."""
+    pruned = await prune_ban_ledger()
+    if pruned:
+        logger.info(f"Pruned {pruned} ban ledger row(s) for expired bans or dead chats.")
+    if not await start_chat_sweep(context.application, "scheduled", CHAT_SWEEP_BATCH):
+        logger.info("Scheduled chat sweep skipped: another sweep is running or there are no chats.")
@@ -256,6 +256,7 @@ DEVELOPER_COMMANDS_TEXT = """
 /listdevs - List all users with developer privileges.
 /setrank &lt;ID/@user/reply&gt; [support/sudo/dev] - Change the rank of a privileged user.
 /broadcast &lt;message to send&gt; - Send message to all Bot groups.
+/broadcastcancel [ID] - Stop a running broadcast, or all of them.
 /listmodules - List all Bot modules.
 /blchat &lt;Chat ID&gt; - Blacklists the current chat or a specified chat ID. The bot will immediately leave if present.
 /unblchat &lt;Chat ID&gt; - Unblacklists a chat.
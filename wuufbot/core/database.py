@@ -1,429 +1,757 @@
 import sqlite3
 import logging
 import json
+import queue
+import threading
+import time
+from contextlib import contextmanager
 from datetime import datetime, timezone
-from typing import List, Tuple
+from typing import Callable, Iterator, List, Tuple
 from telegram import User
 
-from ..config import DB_NAME, MAX_WARNS
+from ..config import (
+    DB_NAME, OWNER_ID, MAX_WARNS, DB_READ_CONNECTIONS, DB_CACHE_SIZE_KIB, DB_MMAP_SIZE,
+    CHAT_SETTINGS_CACHE_SIZE, USERNAME_CACHE_SIZE, NOTE_INDEX_CHATS, NOTE_CONTENT_CACHE_SIZE,
+    GIF_FILE_ID_POOL_SIZE
+)
+from .caches import RankRegistry, IdSet, TableMirror, ChatSets, ChatVersions, LRUCache, UsernameCache, ChatSettings
 
 logger = logging.getLogger(__name__)
 
+# --- CONNECTION POOL ---
+class ConnectionPool:
+    """
+    Keeps long-lived SQLite connections: one writer guarded by a lock and a small
+    set of readers. WAL mode lets the readers run alongside the writer.
+    """
+
+    def __init__(self, db_path: str, read_connections: int = DB_READ_CONNECTIONS):
+        self.db_path = db_path
+        self.read_connections = max(1, read_connections)
+        self._init_lock = threading.Lock()
+        self._write_lock = threading.RLock()
+        self._write_depth = 0
+        self._writer: sqlite3.Connection | None = None
+        self._readers: queue.LifoQueue[sqlite3.Connection] | None = None
+        self._all_connections: list[sqlite3.Connection] = []
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=30.0, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(f"PRAGMA cache_size=-{int(DB_CACHE_SIZE_KIB)}")
+        conn.execute(f"PRAGMA mmap_size={int(DB_MMAP_SIZE)}")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        conn.execute("PRAGMA busy_timeout=30000")
+        self._all_connections.append(conn)
+        return conn
+
+    def _ensure_open(self) -> None:
+        if self._writer is not None:
+            return
+        with self._init_lock:
+            if self._writer is not None:
+                return
+            writer = self._connect()
+            readers: queue.LifoQueue[sqlite3.Connection] = queue.LifoQueue()
+            for _ in range(self.read_connections):
+                readers.put(self._connect())
+            self._readers = readers
+            self._writer = writer
+            logger.info(f"Opened SQLite pool for '{self.db_path}' (1 writer, {self.read_connections} readers).")
+
+    @contextmanager
+    def reader(self) -> Iterator[sqlite3.Connection]:
+        self._ensure_open()
+        conn = self._readers.get()
+        try:
+            yield conn
+        finally:
+            if conn.in_transaction:
+                conn.rollback()
+            self._readers.put(conn)
+
+    @contextmanager
+    def writer(self) -> Iterator[sqlite3.Connection]:
+        """Yields the writer connection. Commits when the outermost block exits cleanly, rolls back otherwise."""
+        self._ensure_open()
+        with self._write_lock:
+            self._write_depth += 1
+            try:
+                yield self._writer
+            except BaseException:
+                if self._write_depth == 1:
+                    self._writer.rollback()
+                raise
+            else:
+                if self._write_depth == 1:
+                    self._writer.commit()
+            finally:
+                self._write_depth -= 1
+
+    def checkpoint(self) -> None:
+        """Folds the WAL back into the main database file, e.g. before copying it."""
+        with self.writer() as conn:
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    def close(self) -> None:
+        with self._init_lock, self._write_lock:
+            if self._writer is None:
+                return
+            for conn in self._all_connections:
+                try:
+                    conn.close()
+                except sqlite3.Error as e:
+                    logger.warning(f"Error closing SQLite connection: {e}")
+            self._all_connections.clear()
+            self._writer = None
+            self._readers = None
+            logger.info("SQLite connection pool closed.")
+
+_pool = ConnectionPool(DB_NAME)
+
+def read_connection():
+    return _pool.reader()
+
+def write_connection():
+    return _pool.writer()
+
+def checkpoint_db() -> None:
+    try:
+        _pool.checkpoint()
+    except sqlite3.Error as e:
+        logger.error(f"SQLite error during WAL checkpoint: {e}")
+
+def close_db() -> None:
+    _pool.close()
+
+# --- IN-MEMORY REGISTRIES ---
+ranks = RankRegistry(OWNER_ID)
+
+_RANK_TABLES = {
+    "dev": "dev_users",
+    "sudo": "sudo_users",
+    "support": "support_users",
+    "whitelist": "whitelist_users",
+    "blacklist": "blacklist",
+}
+
+def load_rank_registry() -> bool:
+    try:
+        with read_connection() as conn:
+            members = {
+                rank: [row[0] for row in conn.execute(f"SELECT user_id FROM {table}")]
+                for rank, table in _RANK_TABLES.items()
+            }
+        ranks.load(members)
+        return True
+    except sqlite3.Error as e:
+        logger.error(f"SQLite error loading rank registry: {e}", exc_info=True)
+        return False
+
+def _ranks_ready() -> bool:
+    return ranks.loaded or load_rank_registry()
+
+gbanned_ids: IdSet[int] = IdSet("global bans")
+
+def load_gban_set() -> bool:
+    try:
+        with read_connection() as conn:
+            gbanned_ids.load(row[0] for row in conn.execute("SELECT user_id FROM global_bans"))
+        return True
+    except sqlite3.Error as e:
+        logger.error(f"SQLite error loading global ban set: {e}", exc_info=True)
+        return False
+
+def _gbans_ready() -> bool:
+    return gbanned_ids.loaded or load_gban_set()
+
+dead_chats: IdSet[int] = IdSet("dead chats")
+
+def load_dead_chats() -> bool:
+    try:
+        with read_connection() as conn:
+            dead_chats.load(row[0] for row in conn.execute("SELECT chat_id FROM bot_chats WHERE dead_at IS NOT NULL"))
+        return True
+    except sqlite3.Error as e:
+        logger.error(f"SQLite error loading dead chats: {e}", exc_info=True)
+        return False
+
+chat_settings_cache: LRUCache[int, ChatSettings] = LRUCache(CHAT_SETTINGS_CACHE_SIZE)
+username_cache: UsernameCache[User] = UsernameCache(USERNAME_CACHE_SIZE)
+note_index: LRUCache[int, frozenset[str]] = LRUCache(NOTE_INDEX_CHATS)
+note_contents: LRUCache[tuple[int, str], str] = LRUCache(NOTE_CONTENT_CACHE_SIZE)
+
+disabled_modules: IdSet[str] = IdSet("disabled modules")
+disabled_commands: ChatSets[str] = ChatSets("disabled commands")
+
+def load_disabled_state() -> bool:
+    try:
+        with read_connection() as conn:
+            modules = [row[0] for row in conn.execute("SELECT module_name FROM disabled_modules")]
+            commands = conn.execute("SELECT chat_id, command_name FROM disabled_commands_per_chat").fetchall()
+        disabled_modules.load(modules)
+        disabled_commands.load(commands)
+        return True
+    except sqlite3.Error as e:
+        logger.error(f"SQLite error loading disabled modules/commands: {e}", exc_info=True)
+        return False
+
+def _disabled_ready() -> bool:
+    return (disabled_modules.loaded and disabled_commands.loaded) or load_disabled_state()
+
+filter_versions = ChatVersions()
+
+afk_users: TableMirror[int, Tuple[str | None, str]] = TableMirror("AFK")
+
+def load_afk_users() -> bool:
+    try:
+        with read_connection() as conn:
+            afk_users.load((row[0], (row[1], row[2])) for row in conn.execute("SELECT user_id, reason, afk_since FROM afk_users"))
+        return True
+    except sqlite3.Error as e:
+        logger.error(f"SQLite error loading AFK users: {e}", exc_info=True)
+        return False
+
+def _afk_ready() -> bool:
+    return afk_users.loaded or load_afk_users()
+
+gif_file_ids: TableMirror[str, Tuple[Tuple[str, str], ...]] = TableMirror("GIF file_id")
+
+def load_gif_file_ids() -> bool:
+    try:
+        with read_connection() as conn:
+            rows = conn.execute("SELECT search_term, url, file_id FROM gif_file_ids ORDER BY added_at").fetchall()
+        pools: dict[str, list[Tuple[str, str]]] = {}
+        for term, url, file_id in rows:
+            pools.setdefault(term, []).append((url, file_id))
+        gif_file_ids.load((term, tuple(pool)) for term, pool in pools.items())
+        return True
+    except sqlite3.Error as e:
+        logger.error(f"SQLite error loading GIF file_ids: {e}", exc_info=True)
+        return False
+
+def _gif_file_ids_ready() -> bool:
+    return gif_file_ids.loaded or load_gif_file_ids()
+
 def init_db():
-    conn = None
-    try:
-        conn = sqlite3.connect(DB_NAME)
-        cursor = conn.cursor()
-
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS users (
-                user_id INTEGER PRIMARY KEY,
-                username TEXT,
-                first_name TEXT,
-                last_name TEXT,
-                language_code TEXT,
-                is_bot INTEGER,
-                last_seen TEXT 
-            )
-        """)
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_username ON users (username)")
-
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS blacklist (
-                user_id INTEGER PRIMARY KEY,
-                reason TEXT,
-                banned_by_id INTEGER,
-                timestamp TEXT 
-            )
-        """)
+    try:
+        with write_connection() as conn:
+            cursor = conn.cursor()
 
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS whitelist_users (
-                user_id INTEGER PRIMARY KEY,
-                added_by_id INTEGER NOT NULL,
-                timestamp TEXT NOT NULL
-            )
-        """)
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS users (
+                    user_id INTEGER PRIMARY KEY,
+                    username TEXT,
+                    first_name TEXT,
+                    last_name TEXT,
+                    language_code TEXT,
+                    is_bot INTEGER,
+                    last_seen TEXT 
+                )
+            """)
+
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS blacklist (
+                    user_id INTEGER PRIMARY KEY,
+                    reason TEXT,
+                    banned_by_id INTEGER,
+                    timestamp TEXT 
+                )
+            """)
 
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS support_users (
-                user_id INTEGER PRIMARY KEY,
-                added_by_id INTEGER NOT NULL,
-                timestamp TEXT NOT NULL
-            )
-        """)
-        
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS sudo_users (
-                user_id INTEGER PRIMARY KEY,
-                added_by_id INTEGER NOT NULL,
-                timestamp TEXT NOT NULL
-            )
-        """)
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS whitelist_users (
+                    user_id INTEGER PRIMARY KEY,
+                    added_by_id INTEGER NOT NULL,
+                    timestamp TEXT NOT NULL
+                )
+            """)
 
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS dev_users (
-                user_id INTEGER PRIMARY KEY,
-                added_by_id INTEGER NOT NULL,
-                timestamp TEXT NOT NULL
-            )
-        """)
-
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS global_bans (
-                user_id INTEGER PRIMARY KEY,
-                reason TEXT,
-                banned_by_id INTEGER NOT NULL,
-                timestamp TEXT NOT NULL
-            )
-        """)
-
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS bot_chats (
-                chat_id INTEGER PRIMARY KEY,
-                chat_title TEXT,
-                added_at TEXT NOT NULL,
-                enforce_gban INTEGER DEFAULT 1 NOT NULL,
-                welcome_enabled INTEGER DEFAULT 1 NOT NULL,
-                custom_welcome TEXT,
-                goodbye_enabled INTEGER DEFAULT 1 NOT NULL,
-                custom_goodbye TEXT,
-                clean_service_messages INTEGER DEFAULT 0 NOT NULL,
-                warn_limit INTEGER,
-                rules_text TEXT
-            )
-        """)
-
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS notes (
-                chat_id INTEGER NOT NULL,
-                note_name TEXT NOT NULL,
-                content TEXT NOT NULL,
-                created_by_id INTEGER,
-                created_at TEXT,
-                PRIMARY KEY (chat_id, note_name)
-            )
-        """)
-
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS warnings (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id INTEGER NOT NULL,
-                chat_id INTEGER NOT NULL,
-                reason TEXT,
-                warned_by_id INTEGER,
-                warned_at TEXT
-            )
-        """)
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS support_users (
+                    user_id INTEGER PRIMARY KEY,
+                    added_by_id INTEGER NOT NULL,
+                    timestamp TEXT NOT NULL
+                )
+            """)
 
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS afk_users (
-                user_id INTEGER PRIMARY KEY,
-                reason TEXT,
-                afk_since TEXT NOT NULL
-            )
-        """)
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS sudo_users (
+                    user_id INTEGER PRIMARY KEY,
+                    added_by_id INTEGER NOT NULL,
+                    timestamp TEXT NOT NULL
+                )
+            """)
 
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS disabled_modules (
-                module_name TEXT PRIMARY KEY
-            )
-        """)
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS dev_users (
+                    user_id INTEGER PRIMARY KEY,
+                    added_by_id INTEGER NOT NULL,
+                    timestamp TEXT NOT NULL
+                )
+            """)
+
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS global_bans (
+                    user_id INTEGER PRIMARY KEY,
+                    reason TEXT,
+                    banned_by_id INTEGER NOT NULL,
+                    timestamp TEXT NOT NULL
+                )
+            """)
+
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS bot_chats (
+                    chat_id INTEGER PRIMARY KEY,
+                    chat_title TEXT,
+                    added_at TEXT NOT NULL,
+                    enforce_gban INTEGER DEFAULT 1 NOT NULL,
+                    welcome_enabled INTEGER DEFAULT 1 NOT NULL,
+                    custom_welcome TEXT,
+                    goodbye_enabled INTEGER DEFAULT 1 NOT NULL,
+                    custom_goodbye TEXT,
+                    clean_service_messages INTEGER DEFAULT 0 NOT NULL,
+                    warn_limit INTEGER,
+                    rules_text TEXT
+                )
+            """)
+
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS notes (
+                    chat_id INTEGER NOT NULL,
+                    note_name TEXT NOT NULL,
+                    content TEXT NOT NULL,
+                    created_by_id INTEGER,
+                    created_at TEXT,
+                    PRIMARY KEY (chat_id, note_name)
+                )
+            """)
+
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS warnings (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    user_id INTEGER NOT NULL,
+                    chat_id INTEGER NOT NULL,
+                    reason TEXT,
+                    warned_by_id INTEGER,
+                    warned_at TEXT
+                )
+            """)
 
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS disabled_commands_per_chat (
-                chat_id INTEGER,
-                command_name TEXT,
-                PRIMARY KEY (chat_id, command_name)
-            )
-        """)
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS afk_users (
+                    user_id INTEGER PRIMARY KEY,
+                    reason TEXT,
+                    afk_since TEXT NOT NULL
+                )
+            """)
 
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS chat_join_settings (
-                chat_id INTEGER PRIMARY KEY,
-                filters TEXT,
-                action TEXT NOT NULL DEFAULT 'kick'
-            )
-        """)
-
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS chat_filters (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                chat_id INTEGER NOT NULL,
-                keyword TEXT NOT NULL,
-                reply_text TEXT,
-                reply_type TEXT NOT NULL DEFAULT 'text', -- 'text', 'photo', 'sticker', 'audio', 'document', 'animation', 'video', 'voice'
-                file_id TEXT,
-                filter_type TEXT NOT NULL DEFAULT 'keyword', -- 'keyword', 'wildcard', 'regex'
-                buttons TEXT,
-                UNIQUE (chat_id, keyword)
-            )
-        """)
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS disabled_modules (
+                    module_name TEXT PRIMARY KEY
+                )
+            """)
+
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS disabled_commands_per_chat (
+                    chat_id INTEGER,
+                    command_name TEXT,
+                    PRIMARY KEY (chat_id, command_name)
+                )
+            """)
+
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS chat_join_settings (
+                    chat_id INTEGER PRIMARY KEY,
+                    filters TEXT,
+                    action TEXT NOT NULL DEFAULT 'kick'
+                )
+            """)
+
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS chat_filters (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    chat_id INTEGER NOT NULL,
+                    keyword TEXT NOT NULL,
+                    reply_text TEXT,
+                    reply_type TEXT NOT NULL DEFAULT 'text', -- 'text', 'photo', 'sticker', 'audio', 'document', 'animation', 'video', 'voice'
+                    file_id TEXT,
+                    filter_type TEXT NOT NULL DEFAULT 'keyword', -- 'keyword', 'wildcard', 'regex'
+                    buttons TEXT,
+                    UNIQUE (chat_id, keyword)
+                )
+            """)
+
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS chat_blacklist (
+                    chat_id INTEGER PRIMARY KEY,
+                    chat_name TEXT,
+                    timestamp TEXT
+                )
+            """)
+
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS broadcasts (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    started_by_id INTEGER NOT NULL,
+                    text TEXT,
+                    from_chat_id INTEGER,
+                    message_id INTEGER,
+                    status_chat_id INTEGER,
+                    status_message_id INTEGER,
+                    last_chat_id INTEGER,
+                    total INTEGER NOT NULL,
+                    sent INTEGER DEFAULT 0 NOT NULL,
+                    failed INTEGER DEFAULT 0 NOT NULL,
+                    removed INTEGER DEFAULT 0 NOT NULL,
+                    state TEXT DEFAULT 'running' NOT NULL,
+                    created_at TEXT NOT NULL,
+                    finished_at TEXT
+                )
+            """)
+
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS ban_ledger (
+                    user_id INTEGER NOT NULL,
+                    chat_id INTEGER NOT NULL,
+                    source TEXT NOT NULL,
+                    until_date TEXT,
+                    banned_at TEXT NOT NULL,
+                    PRIMARY KEY (user_id, chat_id)
+                )
+            """)
+
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS chat_sweeps (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    trigger TEXT NOT NULL,
+                    total INTEGER NOT NULL,
+                    checked INTEGER DEFAULT 0 NOT NULL,
+                    removed INTEGER DEFAULT 0 NOT NULL,
+                    errors INTEGER DEFAULT 0 NOT NULL,
+                    state TEXT DEFAULT 'running' NOT NULL,
+                    started_at TEXT NOT NULL,
+                    finished_at TEXT
+                )
+            """)
+
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS gif_file_ids (
+                    url TEXT PRIMARY KEY,
+                    search_term TEXT NOT NULL,
+                    file_id TEXT NOT NULL,
+                    added_at TEXT NOT NULL
+                )
+            """)
 
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS chat_blacklist (
-                chat_id INTEGER PRIMARY KEY,
-                chat_name TEXT,
-                timestamp TEXT
-            )
-        """)
-        
-        conn.commit()
         logger.info(f"Database '{DB_NAME}' initialized successfully.")
     except sqlite3.Error as e:
         logger.error(f"SQLite error during DB initialization: {e}", exc_info=True)
-    finally:
-        if conn:
-            conn.close()
+
+    try:
+        run_migrations()
+    except sqlite3.Error:
+        logger.critical("CRITICAL: Database migration failed. Refusing to start on a partially upgraded schema.")
+        exit(1)
+    load_rank_registry()
+    load_gban_set()
+    load_disabled_state()
+    load_afk_users()
+    load_gif_file_ids()
+    load_dead_chats()
+
+# --- MIGRATIONS ---
+# Append-only: each entry runs once, in order, in one transaction that also sets PRAGMA user_version to its number.
+# Steps must be idempotent so databases created before this runner existed upgrade cleanly:
+# use IF [NOT] EXISTS for SQL, and _add_column for columns, since ADD COLUMN has no such clause.
+MigrationStep = str | Callable[[sqlite3.Connection], None]
+
+def _add_column(table: str, column: str, definition: str) -> Callable[[sqlite3.Connection], None]:
+    def step(conn: sqlite3.Connection) -> None:
+        if column not in {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}:
+            conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+    return step
+
+MIGRATIONS: list[tuple[int, str, tuple[MigrationStep, ...]]] = [
+    (1, "case-insensitive username index", (
+        "DROP INDEX IF EXISTS idx_username",
+        "CREATE INDEX IF NOT EXISTS idx_username_nocase ON users (username COLLATE NOCASE)",
+    )),
+    (2, "warnings (chat_id, user_id) index", (
+        "CREATE INDEX IF NOT EXISTS idx_warnings_chat_user ON warnings (chat_id, user_id)",
+    )),
+    (3, "indexes for timestamp-ordered listings", (
+        "CREATE INDEX IF NOT EXISTS idx_whitelist_users_timestamp ON whitelist_users (timestamp)",
+        "CREATE INDEX IF NOT EXISTS idx_support_users_timestamp ON support_users (timestamp)",
+        "CREATE INDEX IF NOT EXISTS idx_sudo_users_timestamp ON sudo_users (timestamp)",
+        "CREATE INDEX IF NOT EXISTS idx_dev_users_timestamp ON dev_users (timestamp)",
+        "CREATE INDEX IF NOT EXISTS idx_bot_chats_added_at ON bot_chats (added_at)",
+        "CREATE INDEX IF NOT EXISTS idx_chat_blacklist_timestamp ON chat_blacklist (timestamp)",
+    )),
+    (4, "bot_chats liveness check timestamp", (
+        _add_column("bot_chats", "last_checked_at", "TEXT"),
+        "CREATE INDEX IF NOT EXISTS idx_bot_chats_sweep_order ON bot_chats (COALESCE(last_checked_at, added_at))",
+    )),
+    (5, "bot_chats passive liveness", (
+        _add_column("bot_chats", "last_activity", "TEXT"),
+        _add_column("bot_chats", "dead_at", "TEXT"),
+        "DROP INDEX IF EXISTS idx_bot_chats_sweep_order",
+        "CREATE INDEX IF NOT EXISTS idx_bot_chats_sweep_order ON bot_chats "
+        "(dead_at IS NULL, MAX(COALESCE(last_checked_at, added_at), COALESCE(last_activity, added_at)))",
+    )),
+]
+
+def get_schema_version() -> int:
+    with read_connection() as conn:
+        return conn.execute("PRAGMA user_version").fetchone()[0]
+
+def _apply_migration(version: int, steps: tuple[MigrationStep, ...]) -> None:
+    with write_connection() as conn:
+        # sqlite3 opens no implicit transaction for DDL or PRAGMA, so the step is wrapped explicitly.
+        isolation_level, conn.isolation_level = conn.isolation_level, None
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                for step in steps:
+                    if callable(step):
+                        step(conn)
+                    else:
+                        conn.execute(step)
+                conn.execute(f"PRAGMA user_version = {int(version)}")
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        finally:
+            conn.isolation_level = isolation_level
+
+def run_migrations() -> list[tuple[int, str, float]]:
+    """
+    Applies pending migrations, each atomically. Returns (version, name, ms) per
+    applied step and raises sqlite3.Error when one fails, leaving it unapplied.
+    """
+    report: list[tuple[int, str, float]] = []
+    try:
+        current = get_schema_version()
+        for version, name, steps in MIGRATIONS:
+            if version <= current:
+                continue
+            started = time.perf_counter()
+            _apply_migration(version, steps)
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            report.append((version, name, elapsed_ms))
+            logger.info(f"Migration {version} ({name}) applied in {elapsed_ms:.1f} ms.")
+    except sqlite3.Error as e:
+        logger.error(f"SQLite error while running migrations: {e}", exc_info=True)
+        raise
+
+    if report:
+        total_ms = sum(ms for _, _, ms in report)
+        logger.info(f"Schema upgraded to version {report[-1][0]} ({len(report)} migration(s), {total_ms:.1f} ms total).")
+    return report
 
 # --- DATABASE HELPER FUNCTIONS ---
 # --- MODULES ---
 def is_module_disabled(module_name: str) -> bool:
-    try:
-        with sqlite3.connect(DB_NAME) as conn:
-            cursor = conn.cursor()
-            cursor.execute("SELECT module_name FROM disabled_modules WHERE module_name = ?", (module_name,))
-            return cursor.fetchone() is not None
-    except sqlite3.Error as e:
-        logger.error(f"Błąd SQLite przy sprawdzaniu modułu {module_name}: {e}")
-        return False
+    return _disabled_ready() and module_name in disabled_modules
 
 def disable_module(module_name: str) -> bool:
     try:
-        with sqlite3.connect(DB_NAME) as conn:
-            conn.execute("INSERT OR IGNORE INTO disabled_modules (module_name) VALUES (?)", (module_name,))
-            return conn.total_changes > 0
+        with write_connection() as conn:
+            cursor = conn.execute("INSERT OR IGNORE INTO disabled_modules (module_name) VALUES (?)", (module_name,))
+            changed = cursor.rowcount > 0
+        disabled_modules.add(module_name)
+        return changed
     except sqlite3.Error as e:
         logger.error(f"Błąd SQLite przy wyłączaniu modułu {module_name}: {e}")
         return False
 
 def enable_module(module_name: str) -> bool:
     try:
-        with sqlite3.connect(DB_NAME) as conn:
-            conn.execute("DELETE FROM disabled_modules WHERE module_name = ?", (module_name,))
-            return conn.total_changes > 0
+        with write_connection() as conn:
+            cursor = conn.execute("DELETE FROM disabled_modules WHERE module_name = ?", (module_name,))
+            changed = cursor.rowcount > 0
+        disabled_modules.discard(module_name)
+        return changed
     except sqlite3.Error as e:
         logger.error(f"Błąd SQLite przy włączaniu modułu {module_name}: {e}")
         return False
 
 def get_disabled_modules() -> list:
-    try:
-        with sqlite3.connect(DB_NAME) as conn:
-            cursor = conn.cursor()
-            cursor.execute("SELECT module_name FROM disabled_modules")
-            return [row[0] for row in cursor.fetchall()]
-    except sqlite3.Error as e:
-        logger.error(f"Błąd SQLite przy pobieraniu wyłączonych modułów: {e}")
+    if not _disabled_ready():
         return []
+    return sorted(disabled_modules.snapshot())
 
 # --- DISABLERS ---
 def is_command_disabled_in_chat(chat_id: int, command_name: str) -> bool:
-    try:
-        with sqlite3.connect(DB_NAME) as conn:
-            cursor = conn.cursor()
-            cursor.execute(
-                "SELECT 1 FROM disabled_commands_per_chat WHERE chat_id = ? AND command_name = ?",
-                (chat_id, command_name.lower())
-            )
-            return cursor.fetchone() is not None
-    except sqlite3.Error as e:
-        logger.error(f"SQLite error checking disabled command '{command_name}' in chat {chat_id}: {e}")
-        return False
+    return _disabled_ready() and command_name.lower() in disabled_commands.get(chat_id)
 
 def disable_command_in_chat(chat_id: int, command_name: str) -> bool:
     try:
-        with sqlite3.connect(DB_NAME) as conn:
-            conn.execute(
+        with write_connection() as conn:
+            cursor = conn.execute(
                 "INSERT OR IGNORE INTO disabled_commands_per_chat (chat_id, command_name) VALUES (?, ?)",
                 (chat_id, command_name.lower())
             )
-            return conn.total_changes > 0
+            changed = cursor.rowcount > 0
+        disabled_commands.add(chat_id, command_name.lower())
+        return changed
     except sqlite3.Error as e:
         logger.error(f"SQLite error disabling command '{command_name}' in chat {chat_id}: {e}")
         return False
 
 def enable_command_in_chat(chat_id: int, command_name: str) -> bool:
     try:
-        with sqlite3.connect(DB_NAME) as conn:
-            conn.execute(
+        with write_connection() as conn:
+            cursor = conn.execute(
                 "DELETE FROM disabled_commands_per_chat WHERE chat_id = ? AND command_name = ?",
                 (chat_id, command_name.lower())
             )
-            return conn.total_changes > 0
+            changed = cursor.rowcount > 0
+        disabled_commands.discard(chat_id, command_name.lower())
+        return changed
     except sqlite3.Error as e:
         logger.error(f"SQLite error enabling command '{command_name}' in chat {chat_id}: {e}")
         return False
 
 def get_disabled_commands_in_chat(chat_id: int) -> list[str]:
-    try:
-        with sqlite3.connect(DB_NAME) as conn:
-            cursor = conn.cursor()
-            cursor.execute(
-                "SELECT command_name FROM disabled_commands_per_chat WHERE chat_id = ?",
-                (chat_id,)
-            )
-            return [row[0] for row in cursor.fetchall()]
-    except sqlite3.Error as e:
-        logger.error(f"SQLite error getting disabled commands for chat {chat_id}: {e}")
+    if not _disabled_ready():
         return []
+    return sorted(disabled_commands.get(chat_id))
 
 # --- BLACKLIST ---
 def add_to_blacklist(user_id: int, banned_by_id: int, reason: str | None = "No reason provided.") -> bool:
-    conn = None
-    try:
-        conn = sqlite3.connect(DB_NAME)
-        cursor = conn.cursor()
-        current_timestamp_iso = datetime.now(timezone.utc).isoformat()
-        cursor.execute(
-            "INSERT OR IGNORE INTO blacklist (user_id, reason, banned_by_id, timestamp) VALUES (?, ?, ?, ?)",
-            (user_id, reason, banned_by_id, current_timestamp_iso)
-        )
-        conn.commit()
-        return cursor.rowcount > 0
+    try:
+        with write_connection() as conn:
+            cursor = conn.cursor()
+            current_timestamp_iso = datetime.now(timezone.utc).isoformat()
+            cursor.execute(
+                "INSERT OR IGNORE INTO blacklist (user_id, reason, banned_by_id, timestamp) VALUES (?, ?, ?, ?)",
+                (user_id, reason, banned_by_id, current_timestamp_iso)
+            )
+            changed = cursor.rowcount > 0
+        ranks.add("blacklist", user_id)
+        return changed
     except sqlite3.Error as e:
         logger.error(f"SQLite error adding user {user_id} to blacklist: {e}", exc_info=True)
         return False
-    finally:
-        if conn:
-            conn.close()
 
 def remove_from_blacklist(user_id: int) -> bool:
-    conn = None
     try:
-        conn = sqlite3.connect(DB_NAME)
-        cursor = conn.cursor()
-        cursor.execute("DELETE FROM blacklist WHERE user_id = ?", (user_id,))
-        conn.commit()
-        return cursor.rowcount > 0
+        with write_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("DELETE FROM blacklist WHERE user_id = ?", (user_id,))
+            changed = cursor.rowcount > 0
+        ranks.discard("blacklist", user_id)
+        return changed
     except sqlite3.Error as e:
         logger.error(f"SQLite error removing user {user_id} from blacklist: {e}", exc_info=True)
         return False
-    finally:
-        if conn:
-            conn.close()
 
 def get_blacklist_reason(user_id: int) -> str | None:
-    conn = None
-    try:
-        conn = sqlite3.connect(DB_NAME)
-        cursor = conn.cursor()
-        cursor.execute("SELECT reason FROM blacklist WHERE user_id = ?", (user_id,))
-        row = cursor.fetchone()
-        if row:
-            return row[0]
+    if _ranks_ready() and not ranks.has("blacklist", user_id):
         return None
+    try:
+        with read_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT reason FROM blacklist WHERE user_id = ?", (user_id,))
+            row = cursor.fetchone()
+            if row:
+                return row[0]
+            return None
     except sqlite3.Error as e:
         logger.error(f"SQLite error checking blacklist reason for user {user_id}: {e}", exc_info=True)
         return None
-    finally:
-        if conn:
-            conn.close()
 
 def is_user_blacklisted(user_id: int) -> bool:
+    if _ranks_ready():
+        return ranks.has("blacklist", user_id)
     return get_blacklist_reason(user_id) is not None
 
 # --- WHITELIST ---
 def add_to_whitelist(user_id: int, added_by_id: int) -> bool:
     try:
-        with sqlite3.connect(DB_NAME) as conn:
+        with write_connection() as conn:
             timestamp = datetime.now(timezone.utc).isoformat()
-            conn.execute(
+            cursor = conn.execute(
                 "INSERT OR IGNORE INTO whitelist_users (user_id, added_by_id, timestamp) VALUES (?, ?, ?)",
                 (user_id, added_by_id, timestamp)
             )
-            return conn.total_changes > 0
+            changed = cursor.rowcount > 0
+        ranks.add("whitelist", user_id)
+        return changed
     except sqlite3.Error as e:
         logger.error(f"SQLite error adding user {user_id} to whitelist: {e}")
         return False
 
 def remove_from_whitelist(user_id: int) -> bool:
     try:
-        with sqlite3.connect(DB_NAME) as conn:
+        with write_connection() as conn:
             cursor = conn.cursor()
             cursor.execute("DELETE FROM whitelist_users WHERE user_id = ?", (user_id,))
-            return cursor.rowcount > 0
+            changed = cursor.rowcount > 0
+        ranks.discard("whitelist", user_id)
+        return changed
     except sqlite3.Error as e:
         logger.error(f"SQLite error removing user {user_id} from whitelist: {e}")
         return False
 
 def is_whitelisted(user_id: int) -> bool:
-    try:
-        with sqlite3.connect(DB_NAME) as conn:
-            res = conn.cursor().execute("SELECT 1 FROM whitelist_users WHERE user_id = ?", (user_id,)).fetchone()
-            return res is not None
-    except sqlite3.Error:
-        return False
+    return _ranks_ready() and ranks.has("whitelist", user_id)
 
 def get_all_whitelist_users_from_db() -> List[Tuple[int, str]]:
-    conn = None
     whitelist_list = []
     try:
-        conn = sqlite3.connect(DB_NAME)
-        cursor = conn.cursor()
-        cursor.execute("SELECT user_id, timestamp FROM whitelist_users ORDER BY timestamp DESC")
-        rows = cursor.fetchall()
-        for row in rows:
-            whitelist_list.append((row[0], row[1]))
+        with read_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT user_id, timestamp FROM whitelist_users ORDER BY timestamp DESC")
+            rows = cursor.fetchall()
+            for row in rows:
+                whitelist_list.append((row[0], row[1]))
     except sqlite3.Error as e:
         logger.error(f"SQLite error fetching all whitelist users: {e}", exc_info=True)
-    finally:
-        if conn:
-            conn.close()
     return whitelist_list
 
 # --- SUPPORT ---
 def add_support_user(user_id: int, added_by_id: int) -> bool:
     """Adds a user to the Support list."""
-    conn = None
-    try:
-        conn = sqlite3.connect(DB_NAME)
-        cursor = conn.cursor()
-        current_timestamp_iso = datetime.now(timezone.utc).isoformat()
-        cursor.execute(
-            "INSERT OR IGNORE INTO support_users (user_id, added_by_id, timestamp) VALUES (?, ?, ?)",
-            (user_id, added_by_id, current_timestamp_iso)
-        )
-        conn.commit()
-        return cursor.rowcount > 0
+    try:
+        with write_connection() as conn:
+            cursor = conn.cursor()
+            current_timestamp_iso = datetime.now(timezone.utc).isoformat()
+            cursor.execute(
+                "INSERT OR IGNORE INTO support_users (user_id, added_by_id, timestamp) VALUES (?, ?, ?)",
+                (user_id, added_by_id, current_timestamp_iso)
+            )
+            changed = cursor.rowcount > 0
+        ranks.add("support", user_id)
+        return changed
     except sqlite3.Error as e:
         logger.error(f"SQLite error adding support user {user_id}: {e}", exc_info=True)
         return False
-    finally:
-        if conn: conn.close()
 
 def remove_support_user(user_id: int) -> bool:
     """Removes a user from the Support list."""
-    conn = None
     try:
-        conn = sqlite3.connect(DB_NAME)
-        cursor = conn.cursor()
-        cursor.execute("DELETE FROM support_users WHERE user_id = ?", (user_id,))
-        conn.commit()
-        return cursor.rowcount > 0
+        with write_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("DELETE FROM support_users WHERE user_id = ?", (user_id,))
+            changed = cursor.rowcount > 0
+        ranks.discard("support", user_id)
+        return changed
     except sqlite3.Error as e:
         logger.error(f"SQLite error removing support user {user_id}: {e}", exc_info=True)
         return False
-    finally:
-        if conn: conn.close()
 
 def is_support_user(user_id: int) -> bool:
     """Checks if a user is on the Support list."""
-    conn = None
-    try:
-        conn = sqlite3.connect(DB_NAME)
-        cursor = conn.cursor()
-        cursor.execute("SELECT 1 FROM support_users WHERE user_id = ?", (user_id,))
-        return cursor.fetchone() is not None
-    except sqlite3.Error as e:
-        logger.error(f"SQLite error checking support for user {user_id}: {e}", exc_info=True)
-        return False
-    finally:
-        if conn: conn.close()
+    return _ranks_ready() and ranks.has("support", user_id)
 
 def get_all_support_users_from_db() -> List[Tuple[int, str]]:
     """Fetches all Support users from the database."""
     try:
-        with sqlite3.connect(DB_NAME) as conn:
+        with read_connection() as conn:
             cursor = conn.cursor()
             cursor.execute("SELECT user_id, timestamp FROM support_users ORDER BY timestamp DESC")
             return cursor.fetchall()
@@ -434,125 +762,90 @@ def get_all_support_users_from_db() -> List[Tuple[int, str]]:
 # --- SUDO ---
 def add_sudo_user(user_id: int, added_by_id: int) -> bool:
     """Adds a user to the sudo list."""
-    conn = None
-    try:
-        conn = sqlite3.connect(DB_NAME)
-        cursor = conn.cursor()
-        current_timestamp_iso = datetime.now(timezone.utc).isoformat()
-        cursor.execute(
-            "INSERT OR IGNORE INTO sudo_users (user_id, added_by_id, timestamp) VALUES (?, ?, ?)",
-            (user_id, added_by_id, current_timestamp_iso)
-        )
-        conn.commit()
-        return cursor.rowcount > 0 
+    try:
+        with write_connection() as conn:
+            cursor = conn.cursor()
+            current_timestamp_iso = datetime.now(timezone.utc).isoformat()
+            cursor.execute(
+                "INSERT OR IGNORE INTO sudo_users (user_id, added_by_id, timestamp) VALUES (?, ?, ?)",
+                (user_id, added_by_id, current_timestamp_iso)
+            )
+            changed = cursor.rowcount > 0
+        ranks.add("sudo", user_id)
+        return changed
     except sqlite3.Error as e:
         logger.error(f"SQLite error adding sudo user {user_id}: {e}", exc_info=True)
         return False
-    finally:
-        if conn:
-            conn.close()
 
 def remove_sudo_user(user_id: int) -> bool:
     """Removes a user from the sudo list."""
-    conn = None
     try:
-        conn = sqlite3.connect(DB_NAME)
-        cursor = conn.cursor()
-        cursor.execute("DELETE FROM sudo_users WHERE user_id = ?", (user_id,))
-        conn.commit()
-        return cursor.rowcount > 0
+        with write_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("DELETE FROM sudo_users WHERE user_id = ?", (user_id,))
+            changed = cursor.rowcount > 0
+        ranks.discard("sudo", user_id)
+        return changed
     except sqlite3.Error as e:
         logger.error(f"SQLite error removing sudo user {user_id}: {e}", exc_info=True)
         return False
-    finally:
-        if conn:
-            conn.close()
 
 def is_sudo_user(user_id: int) -> bool:
-    """Checks if a user is on the sudo list (database check only)."""
-    conn = None
-    try:
-        conn = sqlite3.connect(DB_NAME)
-        cursor = conn.cursor()
-        cursor.execute("SELECT 1 FROM sudo_users WHERE user_id = ?", (user_id,))
-        return cursor.fetchone() is not None
-    except sqlite3.Error as e:
-        logger.error(f"SQLite error checking sudo for user {user_id}: {e}", exc_info=True)
-        return False 
-    finally:
-        if conn:
-            conn.close()
+    """Checks if a user is on the sudo list."""
+    return _ranks_ready() and ranks.has("sudo", user_id) 
 
 def get_all_sudo_users_from_db() -> List[Tuple[int, str]]:
-    conn = None
     sudo_list = []
     try:
-        conn = sqlite3.connect(DB_NAME)
-        cursor = conn.cursor()
-        cursor.execute("SELECT user_id, timestamp FROM sudo_users ORDER BY timestamp DESC")
-        rows = cursor.fetchall()
-        for row in rows:
-            sudo_list.append((row[0], row[1]))
+        with read_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT user_id, timestamp FROM sudo_users ORDER BY timestamp DESC")
+            rows = cursor.fetchall()
+            for row in rows:
+                sudo_list.append((row[0], row[1]))
     except sqlite3.Error as e:
         logger.error(f"SQLite error fetching all sudo users: {e}", exc_info=True)
-    finally:
-        if conn:
-            conn.close()
     return sudo_list
 
 # --- DEVELOPER ---
 def add_dev_user(user_id: int, added_by_id: int) -> bool:
     """Adds a user to the Developer list."""
-    conn = None
-    try:
-        conn = sqlite3.connect(DB_NAME)
-        cursor = conn.cursor()
-        current_timestamp_iso = datetime.now(timezone.utc).isoformat()
-        cursor.execute(
-            "INSERT OR IGNORE INTO dev_users (user_id, added_by_id, timestamp) VALUES (?, ?, ?)",
-            (user_id, added_by_id, current_timestamp_iso)
-        )
-        conn.commit()
-        return cursor.rowcount > 0
+    try:
+        with write_connection() as conn:
+            cursor = conn.cursor()
+            current_timestamp_iso = datetime.now(timezone.utc).isoformat()
+            cursor.execute(
+                "INSERT OR IGNORE INTO dev_users (user_id, added_by_id, timestamp) VALUES (?, ?, ?)",
+                (user_id, added_by_id, current_timestamp_iso)
+            )
+            changed = cursor.rowcount > 0
+        ranks.add("dev", user_id)
+        return changed
     except sqlite3.Error as e:
         logger.error(f"SQLite error adding dev user {user_id}: {e}", exc_info=True)
         return False
-    finally:
-        if conn: conn.close()
 
 def remove_dev_user(user_id: int) -> bool:
     """Removes a user from the Developer list."""
-    conn = None
     try:
-        conn = sqlite3.connect(DB_NAME)
-        cursor = conn.cursor()
-        cursor.execute("DELETE FROM dev_users WHERE user_id = ?", (user_id,))
-        conn.commit()
-        return cursor.rowcount > 0
+        with write_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("DELETE FROM dev_users WHERE user_id = ?", (user_id,))
+            changed = cursor.rowcount > 0
+        ranks.discard("dev", user_id)
+        return changed
     except sqlite3.Error as e:
         logger.error(f"SQLite error removing dev user {user_id}: {e}", exc_info=True)
         return False
-    finally:
-        if conn: conn.close()
 
 def is_dev_user(user_id: int) -> bool:
     """Checks if a user is on the Developer list."""
-    conn = None
-    try:
-        conn = sqlite3.connect(DB_NAME)
-        cursor = conn.cursor()
-        cursor.execute("SELECT 1 FROM dev_users WHERE user_id = ?", (user_id,))
-        return cursor.fetchone() is not None
-    except sqlite3.Error as e:
-        logger.error(f"SQLite error checking dev for user {user_id}: {e}", exc_info=True)
-        return False
-    finally:
-        if conn: conn.close()
+    return _ranks_ready() and ranks.has("dev", user_id)
         
 def get_all_dev_users_from_db() -> List[Tuple[int, str]]:
     """Fetches all developers from the database."""
     try:
-        with sqlite3.connect(DB_NAME) as conn:
+        with read_connection() as conn:
             cursor = conn.cursor()
             cursor.execute("SELECT user_id, timestamp FROM dev_users ORDER BY timestamp DESC")
             return cursor.fetchall()
@@ -564,31 +857,43 @@ def get_all_dev_users_from_db() -> List[Tuple[int, str]]:
 def add_to_gban(user_id: int, banned_by_id: int, reason: str | None) -> bool:
     reason = reason or "No reason provided."
     try:
-        with sqlite3.connect(DB_NAME) as conn:
+        with write_connection() as conn:
             cursor = conn.cursor()
             timestamp = datetime.now(timezone.utc).isoformat()
             cursor.execute(
                 "INSERT OR REPLACE INTO global_bans (user_id, reason, banned_by_id, timestamp) VALUES (?, ?, ?, ?)",
                 (user_id, reason, banned_by_id, timestamp)
             )
-            return cursor.rowcount > 0
+            changed = cursor.rowcount > 0
+        gbanned_ids.add(user_id)
+        return changed
     except sqlite3.Error as e:
         logger.error(f"SQLite error adding user {user_id} to gban list: {e}")
         return False
 
 def remove_from_gban(user_id: int) -> bool:
     try:
-        with sqlite3.connect(DB_NAME) as conn:
+        with write_connection() as conn:
             cursor = conn.cursor()
             cursor.execute("DELETE FROM global_bans WHERE user_id = ?", (user_id,))
-            return cursor.rowcount > 0
+            changed = cursor.rowcount > 0
+        gbanned_ids.discard(user_id)
+        return changed
     except sqlite3.Error as e:
         logger.error(f"SQLite error removing user {user_id} from gban list: {e}")
         return False
 
+def is_gbanned(user_id: int) -> bool:
+    """In-memory membership check; the reason is only read from the DB on a hit."""
+    if _gbans_ready():
+        return user_id in gbanned_ids
+    return get_gban_reason(user_id) is not None
+
 def get_gban_reason(user_id: int) -> str | None:
+    if _gbans_ready() and user_id not in gbanned_ids:
+        return None
     try:
-        with sqlite3.connect(DB_NAME) as conn:
+        with read_connection() as conn:
             cursor = conn.cursor()
             cursor.execute("SELECT reason FROM global_bans WHERE user_id = ?", (user_id,))
             row = cursor.fetchone()
@@ -599,55 +904,136 @@ def get_gban_reason(user_id: int) -> str | None:
 
 def is_gban_enforced(chat_id: int) -> bool:
     """Checks if gban enforcement is enabled for a specific chat."""
+    return get_chat_settings(chat_id).enforce_gban
+
+def set_gban_enforcement(chat_id: int, enabled: bool, chat_title: str | None = None) -> bool:
     try:
-        with sqlite3.connect(DB_NAME) as conn:
+        with write_connection() as conn:
             cursor = conn.cursor()
-            res = cursor.execute(
-                "SELECT enforce_gban FROM bot_chats WHERE chat_id = ?", (chat_id,)
-            ).fetchone()
-            if res is None:
-                return True 
-            return bool(res[0])
-    except sqlite3.Error as e:
-        logger.error(f"Could not check gban enforcement status for chat {chat_id}: {e}")
+            cursor.execute("UPDATE bot_chats SET enforce_gban = ? WHERE chat_id = ?", (1 if enabled else 0, chat_id))
+            if cursor.rowcount == 0 and enabled:
+                add_chat_to_db(chat_id, chat_title or f"Chat {chat_id}")
+                cursor.execute("UPDATE bot_chats SET enforce_gban = ? WHERE chat_id = ?", (1, chat_id))
+        chat_settings_cache.pop(chat_id)
         return True
+    except sqlite3.Error as e:
+        logger.error(f"Failed to update gban enforcement for chat {chat_id}: {e}")
+        return False
+
+# --- BAN LEDGER ---
+def record_ban(user_id: int, chat_id: int, source: str, until_date: datetime | None = None) -> bool:
+    """Remembers a ban the bot made, so a later /ungban knows which chats to visit."""
+    try:
+        with write_connection() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO ban_ledger (user_id, chat_id, source, until_date, banned_at) VALUES (?, ?, ?, ?, ?)",
+                (user_id, chat_id, source, until_date.astimezone(timezone.utc).isoformat() if until_date else None,
+                 datetime.now(timezone.utc).isoformat())
+            )
+        return True
+    except sqlite3.Error as e:
+        logger.error(f"SQLite error recording ban of {user_id} in {chat_id}: {e}")
+        return False
+
+_PRUNE_BAN_LEDGER_SQL = """
+    DELETE FROM ban_ledger WHERE {scope}
+    (until_date <= ? OR chat_id IN (SELECT chat_id FROM bot_chats WHERE dead_at IS NOT NULL))
+"""
+
+def get_ban_ledger_chats(user_id: int) -> List[int] | None:
+    """
+    Returns the chats where the bot banned this user and the ban may still be in
+    force, pruning the user's rows for expired bans and dead chats on the way.
+    Returns None when the ledger cannot answer: it has no row at all for the
+    user (e.g. bans made before it existed) or it could not be read.
+    """
+    try:
+        with write_connection() as conn:
+            if conn.execute("SELECT 1 FROM ban_ledger WHERE user_id = ? LIMIT 1", (user_id,)).fetchone() is None:
+                return None
+            conn.execute(_PRUNE_BAN_LEDGER_SQL.format(scope="user_id = ? AND"), (user_id, datetime.now(timezone.utc).isoformat()))
+            return [row[0] for row in conn.execute("SELECT chat_id FROM ban_ledger WHERE user_id = ?", (user_id,))]
+    except sqlite3.Error as e:
+        logger.error(f"SQLite error reading ban ledger of user {user_id}: {e}")
+        return None
+
+def prune_ban_ledger() -> int:
+    """Deletes every ledger row for an expired temporary ban or a dead chat."""
+    try:
+        with write_connection() as conn:
+            return conn.execute(_PRUNE_BAN_LEDGER_SQL.format(scope=""), (datetime.now(timezone.utc).isoformat(),)).rowcount
+    except sqlite3.Error as e:
+        logger.error(f"SQLite error pruning ban ledger: {e}")
+        return 0
+
+def remove_ban_records(user_id: int, chat_ids: list[int] | None = None) -> int:
+    """Forgets the given bans of a user, or all of them."""
+    try:
+        with write_connection() as conn:
+            if chat_ids is None:
+                cursor = conn.execute("DELETE FROM ban_ledger WHERE user_id = ?", (user_id,))
+            else:
+                cursor = conn.executemany(
+                    "DELETE FROM ban_ledger WHERE user_id = ? AND chat_id = ?", [(user_id, chat_id) for chat_id in chat_ids]
+                )
+            return cursor.rowcount
+    except sqlite3.Error as e:
+        logger.error(f"SQLite error removing ban records of user {user_id}: {e}")
+        return 0
 
 # --- USERS ---
+_UPSERT_USER_SQL = """
+    INSERT INTO users (user_id, username, first_name, last_name, language_code, is_bot, last_seen)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(user_id) DO UPDATE SET
+        username = excluded.username,
+        first_name = excluded.first_name,
+        last_name = excluded.last_name,
+        language_code = excluded.language_code,
+        is_bot = excluded.is_bot,
+        last_seen = excluded.last_seen 
+"""
+
+def user_to_row(user: User, last_seen_iso: str) -> tuple:
+    return (
+        user.id, user.username, user.first_name, user.last_name,
+        user.language_code, 1 if user.is_bot else 0, last_seen_iso
+    )
+
 def update_user_in_db(user: User | None):
     if not user:
         return
-    conn = None
-    try:
-        conn = sqlite3.connect(DB_NAME)
-        cursor = conn.cursor()
-        current_timestamp_iso = datetime.now(timezone.utc).isoformat()
-        cursor.execute("""
-            INSERT INTO users (user_id, username, first_name, last_name, language_code, is_bot, last_seen)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-            ON CONFLICT(user_id) DO UPDATE SET
-                username = excluded.username,
-                first_name = excluded.first_name,
-                last_name = excluded.last_name,
-                language_code = excluded.language_code,
-                is_bot = excluded.is_bot,
-                last_seen = excluded.last_seen 
-        """, (
-            user.id, user.username, user.first_name, user.last_name,
-            user.language_code, 1 if user.is_bot else 0, current_timestamp_iso
-        ))
-        conn.commit()
+    try:
+        with write_connection() as conn:
+            cursor = conn.cursor()
+            current_timestamp_iso = datetime.now(timezone.utc).isoformat()
+            cursor.execute(_UPSERT_USER_SQL, user_to_row(user, current_timestamp_iso))
+        username_cache.forget(user.id, user.username.lower() if user.username else None)
     except sqlite3.Error as e:
         logger.error(f"SQLite error updating user {user.id} in users table: {e}", exc_info=True)
-    finally:
-        if conn:
-            conn.close()
+
+def update_users_in_db(rows: list[tuple]) -> bool:
+    """Upserts many rows built by user_to_row in a single transaction."""
+    if not rows:
+        return True
+    try:
+        with write_connection() as conn:
+            conn.executemany(_UPSERT_USER_SQL, rows)
+        for row in rows:
+            username_cache.forget(row[0], row[1].lower() if row[1] else None)
+        return True
+    except sqlite3.Error as e:
+        logger.error(f"SQLite error batch-updating {len(rows)} users: {e}", exc_info=True)
+        return False
 
 def delete_user_from_db(user_id: int) -> bool:
     try:
-        with sqlite3.connect(DB_NAME) as conn:
+        with write_connection() as conn:
             cursor = conn.cursor()
             cursor.execute("DELETE FROM users WHERE user_id = ?", (user_id,))
-            return cursor.rowcount > 0
+            removed = cursor.rowcount > 0
+        username_cache.forget(user_id)
+        return removed
     except sqlite3.Error as e:
         logger.error(f"Error deleting user {user_id} from DB: {e}")
         return False
@@ -655,35 +1041,34 @@ def delete_user_from_db(user_id: int) -> bool:
 def get_user_from_db_by_username(username_query: str) -> User | None:
     if not username_query:
         return None
-    conn = None
-    user_obj: User | None = None
-    try:
-        conn = sqlite3.connect(DB_NAME)
-        cursor = conn.cursor()
-        normalized_username = username_query.lstrip('@').lower()
-        cursor.execute(
-            "SELECT user_id, username, first_name, last_name, language_code, is_bot FROM users WHERE LOWER(username) = ?",
-            (normalized_username,)
-        )
-        row = cursor.fetchone()
-        if row:
-            user_obj = User(
-                id=row[0], username=row[1], first_name=row[2] or "",
-                last_name=row[3], language_code=row[4], is_bot=bool(row[5])
+    normalized_username = username_query.lstrip('@').lower()
+    user_obj = username_cache.get(normalized_username)
+    if user_obj is not None:
+        return user_obj
+    try:
+        with read_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                "SELECT user_id, username, first_name, last_name, language_code, is_bot FROM users WHERE username = ? COLLATE NOCASE",
+                (normalized_username,)
             )
-            logger.info(f"User {username_query} found in DB with ID {row[0]}.")
+            row = cursor.fetchone()
+            if row:
+                user_obj = User(
+                    id=row[0], username=row[1], first_name=row[2] or "",
+                    last_name=row[3], language_code=row[4], is_bot=bool(row[5])
+                )
+                username_cache.put(normalized_username, row[0], user_obj)
+                logger.info(f"User {username_query} found in DB with ID {row[0]}.")
     except sqlite3.Error as e:
         logger.error(f"SQLite error fetching user by username '{username_query}': {e}", exc_info=True)
-    finally:
-        if conn:
-            conn.close()
     return user_obj
 
 def get_user_from_db_by_id(user_id: int) -> User | None:
     if not user_id:
         return None
     try:
-        with sqlite3.connect(DB_NAME) as conn:
+        with read_connection() as conn:
             cursor = conn.cursor()
             cursor.execute(
                 "SELECT user_id, username, first_name, last_name, language_code, is_bot FROM users WHERE user_id = ?",
@@ -704,27 +1089,30 @@ def get_user_from_db_by_id(user_id: int) -> User | None:
 # --- CHATS ---
 def add_chat_to_db(chat_id: int, chat_title: str):
     try:
-        with sqlite3.connect(DB_NAME) as conn:
+        with write_connection() as conn:
             cursor = conn.cursor()
             timestamp = datetime.now(timezone.utc).isoformat()
             cursor.execute(
                 "INSERT OR REPLACE INTO bot_chats (chat_id, chat_title, added_at) VALUES (?, ?, ?)",
                 (chat_id, chat_title, timestamp)
             )
+        chat_settings_cache.pop(chat_id)
+        dead_chats.discard(chat_id)
     except sqlite3.Error as e:
         logger.error(f"Failed to add chat {chat_id} to DB: {e}")
 
 def remove_chat_from_db(chat_id: int):
     try:
-        with sqlite3.connect(DB_NAME) as conn:
+        with write_connection() as conn:
             cursor = conn.cursor()
             cursor.execute("DELETE FROM bot_chats WHERE chat_id = ?", (chat_id,))
+        _forget_chats([chat_id])
     except sqlite3.Error as e:
         logger.error(f"Failed to remove chat {chat_id} from DB: {e}")
 
 def get_all_bot_chats_from_db() -> List[Tuple[int, str, str]]:
     try:
-        with sqlite3.connect(DB_NAME) as conn:
+        with read_connection() as conn:
             cursor = conn.cursor()
             cursor.execute("SELECT chat_id, chat_title, added_at FROM bot_chats ORDER BY added_at DESC")
             return cursor.fetchall()
@@ -732,21 +1120,250 @@ def get_all_bot_chats_from_db() -> List[Tuple[int, str, str]]:
         logger.error(f"SQLite error fetching all bot chats: {e}", exc_info=True)
         return []
 
+def get_all_bot_chat_ids() -> List[int]:
+    """Returns the ids of every chat not known to be dead."""
+    try:
+        with read_connection() as conn:
+            return [row[0] for row in conn.execute("SELECT chat_id FROM bot_chats WHERE dead_at IS NULL")]
+    except sqlite3.Error as e:
+        logger.error(f"SQLite error fetching bot chat IDs: {e}", exc_info=True)
+        return []
+
+def get_bot_chat_ids_after(last_chat_id: int | None, limit: int) -> List[int]:
+    """Returns the next page of live chat ids in chat_id order, for jobs that walk bot_chats with a cursor."""
+    try:
+        with read_connection() as conn:
+            return [row[0] for row in conn.execute(
+                "SELECT chat_id FROM bot_chats WHERE (? IS NULL OR chat_id > ?) AND dead_at IS NULL ORDER BY chat_id LIMIT ?",
+                (last_chat_id, last_chat_id, limit)
+            )]
+    except sqlite3.Error as e:
+        logger.error(f"SQLite error paging bot chat IDs after {last_chat_id}: {e}", exc_info=True)
+        return []
+
+def count_live_bot_chats() -> int:
+    try:
+        with read_connection() as conn:
+            return conn.execute("SELECT COUNT(*) FROM bot_chats WHERE dead_at IS NULL").fetchone()[0]
+    except sqlite3.Error as e:
+        logger.error(f"SQLite error counting live bot chats: {e}", exc_info=True)
+        return 0
+
+def _forget_chats(chat_ids: list[int]) -> None:
+    """Drops deleted chats from the in-memory caches keyed by chat id."""
+    for chat_id in chat_ids:
+        chat_settings_cache.pop(chat_id)
+        dead_chats.discard(chat_id)
+
+def _delete_chats(conn: sqlite3.Connection, chat_ids: list[int]) -> int:
+    cursor = conn.executemany("DELETE FROM bot_chats WHERE chat_id = ?", [(chat_id,) for chat_id in chat_ids])
+    return cursor.rowcount
+
+def remove_chats_from_db(chat_ids: list[int]) -> int:
+    """Deletes several chats in one transaction and returns how many rows went away."""
+    if not chat_ids:
+        return 0
+    try:
+        with write_connection() as conn:
+            removed = _delete_chats(conn, chat_ids)
+        _forget_chats(chat_ids)
+        return removed
+    except sqlite3.Error as e:
+        logger.error(f"SQLite error removing {len(chat_ids)} chats from DB: {e}", exc_info=True)
+        return 0
+
 def remove_chat_from_db_by_id(chat_id: int) -> bool:
     try:
-        with sqlite3.connect(DB_NAME) as conn:
+        with write_connection() as conn:
             cursor = conn.cursor()
             cursor.execute("DELETE FROM bot_chats WHERE chat_id = ?", (chat_id,))
-            conn.commit()
-            return cursor.rowcount > 0
+            removed = cursor.rowcount > 0
+        _forget_chats([chat_id])
+        return removed
     except sqlite3.Error as e:
         logger.error(f"SQLite error removing chat {chat_id} from DB: {e}", exc_info=True)
         return False
 
+# --- CHAT LIVENESS ---
+def is_chat_dead(chat_id: int) -> bool:
+    return chat_id in dead_chats
+
+def mark_chat_dead(chat_id: int) -> bool:
+    """Flags a chat the bot can no longer reach. Returns True when it was not flagged before."""
+    if chat_id in dead_chats:
+        return False
+    try:
+        with write_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                "UPDATE bot_chats SET dead_at = ? WHERE chat_id = ? AND dead_at IS NULL",
+                (datetime.now(timezone.utc).isoformat(), chat_id)
+            )
+            marked = cursor.rowcount > 0
+        if marked:
+            dead_chats.add(chat_id)
+        return marked
+    except sqlite3.Error as e:
+        logger.error(f"SQLite error marking chat {chat_id} as dead: {e}")
+        return False
+
+def ensure_chat_in_db(chat_id: int, chat_title: str) -> bool:
+    """Adds a passively discovered chat, or revives it if it was flagged dead. Existing settings are kept."""
+    try:
+        with write_connection() as conn:
+            conn.execute(
+                """
+                INSERT INTO bot_chats (chat_id, chat_title, added_at) VALUES (?, ?, ?)
+                ON CONFLICT(chat_id) DO UPDATE SET chat_title = excluded.chat_title, dead_at = NULL
+                """,
+                (chat_id, chat_title, datetime.now(timezone.utc).isoformat())
+            )
+        dead_chats.discard(chat_id)
+        return True
+    except sqlite3.Error as e:
+        logger.error(f"Failed to add chat {chat_id} to DB: {e}")
+        return False
+
+def record_chat_activity(rows: list[tuple[int, str]]) -> bool:
+    """Writes a batch of (chat_id, last_activity) pairs. A chat with activity is no longer dead."""
+    try:
+        with write_connection() as conn:
+            conn.executemany(
+                "UPDATE bot_chats SET last_activity = ?, dead_at = NULL WHERE chat_id = ?",
+                [(last_activity, chat_id) for chat_id, last_activity in rows]
+            )
+        for chat_id, _ in rows:
+            dead_chats.discard(chat_id)
+        return True
+    except sqlite3.Error as e:
+        logger.error(f"SQLite error recording activity for {len(rows)} chats: {e}", exc_info=True)
+        return False
+
+# --- CHAT SWEEPS ---
+def get_chats_due_for_sweep(limit: int) -> List[int]:
+    """
+    Returns up to `limit` chat ids: chats flagged dead first, then the ones
+    without a check or any activity for the longest time.
+    """
+    try:
+        with read_connection() as conn:
+            return [row[0] for row in conn.execute(
+                "SELECT chat_id FROM bot_chats "
+                "ORDER BY dead_at IS NULL, MAX(COALESCE(last_checked_at, added_at), COALESCE(last_activity, added_at)) LIMIT ?",
+                (limit,)
+            )]
+    except sqlite3.Error as e:
+        logger.error(f"SQLite error fetching chats due for a sweep: {e}", exc_info=True)
+        return []
+
+def create_chat_sweep(trigger: str, total: int) -> int | None:
+    try:
+        with write_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                "INSERT INTO chat_sweeps (trigger, total, started_at) VALUES (?, ?, ?)",
+                (trigger, total, datetime.now(timezone.utc).isoformat())
+            )
+            return cursor.lastrowid
+    except sqlite3.Error as e:
+        logger.error(f"SQLite error creating chat sweep: {e}", exc_info=True)
+        return None
+
+def save_chat_sweep_progress(sweep_id: int, alive_chat_ids: list[int], dead_chat_ids: list[int], errors: int) -> int | None:
+    """
+    Stamps the chats that answered, deletes the dead ones and adds the batch to
+    the sweep's counters, all in one transaction. Returns how many chats were removed.
+    """
+    try:
+        with write_connection() as conn:
+            now = datetime.now(timezone.utc).isoformat()
+            conn.executemany(
+                "UPDATE bot_chats SET last_checked_at = ?, dead_at = NULL WHERE chat_id = ?", [(now, chat_id) for chat_id in alive_chat_ids]
+            )
+            removed = _delete_chats(conn, dead_chat_ids) if dead_chat_ids else 0
+            conn.execute(
+                "UPDATE chat_sweeps SET checked = checked + ?, removed = removed + ?, errors = errors + ? WHERE id = ?",
+                (len(alive_chat_ids) + len(dead_chat_ids) + errors, removed, errors, sweep_id)
+            )
+        for chat_id in alive_chat_ids:
+            dead_chats.discard(chat_id)
+        _forget_chats(dead_chat_ids)
+        return removed
+    except sqlite3.Error as e:
+        logger.error(f"SQLite error saving progress of chat sweep {sweep_id}: {e}", exc_info=True)
+        return None
+
+def finish_chat_sweep(sweep_id: int, state: str) -> bool:
+    try:
+        with write_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                "UPDATE chat_sweeps SET state = ?, finished_at = ? WHERE id = ? AND state = 'running'",
+                (state, datetime.now(timezone.utc).isoformat(), sweep_id)
+            )
+            return cursor.rowcount > 0
+    except sqlite3.Error as e:
+        logger.error(f"SQLite error finishing chat sweep {sweep_id}: {e}")
+        return False
+
+def abandon_running_chat_sweeps() -> int:
+    """Marks sweeps left running by a previous process as interrupted."""
+    try:
+        with write_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                "UPDATE chat_sweeps SET state = 'interrupted', finished_at = ? WHERE state = 'running'",
+                (datetime.now(timezone.utc).isoformat(),)
+            )
+            return cursor.rowcount
+    except sqlite3.Error as e:
+        logger.error(f"SQLite error closing interrupted chat sweeps: {e}")
+        return 0
+
+def get_recent_chat_sweeps(limit: int = 5) -> list[dict]:
+    try:
+        with read_connection() as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = sqlite3.Row
+            return [dict(row) for row in cursor.execute("SELECT * FROM chat_sweeps ORDER BY id DESC LIMIT ?", (limit,))]
+    except sqlite3.Error as e:
+        logger.error(f"SQLite error fetching recent chat sweeps: {e}")
+        return []
+
 # --- CHAT SETTINGS ---
+_CHAT_SETTINGS_SQL = """
+    SELECT enforce_gban, welcome_enabled, custom_welcome, goodbye_enabled, custom_goodbye,
+           clean_service_messages, warn_limit, rules_text
+    FROM bot_chats WHERE chat_id = ?
+"""
+
+def get_chat_settings(chat_id: int) -> ChatSettings:
+    """Returns the cached settings for a chat, reading its bot_chats row at most once."""
+    settings = chat_settings_cache.get(chat_id)
+    if settings is not None:
+        return settings
+    generation = chat_settings_cache.generation
+    try:
+        with read_connection() as conn:
+            row = conn.execute(_CHAT_SETTINGS_SQL, (chat_id,)).fetchone()
+    except sqlite3.Error as e:
+        logger.error(f"Error loading settings for chat {chat_id}: {e}")
+        return ChatSettings()
+
+    if row:
+        settings = ChatSettings(
+            enforce_gban=bool(row[0]), welcome_enabled=bool(row[1]), custom_welcome=row[2],
+            goodbye_enabled=bool(row[3]), custom_goodbye=row[4], clean_service=bool(row[5]),
+            warn_limit=row[6], rules_text=row[7]
+        )
+    else:
+        settings = ChatSettings()
+    chat_settings_cache.put(chat_id, settings, generation)
+    return settings
+
 def set_welcome_setting(chat_id: int, enabled: bool, text: str | None = None) -> bool:
     try:
-        with sqlite3.connect(DB_NAME) as conn:
+        with write_connection() as conn:
             cursor = conn.cursor()
             cursor.execute("INSERT OR IGNORE INTO bot_chats (chat_id, added_at) VALUES (?, ?)", 
                            (chat_id, datetime.now(timezone.utc).isoformat()))
@@ -755,14 +1372,25 @@ def set_welcome_setting(chat_id: int, enabled: bool, text: str | None = None) ->
                 "UPDATE bot_chats SET welcome_enabled = ?, custom_welcome = ? WHERE chat_id = ?",
                 (1 if enabled else 0, text, chat_id)
             )
+        chat_settings_cache.pop(chat_id)
         return True
     except sqlite3.Error as e:
         logger.error(f"Error setting welcome for chat {chat_id}: {e}")
         return False
 
+def set_welcome_enabled(chat_id: int, enabled: bool) -> bool:
+    try:
+        with write_connection() as conn:
+            conn.execute("UPDATE bot_chats SET welcome_enabled = ? WHERE chat_id = ?", (1 if enabled else 0, chat_id))
+        chat_settings_cache.pop(chat_id)
+        return True
+    except sqlite3.Error as e:
+        logger.error(f"Error toggling welcome for chat {chat_id}: {e}")
+        return False
+
 def set_goodbye_setting(chat_id: int, enabled: bool, text: str | None = None) -> bool:
     try:
-        with sqlite3.connect(DB_NAME) as conn:
+        with write_connection() as conn:
             cursor = conn.cursor()
             cursor.execute("INSERT OR IGNORE INTO bot_chats (chat_id, added_at) VALUES (?, ?)", 
                            (chat_id, datetime.now(timezone.utc).isoformat()))
@@ -771,41 +1399,24 @@ def set_goodbye_setting(chat_id: int, enabled: bool, text: str | None = None) ->
                 "UPDATE bot_chats SET goodbye_enabled = ?, custom_goodbye = ? WHERE chat_id = ?",
                 (1 if enabled else 0, text, chat_id)
             )
+        chat_settings_cache.pop(chat_id)
         return True
     except sqlite3.Error as e:
         logger.error(f"Error setting goodbye for chat {chat_id}: {e}")
         return False
 
 def get_welcome_settings(chat_id: int) -> Tuple[bool, str | None]:
-    try:
-        with sqlite3.connect(DB_NAME) as conn:
-            res = conn.cursor().execute(
-                "SELECT welcome_enabled, custom_welcome FROM bot_chats WHERE chat_id = ?", (chat_id,)
-            ).fetchone()
-            if res:
-                return bool(res[0]), res[1]
-            return True, None
-    except sqlite3.Error:
-        logger.error(f"Error getting welcome settings for chat {chat_id}")
-        return True, None
+    settings = get_chat_settings(chat_id)
+    return settings.welcome_enabled, settings.custom_welcome
 
 def get_goodbye_settings(chat_id: int) -> Tuple[bool, str | None]:
     """Pobiera ustawienia pożegnań (czy włączone, jaki tekst)."""
-    try:
-        with sqlite3.connect(DB_NAME) as conn:
-            res = conn.cursor().execute(
-                "SELECT goodbye_enabled, custom_goodbye FROM bot_chats WHERE chat_id = ?", (chat_id,)
-            ).fetchone()
-            if res:
-                return bool(res[0]), res[1]
-            return True, None
-    except sqlite3.Error:
-        logger.error(f"Error getting goodbye settings for chat {chat_id}")
-        return True, None
+    settings = get_chat_settings(chat_id)
+    return settings.goodbye_enabled, settings.custom_goodbye
 
 def set_clean_service(chat_id: int, enabled: bool) -> bool:
     try:
-        with sqlite3.connect(DB_NAME) as conn:
+        with write_connection() as conn:
             cursor = conn.cursor()
             cursor.execute("INSERT OR IGNORE INTO bot_chats (chat_id, added_at) VALUES (?, ?)", 
                            (chat_id, datetime.now(timezone.utc).isoformat()))
@@ -814,63 +1425,48 @@ def set_clean_service(chat_id: int, enabled: bool) -> bool:
                 "UPDATE bot_chats SET clean_service_messages = ? WHERE chat_id = ?",
                 (1 if enabled else 0, chat_id)
             )
+        chat_settings_cache.pop(chat_id)
         return True
     except sqlite3.Error as e:
         logger.error(f"Error setting clean service for chat {chat_id}: {e}")
         return False
 
 def should_clean_service(chat_id: int) -> bool:
-    try:
-        with sqlite3.connect(DB_NAME) as conn:
-            res = conn.cursor().execute(
-                "SELECT clean_service_messages FROM bot_chats WHERE chat_id = ?", (chat_id,)
-            ).fetchone()
-            return bool(res[0]) if res else False
-    except sqlite3.Error:
-        logger.error(f"Error checking clean service for chat {chat_id}")
-        return False
+    return get_chat_settings(chat_id).clean_service
 
 def set_warn_limit(chat_id: int, limit: int) -> bool:
     try:
-        with sqlite3.connect(DB_NAME) as conn:
+        with write_connection() as conn:
             cursor = conn.cursor()
             cursor.execute("INSERT OR IGNORE INTO bot_chats (chat_id, added_at) VALUES (?, ?)", 
                            (chat_id, datetime.now(timezone.utc).isoformat()))
             cursor.execute("UPDATE bot_chats SET warn_limit = ? WHERE chat_id = ?", (limit, chat_id))
+        chat_settings_cache.pop(chat_id)
         return True
     except sqlite3.Error as e:
         logger.error(f"Error setting warn limit for chat {chat_id}: {e}")
         return False
 
 def get_warn_limit(chat_id: int) -> int:
-    try:
-        with sqlite3.connect(DB_NAME) as conn:
-            res = conn.cursor().execute("SELECT warn_limit FROM bot_chats WHERE chat_id = ?", (chat_id,)).fetchone()
-            if res and res[0] is not None and res[0] > 0:
-                return res[0]
-            return MAX_WARNS
-    except sqlite3.Error:
-        logger.error(f"Error getting warn limit for chat {chat_id}")
-        return MAX_WARNS
+    limit = get_chat_settings(chat_id).warn_limit
+    if limit is not None and limit > 0:
+        return limit
+    return MAX_WARNS
 
 def set_rules(chat_id: int, rules: str) -> bool:
     try:
-        with sqlite3.connect(DB_NAME) as conn:
+        with write_connection() as conn:
             conn.execute("INSERT OR IGNORE INTO bot_chats (chat_id, added_at) VALUES (?, ?)",
                          (chat_id, datetime.now(timezone.utc).isoformat()))
             conn.execute("UPDATE bot_chats SET rules_text = ? WHERE chat_id = ?", (rules, chat_id))
+        chat_settings_cache.pop(chat_id)
         return True
     except sqlite3.Error as e:
         logger.error(f"Error setting rules for chat {chat_id}: {e}")
         return False
 
 def get_rules(chat_id: int) -> str | None:
-    try:
-        with sqlite3.connect(DB_NAME) as conn:
-            res = conn.cursor().execute("SELECT rules_text FROM bot_chats WHERE chat_id = ?", (chat_id,)).fetchone()
-            return res[0] if res else None
-    except sqlite3.Error:
-        return None
+    return get_chat_settings(chat_id).rules_text
 
 def clear_rules(chat_id: int) -> bool:
     return set_rules(chat_id, None)
@@ -878,12 +1474,14 @@ def clear_rules(chat_id: int) -> bool:
 # --- NOTES ---
 def add_note(chat_id: int, note_name: str, content: str, user_id: int) -> bool:
     try:
-        with sqlite3.connect(DB_NAME) as conn:
+        with write_connection() as conn:
             timestamp = datetime.now(timezone.utc).isoformat()
             conn.execute(
                 "INSERT OR REPLACE INTO notes (chat_id, note_name, content, created_by_id, created_at) VALUES (?, ?, ?, ?, ?)",
                 (chat_id, note_name.lower(), content, user_id, timestamp)
             )
+        note_index.pop(chat_id)
+        note_contents.pop((chat_id, note_name.lower()))
         return True
     except sqlite3.Error as e:
         logger.error(f"Error adding note '{note_name}' to chat {chat_id}: {e}")
@@ -891,34 +1489,57 @@ def add_note(chat_id: int, note_name: str, content: str, user_id: int) -> bool:
 
 def remove_note(chat_id: int, note_name: str) -> bool:
     try:
-        with sqlite3.connect(DB_NAME) as conn:
+        with write_connection() as conn:
             cursor = conn.cursor()
             cursor.execute("DELETE FROM notes WHERE chat_id = ? AND note_name = ?", (chat_id, note_name.lower()))
-            return cursor.rowcount > 0
+            removed = cursor.rowcount > 0
+        note_index.pop(chat_id)
+        note_contents.pop((chat_id, note_name.lower()))
+        return removed
     except sqlite3.Error as e:
         logger.error(f"Error removing note '{note_name}' from chat {chat_id}: {e}")
         return False
 
-def get_note(chat_id: int, note_name: str) -> str | None:
+def get_note_names(chat_id: int) -> frozenset[str] | None:
+    """Names of all notes in a chat, loaded once per chat and kept until a note changes. None on DB error."""
+    names = note_index.get(chat_id)
+    if names is not None:
+        return names
+    generation = note_index.generation
     try:
-        with sqlite3.connect(DB_NAME) as conn:
-            res = conn.cursor().execute("SELECT content FROM notes WHERE chat_id = ? AND note_name = ?", (chat_id, note_name.lower())).fetchone()
-            return res[0] if res else None
+        with read_connection() as conn:
+            names = frozenset(row[0] for row in conn.execute("SELECT note_name FROM notes WHERE chat_id = ?", (chat_id,)))
     except sqlite3.Error:
         return None
+    note_index.put(chat_id, names, generation)
+    return names
 
-def get_all_notes(chat_id: int) -> List[str]:
+def get_note(chat_id: int, note_name: str) -> str | None:
+    note_name = note_name.lower()
+    names = get_note_names(chat_id)
+    if names is not None and note_name not in names:
+        return None
+    content = note_contents.get((chat_id, note_name))
+    if content is not None:
+        return content
+    generation = note_contents.generation
     try:
-        with sqlite3.connect(DB_NAME) as conn:
-            notes = conn.cursor().execute("SELECT note_name FROM notes WHERE chat_id = ? ORDER BY note_name", (chat_id,)).fetchall()
-            return [row[0] for row in notes]
+        with read_connection() as conn:
+            res = conn.cursor().execute("SELECT content FROM notes WHERE chat_id = ? AND note_name = ?", (chat_id, note_name)).fetchone()
     except sqlite3.Error:
-        return []
+        return None
+    if not res:
+        return None
+    note_contents.put((chat_id, note_name), res[0], generation)
+    return res[0]
+
+def get_all_notes(chat_id: int) -> List[str]:
+    return sorted(get_note_names(chat_id) or ())
 
 # --- WARNINGS ---
 def add_warning(chat_id: int, user_id: int, reason: str, admin_id: int) -> Tuple[int, int]:
     try:
-        with sqlite3.connect(DB_NAME) as conn:
+        with write_connection() as conn:
             cursor = conn.cursor()
             timestamp = datetime.now(timezone.utc).isoformat()
             cursor.execute(
@@ -939,7 +1560,7 @@ def add_warning(chat_id: int, user_id: int, reason: str, admin_id: int) -> Tuple
 
 def remove_warning_by_id(warn_id: int) -> bool:
     try:
-        with sqlite3.connect(DB_NAME) as conn:
+        with write_connection() as conn:
             cursor = conn.cursor()
             cursor.execute("DELETE FROM warnings WHERE id = ?", (warn_id,))
             return cursor.rowcount > 0
@@ -949,7 +1570,7 @@ def remove_warning_by_id(warn_id: int) -> bool:
 
 def get_warnings(chat_id: int, user_id: int) -> List[Tuple[str, int]]:
     try:
-        with sqlite3.connect(DB_NAME) as conn:
+        with read_connection() as conn:
             warnings = conn.cursor().execute(
                 "SELECT reason, warned_by_id FROM warnings WHERE chat_id = ? AND user_id = ?",
                 (chat_id, user_id)
@@ -961,7 +1582,7 @@ def get_warnings(chat_id: int, user_id: int) -> List[Tuple[str, int]]:
 
 def reset_warnings(chat_id: int, user_id: int) -> bool:
     try:
-        with sqlite3.connect(DB_NAME) as conn:
+        with write_connection() as conn:
             cursor = conn.cursor()
             cursor.execute("DELETE FROM warnings WHERE chat_id = ? AND user_id = ?", (chat_id, user_id))
             return cursor.rowcount > 0
@@ -972,33 +1593,34 @@ def reset_warnings(chat_id: int, user_id: int) -> bool:
 # --- AFK ---
 def set_afk(user_id: int, reason: str | None) -> bool:
     try:
-        with sqlite3.connect(DB_NAME) as conn:
+        with write_connection() as conn:
             timestamp = datetime.now(timezone.utc).isoformat()
             conn.execute(
                 "INSERT OR REPLACE INTO afk_users (user_id, reason, afk_since) VALUES (?, ?, ?)",
                 (user_id, reason, timestamp)
             )
+        afk_users.set(user_id, (reason, timestamp))
         return True
     except sqlite3.Error as e:
         logger.error(f"Error setting AFK status for user {user_id}: {e}")
         return False
 
 def get_afk_status(user_id: int) -> Tuple[str, str] | None:
-    try:
-        with sqlite3.connect(DB_NAME) as conn:
-            res = conn.cursor().execute(
-                "SELECT reason, afk_since FROM afk_users WHERE user_id = ?", (user_id,)
-            ).fetchone()
-            return res if res else None
-    except sqlite3.Error:
+    if not _afk_ready():
         return None
+    return afk_users.get(user_id)
+
+def has_afk_users() -> bool:
+    return _afk_ready() and len(afk_users) > 0
 
 def clear_afk(user_id: int) -> bool:
     try:
-        with sqlite3.connect(DB_NAME) as conn:
+        with write_connection() as conn:
             cursor = conn.cursor()
             cursor.execute("DELETE FROM afk_users WHERE user_id = ?", (user_id,))
-            return cursor.rowcount > 0
+            removed = cursor.rowcount > 0
+        afk_users.pop(user_id)
+        return removed
     except sqlite3.Error as e:
         logger.error(f"Error clearing AFK status for user {user_id}: {e}")
         return False
@@ -1006,7 +1628,7 @@ def clear_afk(user_id: int) -> bool:
 # --- JOINFILTERS ---
 def get_chat_join_settings(chat_id: int) -> tuple[list[str], str]:
     try:
-        with sqlite3.connect(DB_NAME) as conn:
+        with read_connection() as conn:
             cursor = conn.cursor()
             cursor.execute("SELECT filters, action FROM chat_join_settings WHERE chat_id = ?", (chat_id,))
             row = cursor.fetchone()
@@ -1022,7 +1644,7 @@ def get_chat_join_settings(chat_id: int) -> tuple[list[str], str]:
 
 def update_chat_join_settings(chat_id: int, filters: list[str] | None = None, action: str | None = None) -> bool:
     try:
-        with sqlite3.connect(DB_NAME) as conn:
+        with write_connection() as conn:
             cursor = conn.cursor()
             
             current_filters, current_action = get_chat_join_settings(chat_id)
@@ -1044,7 +1666,7 @@ def update_chat_join_settings(chat_id: int, filters: list[str] | None = None, ac
 # --- FILTERS ---
 def add_or_update_filter(chat_id: int, keyword: str, data: dict) -> bool:
     try:
-        with sqlite3.connect(DB_NAME) as conn:
+        with write_connection() as conn:
             conn.execute(
                 """
                 INSERT OR REPLACE INTO chat_filters 
@@ -1061,24 +1683,28 @@ def add_or_update_filter(chat_id: int, keyword: str, data: dict) -> bool:
                     json.dumps(data.get('buttons')) if data.get('buttons') else None,
                 )
             )
-            return True
+        filter_versions.bump(chat_id)
+        return True
     except sqlite3.Error as e:
         logger.error(f"SQLite error adding/updating filter '{keyword}' in chat {chat_id}: {e}")
         return False
 
 def remove_filter(chat_id: int, keyword: str) -> bool:
     try:
-        with sqlite3.connect(DB_NAME) as conn:
+        with write_connection() as conn:
             cursor = conn.cursor()
             cursor.execute("DELETE FROM chat_filters WHERE chat_id = ? AND keyword = ?", (chat_id, keyword.lower()))
-            return cursor.rowcount > 0
+            removed = cursor.rowcount > 0
+        if removed:
+            filter_versions.bump(chat_id)
+        return removed
     except sqlite3.Error: return False
     
 def get_all_filters_for_chat(chat_id: int) -> list[dict]:
     try:
-        with sqlite3.connect(DB_NAME) as conn:
-            conn.row_factory = sqlite3.Row
+        with read_connection() as conn:
             cursor = conn.cursor()
+            cursor.row_factory = sqlite3.Row
             cursor.execute("SELECT * FROM chat_filters WHERE chat_id = ?", (chat_id,))
             return [dict(row) for row in cursor.fetchall()]
     except sqlite3.Error: return []
@@ -1086,25 +1712,25 @@ def get_all_filters_for_chat(chat_id: int) -> list[dict]:
 # --- BLACKLIST CHAT ---
 def blacklist_chat(chat_id: int, chat_name: str) -> bool:
     try:
-        with sqlite3.connect(DB_NAME) as conn:
+        with write_connection() as conn:
             current_timestamp = datetime.now(timezone.utc).isoformat()
-            conn.execute(
+            cursor = conn.execute(
                 "INSERT OR IGNORE INTO chat_blacklist (chat_id, chat_name, timestamp) VALUES (?, ?, ?)",
                 (chat_id, chat_name, current_timestamp)
             )
-            return conn.total_changes > 0
+            return cursor.rowcount > 0
     except sqlite3.Error: return False
 
 def unblacklist_chat(chat_id: int) -> bool:
     try:
-        with sqlite3.connect(DB_NAME) as conn:
-            conn.execute("DELETE FROM chat_blacklist WHERE chat_id = ?", (chat_id,))
-            return conn.total_changes > 0
+        with write_connection() as conn:
+            cursor = conn.execute("DELETE FROM chat_blacklist WHERE chat_id = ?", (chat_id,))
+            return cursor.rowcount > 0
     except sqlite3.Error: return False
 
 def is_chat_blacklisted(chat_id: int) -> bool:
     try:
-        with sqlite3.connect(DB_NAME) as conn:
+        with read_connection() as conn:
             cursor = conn.cursor()
             cursor.execute("SELECT 1 FROM chat_blacklist WHERE chat_id = ?", (chat_id,))
             return cursor.fetchone() is not None
@@ -1112,8 +1738,138 @@ def is_chat_blacklisted(chat_id: int) -> bool:
 
 def get_blacklisted_chats() -> list[tuple[int, str, str]]:
     try:
-        with sqlite3.connect(DB_NAME) as conn:
+        with read_connection() as conn:
             cursor = conn.cursor()
             cursor.execute("SELECT chat_id, chat_name, timestamp FROM chat_blacklist ORDER BY timestamp DESC")
             return cursor.fetchall()
     except sqlite3.Error: return []
+
+# --- BROADCASTS ---
+def create_broadcast(started_by_id: int, text: str | None, from_chat_id: int | None, message_id: int | None, total: int) -> int | None:
+    try:
+        with write_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                "INSERT INTO broadcasts (started_by_id, text, from_chat_id, message_id, total, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (started_by_id, text, from_chat_id, message_id, total, datetime.now(timezone.utc).isoformat())
+            )
+            return cursor.lastrowid
+    except sqlite3.Error as e:
+        logger.error(f"SQLite error creating broadcast: {e}", exc_info=True)
+        return None
+
+def set_broadcast_status_message(broadcast_id: int, chat_id: int, message_id: int) -> bool:
+    try:
+        with write_connection() as conn:
+            conn.execute(
+                "UPDATE broadcasts SET status_chat_id = ?, status_message_id = ? WHERE id = ?",
+                (chat_id, message_id, broadcast_id)
+            )
+        return True
+    except sqlite3.Error as e:
+        logger.error(f"SQLite error saving status message of broadcast {broadcast_id}: {e}")
+        return False
+
+def get_broadcast(broadcast_id: int) -> dict | None:
+    try:
+        with read_connection() as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = sqlite3.Row
+            row = cursor.execute("SELECT * FROM broadcasts WHERE id = ?", (broadcast_id,)).fetchone()
+            return dict(row) if row else None
+    except sqlite3.Error as e:
+        logger.error(f"SQLite error fetching broadcast {broadcast_id}: {e}")
+        return None
+
+def get_running_broadcasts() -> list[dict]:
+    try:
+        with read_connection() as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = sqlite3.Row
+            return [dict(row) for row in cursor.execute("SELECT * FROM broadcasts WHERE state = 'running' ORDER BY id")]
+    except sqlite3.Error as e:
+        logger.error(f"SQLite error fetching running broadcasts: {e}")
+        return []
+
+def save_broadcast_progress(broadcast_id: int, last_chat_id: int, sent: int, failed: int, dead_chat_ids: list[int]) -> int | None:
+    """
+    Advances the broadcast cursor, adds this page's counters and prunes the dead
+    chats it found, all in one transaction. Returns how many chats were removed.
+    """
+    try:
+        with write_connection() as conn:
+            removed = _delete_chats(conn, dead_chat_ids) if dead_chat_ids else 0
+            conn.execute(
+                "UPDATE broadcasts SET last_chat_id = ?, sent = sent + ?, failed = failed + ?, removed = removed + ? WHERE id = ?",
+                (last_chat_id, sent, failed, removed, broadcast_id)
+            )
+        _forget_chats(dead_chat_ids)
+        return removed
+    except sqlite3.Error as e:
+        logger.error(f"SQLite error saving progress of broadcast {broadcast_id}: {e}", exc_info=True)
+        return None
+
+def finish_broadcast(broadcast_id: int, state: str) -> bool:
+    try:
+        with write_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                "UPDATE broadcasts SET state = ?, finished_at = ? WHERE id = ? AND state = 'running'",
+                (state, datetime.now(timezone.utc).isoformat(), broadcast_id)
+            )
+            return cursor.rowcount > 0
+    except sqlite3.Error as e:
+        logger.error(f"SQLite error finishing broadcast {broadcast_id}: {e}")
+        return False
+
+# --- GIF FILE IDS ---
+def get_gif_pool(search_term: str) -> Tuple[Tuple[str, str], ...]:
+    """Returns the (url, file_id) pairs already uploaded for a Tenor search term."""
+    if not _gif_file_ids_ready():
+        return ()
+    return gif_file_ids.get(search_term) or ()
+
+def save_gif_file_id(search_term: str, url: str, file_id: str) -> bool:
+    pool = get_gif_pool(search_term)
+    if len(pool) >= GIF_FILE_ID_POOL_SIZE or any(known_url == url for known_url, _ in pool):
+        return False
+    try:
+        with write_connection() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO gif_file_ids (url, search_term, file_id, added_at) VALUES (?, ?, ?, ?)",
+                (url, search_term, file_id, datetime.now(timezone.utc).isoformat())
+            )
+        gif_file_ids.set(search_term, get_gif_pool(search_term) + ((url, file_id),))
+        return True
+    except sqlite3.Error as e:
+        logger.error(f"Error saving GIF file_id for '{search_term}': {e}")
+        return False
+
+def remove_gif_file_id(search_term: str, url: str) -> bool:
+    try:
+        with write_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("DELETE FROM gif_file_ids WHERE url = ?", (url,))
+            removed = cursor.rowcount > 0
+        pool = tuple(entry for entry in get_gif_pool(search_term) if entry[0] != url)
+        if pool:
+            gif_file_ids.set(search_term, pool)
+        else:
+            gif_file_ids.pop(search_term)
+        return removed
+    except sqlite3.Error as e:
+        logger.error(f"Error removing GIF file_id for {url}: {e}")
+        return False
+
+# --- STATS ---
+def get_table_counts() -> dict[str, int] | None:
+    tables = [
+        "users", "blacklist", "dev_users", "sudo_users", "support_users",
+        "whitelist_users", "chat_blacklist", "global_bans", "bot_chats"
+    ]
+    try:
+        with read_connection() as conn:
+            return {table: conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0] for table in tables}
+    except sqlite3.Error as e:
+        logger.error(f"SQLite error fetching table counts: {e}", exc_info=True)
+        return None
@@ -0,0 +1,321 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from enum import IntEnum
+from functools import wraps
+from typing import Any, Awaitable, Callable, Coroutine, Hashable, Iterator
+from telegram.error import BadRequest, Forbidden, RetryAfter
+from telegram.ext import BaseRateLimiter
+
+from ..config import (
+    OUTBOUND_GLOBAL_RATE, OUTBOUND_GROUP_RATE, OUTBOUND_GROUP_BURST,
+    OUTBOUND_PRIVATE_RATE, OUTBOUND_PRIVATE_BURST, OUTBOUND_MAX_RETRIES,
+)
+
+logger = logging.getLogger(__name__)
+
+
+# --- PRIORITIES ---
+class Priority(IntEnum):
+    MODERATION = 0
+    INTERACTIVE = 1
+    BACKGROUND = 2
+    BULK = 3
+
+MODERATION_ENDPOINTS = frozenset({
+    "banChatMember", "unbanChatMember", "restrictChatMember", "promoteChatMember",
+    "banChatSenderChat", "unbanChatSenderChat", "deleteMessage", "deleteMessages",
+    "setChatPermissions", "approveChatJoinRequest", "declineChatJoinRequest",
+})
+MESSAGE_ENDPOINTS = frozenset({"copyMessage", "copyMessages", "forwardMessage", "forwardMessages"})
+
+_current_priority: ContextVar[Priority | None] = ContextVar("outbound_priority", default=None)
+
+@contextmanager
+def outbound_priority(priority: Priority) -> Iterator[None]:
+    """Bot API calls made inside the block are queued at `priority`."""
+    token = _current_priority.set(priority)
+    try:
+        yield
+    finally:
+        _current_priority.reset(token)
+
+def prioritized(priority: Priority) -> Callable:
+    """Decorator form of outbound_priority for a whole handler."""
+    def decorator(func: Callable[..., Coroutine]) -> Callable[..., Coroutine]:
+        @wraps(func)
+        async def wrapper(*args, **kwargs):
+            with outbound_priority(priority):
+                return await func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def is_message_endpoint(endpoint: str) -> bool:
+    return (endpoint.startswith("send") and endpoint != "sendChatAction") or endpoint in MESSAGE_ENDPOINTS
+
+
+# --- TOKEN BUCKET ---
+class TokenBucket:
+    __slots__ = ("rate", "capacity", "tokens", "updated")
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, now: float) -> float:
+        self._refill(now)
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def take(self, now: float) -> None:
+        self._refill(now)
+        self.tokens -= 1
+
+    def pause(self, seconds: float) -> None:
+        """Drains the bucket so nothing is granted for `seconds` (used after a 429)."""
+        self._refill(time.monotonic())
+        self.tokens = min(self.tokens, 1 - seconds * self.rate)
+
+    def is_idle(self, now: float) -> bool:
+        self._refill(now)
+        return self.tokens >= self.capacity
+
+
+_NOTHING_READY = object()
+
+
+class _Request:
+    __slots__ = ("priority", "seq", "key", "future", "enqueued_at")
+
+    def __init__(self, priority: Priority, seq: int, key: Hashable | None, future: asyncio.Future):
+        self.priority = priority
+        self.seq = seq
+        self.key = key
+        self.future = future
+        self.enqueued_at = time.monotonic()
+
+    def __lt__(self, other: "_Request") -> bool:
+        return (self.priority, self.seq) < (other.priority, other.seq)
+
+
+# --- OUTBOUND SCHEDULER ---
+class OutboundScheduler(BaseRateLimiter[int]):
+    """
+    Rate limiter for every Bot API call of the application. Requests wait in a
+    priority queue and a single dispatcher grants them against a global token
+    bucket (~30 msg/s) and, for message sends, a per-chat bucket (about 20/min in
+    groups, 1/s in private chats).
+
+    Priority comes from `rate_limit_args` when a call passes one, then from an
+    enclosing outbound_priority() block, then from the endpoint: moderation
+    calls outrank everything else.
+
+    On a 429 the affected bucket is paused for the requested time and the call
+    is queued again, up to `max_retries` times. Forbidden and BadRequest errors
+    of calls aimed at a chat are passed to `on_chat_error` before being re-raised,
+    so dead chats are noticed whichever handler made the call.
+    """
+
+    def __init__(
+        self,
+        global_rate: float = OUTBOUND_GLOBAL_RATE,
+        group_rate: float = OUTBOUND_GROUP_RATE,
+        group_burst: float = OUTBOUND_GROUP_BURST,
+        private_rate: float = OUTBOUND_PRIVATE_RATE,
+        private_burst: float = OUTBOUND_PRIVATE_BURST,
+        max_retries: int = OUTBOUND_MAX_RETRIES,
+        max_idle_buckets: int = 10_000,
+    ):
+        self.group_rate, self.group_burst = group_rate, group_burst
+        self.private_rate, self.private_burst = private_rate, private_burst
+        self.max_retries = max_retries
+        self.max_idle_buckets = max_idle_buckets
+        self.on_chat_error: Callable[[int | str, Exception], Awaitable[None]] | None = None
+        self._global = TokenBucket(global_rate, global_rate)
+        self._chat_buckets: dict[Hashable, TokenBucket] = {}
+
+        self._seq = itertools.count()
+        self._queues: dict[Hashable | None, list[_Request]] = {}
+        self._ready: list[tuple[Priority, int, Hashable | None]] = []
+        self._timers: list[tuple[float, int, Hashable]] = []
+        self._timed: set[Hashable] = set()
+        self._wakeup = asyncio.Event()
+        self._dispatcher: asyncio.Task | None = None
+
+        self._depth = {priority: 0 for priority in Priority}
+        self._granted = 0
+        self._retries = 0
+        self._waits: deque[float] = deque(maxlen=1000)
+
+    # --- LIFECYCLE ---
+    async def initialize(self) -> None:
+        if self._dispatcher is None or self._dispatcher.done():
+            self._wakeup = asyncio.Event()
+            self._dispatcher = asyncio.create_task(self._dispatch(), name="wuufbot-outbound-scheduler")
+
+    async def shutdown(self) -> None:
+        if self._dispatcher:
+            self._dispatcher.cancel()
+            await asyncio.gather(self._dispatcher, return_exceptions=True)
+            self._dispatcher = None
+
+    # --- REQUESTS ---
+    def _priority_for(self, endpoint: str, rate_limit_args: int | None) -> Priority:
+        if rate_limit_args is not None:
+            return Priority(rate_limit_args)
+        current = _current_priority.get()
+        if current is not None:
+            return current
+        return Priority.MODERATION if endpoint in MODERATION_ENDPOINTS else Priority.INTERACTIVE
+
+    def _bucket_for(self, key: Hashable) -> TokenBucket:
+        bucket = self._chat_buckets.get(key)
+        if bucket is None:
+            is_group = isinstance(key, str) or key < 0
+            bucket = TokenBucket(
+                self.group_rate if is_group else self.private_rate,
+                self.group_burst if is_group else self.private_burst,
+            )
+            self._chat_buckets[key] = bucket
+        return bucket
+
+    async def process_request(
+        self,
+        callback: Callable[..., Coroutine[Any, Any, bool | dict[str, Any] | list[dict[str, Any]]]],
+        args: Any,
+        kwargs: dict[str, Any],
+        endpoint: str,
+        data: dict[str, Any],
+        rate_limit_args: int | None,
+    ) -> bool | dict[str, Any] | list[dict[str, Any]]:
+        priority = self._priority_for(endpoint, rate_limit_args)
+        key = data.get("chat_id") if is_message_endpoint(endpoint) else None
+
+        for attempt in range(self.max_retries + 1):
+            await self._acquire(priority, key)
+            try:
+                return await callback(*args, **kwargs)
+            except (Forbidden, BadRequest) as e:
+                chat_id = data.get("chat_id")
+                if self.on_chat_error is not None and chat_id is not None:
+                    try:
+                        await self.on_chat_error(chat_id, e)
+                    except Exception as hook_error:
+                        logger.error(f"Chat error hook failed for {chat_id}: {hook_error}", exc_info=True)
+                raise
+            except RetryAfter as e:
+                if attempt == self.max_retries:
+                    logger.error(f"Rate limit hit on {endpoint} after {self.max_retries} retries.")
+                    raise
+                retry_after = e.retry_after if isinstance(e.retry_after, (int, float)) else e.retry_after.total_seconds()
+                self._retries += 1
+                (self._bucket_for(key) if key is not None else self._global).pause(retry_after + 0.1)
+                logger.info(f"Rate limit hit on {endpoint} for {key or 'all chats'}. Requeued after {retry_after:.1f}s.")
+        raise AssertionError("unreachable")
+
+    async def _acquire(self, priority: Priority, key: Hashable | None) -> None:
+        future = asyncio.get_running_loop().create_future()
+        request = _Request(priority, next(self._seq), key, future)
+        queue = self._queues.setdefault(key, [])
+        heapq.heappush(queue, request)
+        if key not in self._timed:
+            heapq.heappush(self._ready, (priority, request.seq, key))
+        self._depth[priority] += 1
+        self._wakeup.set()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if not future.done():
+                future.cancel()
+            raise
+
+    # --- DISPATCHER ---
+    def _release_timers(self, now: float) -> float | None:
+        while self._timers and self._timers[0][0] <= now:
+            _, _, key = heapq.heappop(self._timers)
+            self._timed.discard(key)
+            queue = self._queues.get(key)
+            if queue:
+                heapq.heappush(self._ready, (queue[0].priority, queue[0].seq, key))
+        return self._timers[0][0] - now if self._timers else None
+
+    def _pop_ready(self) -> Hashable | None:
+        """Returns the key whose head request should go next, dropping stale entries."""
+        while self._ready:
+            _, seq, key = heapq.heappop(self._ready)
+            queue = self._queues.get(key)
+            if queue and queue[0].seq == seq and key not in self._timed:
+                return key
+        return _NOTHING_READY
+
+    def _grant(self, key: Hashable | None, now: float) -> None:
+        queue = self._queues[key]
+        request = heapq.heappop(queue)
+        self._depth[request.priority] -= 1
+        if not request.future.done():
+            if key is not None:
+                self._bucket_for(key).take(now)
+            self._global.take(now)
+            self._granted += 1
+            self._waits.append(now - request.enqueued_at)
+            request.future.set_result(None)
+        if queue:
+            heapq.heappush(self._ready, (queue[0].priority, queue[0].seq, key))
+        else:
+            del self._queues[key]
+
+    async def _dispatch(self) -> None:
+        while True:
+            now = time.monotonic()
+            timer_delay = self._release_timers(now)
+            delay = self._global.wait_time(now) if self._ready else None
+
+            if delay == 0:
+                key = self._pop_ready()
+                if key is not _NOTHING_READY:
+                    chat_delay = self._bucket_for(key).wait_time(now) if key is not None else 0.0
+                    if chat_delay > 0:
+                        self._timed.add(key)
+                        heapq.heappush(self._timers, (now + chat_delay, next(self._seq), key))
+                    else:
+                        self._grant(key, now)
+                    if len(self._chat_buckets) > self.max_idle_buckets:
+                        self._prune_buckets(now)
+                    continue
+                delay = None
+
+            if timer_delay is not None:
+                delay = timer_delay if delay is None else min(delay, timer_delay)
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), delay)
+            except asyncio.TimeoutError:
+                pass
+
+    def _prune_buckets(self, now: float) -> None:
+        for key in [key for key, bucket in self._chat_buckets.items() if key not in self._queues and bucket.is_idle(now)]:
+            del self._chat_buckets[key]
+
+    # --- STATS ---
+    def stats(self) -> dict[str, Any]:
+        waits = sorted(self._waits)
+        return {
+            "queued": sum(self._depth.values()),
+            "queued_by_priority": {priority.name.lower(): depth for priority, depth in self._depth.items()},
+            "granted": self._granted,
+            "retries": self._retries,
+            "wait_avg_ms": (sum(waits) / len(waits) * 1000) if waits else 0.0,
+            "wait_p95_ms": waits[int(len(waits) * 0.95) - 1] * 1000 if waits else 0.0,
+            "wait_max_ms": waits[-1] * 1000 if waits else 0.0,
+            "tracked_chats": len(self._chat_buckets),
+        }
@@ -0,0 +1,141 @@
+import asyncio
+import logging
+import random
+import time
+import httpx
+
+from ..config import TENOR_API_KEY, TENOR_CACHE_TTL, TENOR_TIMEOUT, TENOR_RESULTS_PER_TERM, TENOR_RETRY_AFTER
+
+logger = logging.getLogger(__name__)
+
+TENOR_SEARCH_URL = "https://tenor.googleapis.com/v2/search"
+
+
+# --- SEARCH RESULT CACHE ---
+class _TermResults:
+    __slots__ = ("urls", "fetched_at", "failed_at")
+
+    def __init__(self):
+        self.urls: list[str] = []
+        self.fetched_at = 0.0
+        self.failed_at = 0.0
+
+
+# --- TENOR CLIENT ---
+class TenorClient:
+    """
+    Pooled async Tenor search with per-term result caching. Fresh results are
+    served without a request. Stale ones are served immediately while one
+    background request refreshes them, so a slow or failing Tenor only
+    matters for terms that were never fetched.
+    """
+
+    def __init__(self, api_key: str | None = TENOR_API_KEY, ttl: float = TENOR_CACHE_TTL, timeout: float = TENOR_TIMEOUT):
+        self.api_key = api_key
+        self.ttl = ttl
+        self.timeout = timeout
+        self._client: httpx.AsyncClient | None = None
+        self._terms: dict[str, _TermResults] = {}
+        self._inflight: dict[str, asyncio.Task] = {}
+
+    def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                timeout=self.timeout,
+                limits=httpx.Limits(max_connections=10, max_keepalive_connections=5),
+            )
+        return self._client
+
+    def cached(self, term: str) -> list[str]:
+        entry = self._terms.get(term)
+        return entry.urls if entry else []
+
+    async def search(self, term: str, wait: bool = True) -> list[str]:
+        """
+        Returns cached or freshly fetched GIF URLs for `term`, empty when none are known.
+        With wait=False a missing term is fetched in the background instead.
+        """
+        entry = self._terms.setdefault(term, _TermResults())
+        now = time.monotonic()
+        if entry.urls and now - entry.fetched_at < self.ttl:
+            return entry.urls
+        if now - entry.failed_at < TENOR_RETRY_AFTER:
+            return entry.urls
+
+        task = self._inflight.get(term)
+        if task is None:
+            task = asyncio.create_task(self._refresh(term, entry))
+            self._inflight[term] = task
+            task.add_done_callback(lambda _: self._inflight.pop(term, None))
+        if entry.urls or not wait:
+            return entry.urls
+        return await asyncio.shield(task)
+
+    async def _refresh(self, term: str, entry: _TermResults) -> list[str]:
+        urls = await self._fetch(term)
+        if urls:
+            entry.urls = urls
+            entry.fetched_at = time.monotonic()
+        else:
+            entry.failed_at = time.monotonic()
+        return entry.urls
+
+    async def _fetch(self, term: str) -> list[str]:
+        logger.info(f"Searching Tenor for BEST results: '{term}'")
+        params = {
+            "q": term,
+            "key": self.api_key,
+            "client_key": "wuufbot_project_py",
+            "limit": TENOR_RESULTS_PER_TERM,
+            "media_filter": "gif",
+            "contentfilter": "off"
+        }
+        try:
+            # httpx timeouts are per read, so the whole request gets its own deadline too.
+            response = await asyncio.wait_for(self._get_client().get(TENOR_SEARCH_URL, params=params), self.timeout)
+            if response.status_code != 200:
+                logger.error(f"Tenor API failed for '{term}', status: {response.status_code}")
+                logger.error(f"Tenor error response: {response.text[:500]}")
+                return []
+
+            results = response.json().get("results")
+            if not results:
+                logger.warning(f"No results on Tenor for '{term}'.")
+                return []
+
+            urls = []
+            for item in results[:TENOR_RESULTS_PER_TERM]:
+                media = item.get("media_formats", {})
+                gif_url = media.get("gif", {}).get("url") or media.get("tinygif", {}).get("url")
+                if gif_url:
+                    urls.append(gif_url)
+            if not urls:
+                logger.warning(f"Could not extract GIF URL from Tenor items for '{term}'.")
+            return urls
+
+        except (httpx.TimeoutException, asyncio.TimeoutError): logger.error(f"Timeout fetching GIF from Tenor for '{term}'.")
+        except httpx.HTTPError as e: logger.error(f"Network/Request error fetching GIF from Tenor: {e}")
+        except Exception as e: logger.error(f"Unexpected error searching Tenor for '{term}': {e}", exc_info=True)
+        return []
+
+    async def random_gif(self, search_terms: list[str], term: str | None = None) -> tuple[str, str] | None:
+        """Returns (term, url) for `term`, or for a random one of `search_terms` when not given."""
+        if not self.api_key: return None
+        if not search_terms: logger.warning("No search terms for random_gif."); return None
+
+        term = term or random.choice(search_terms)
+        # Cached results of the sibling terms are used rather than waiting on Tenor for this one.
+        fallback = [(other, url) for other in search_terms if other != term for url in self.cached(other)]
+        urls = await self.search(term, wait=not fallback)
+        if urls:
+            return term, random.choice(urls)
+        return random.choice(fallback) if fallback else None
+
+    async def close(self) -> None:
+        for task in list(self._inflight.values()):
+            task.cancel()
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+tenor_client = TenorClient()
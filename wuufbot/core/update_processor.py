@@ -0,0 +1,72 @@
+import asyncio
+import logging
+from typing import Any, Awaitable, Hashable
+from telegram import Update
+from telegram.ext import BaseUpdateProcessor
+
+from ..config import MAX_CONCURRENT_UPDATES
+
+logger = logging.getLogger(__name__)
+
+
+# --- CHAT-ORDERED UPDATE PROCESSOR ---
+class ChatOrderedUpdateProcessor(BaseUpdateProcessor):
+    """
+    Processes updates from different chats concurrently while updates from the
+    same chat run strictly one after another, in the order they were fetched.
+
+    PTB's own semaphore in process_update() is sized generously because an
+    update waiting behind its chat's lock should not hold one of the
+    `max_concurrent_updates` worker slots; those are acquired after the lock.
+    """
+
+    __slots__ = ("max_workers", "_workers", "_chat_locks")
+
+    def __init__(self, max_concurrent_updates: int = MAX_CONCURRENT_UPDATES, max_pending_updates: int | None = None):
+        super().__init__(max_pending_updates or max_concurrent_updates * 64)
+        self.max_workers = max_concurrent_updates
+        self._workers = asyncio.BoundedSemaphore(max_concurrent_updates)
+        self._chat_locks: dict[Hashable, tuple[asyncio.Lock, int]] = {}
+
+    @staticmethod
+    def ordering_key(update: object) -> Hashable | None:
+        """Updates sharing a key are serialized; None means the update has no ordering constraint."""
+        if not isinstance(update, Update):
+            return None
+        if update.effective_chat:
+            return update.effective_chat.id
+        if update.effective_user:
+            return update.effective_user.id
+        return None
+
+    async def do_process_update(self, update: object, coroutine: Awaitable[Any]) -> None:
+        key = self.ordering_key(update)
+        if key is None:
+            async with self._workers:
+                await coroutine
+            return
+
+        lock, waiters = self._chat_locks.get(key, (None, 0))
+        if lock is None:
+            lock = asyncio.Lock()
+        self._chat_locks[key] = (lock, waiters + 1)
+        try:
+            async with lock:
+                async with self._workers:
+                    await coroutine
+        finally:
+            lock, waiters = self._chat_locks[key]
+            if waiters == 1:
+                del self._chat_locks[key]
+            else:
+                self._chat_locks[key] = (lock, waiters - 1)
+
+    @property
+    def active_chats(self) -> int:
+        return len(self._chat_locks)
+
+    async def initialize(self) -> None:
+        logger.info(f"Chat-ordered update processor ready ({self.max_workers} concurrent updates).")
+
+    async def shutdown(self) -> None:
+        pass
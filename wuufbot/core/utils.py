@@ -5,13 +5,11 @@ import json
 import logging
 import random
 import re
-import sqlite3
 import subprocess
 from datetime import timedelta, datetime, timezone
-from typing import List, Tuple
+from typing import AsyncIterator, List, Tuple
 
 import google.generativeai as genai
-import requests
 import speedtest
 import telegram
 from telegram import Update, User, Chat, constants, ChatPermissions
@@ -21,13 +19,17 @@ from telegram.ext import ContextTypes
 from telethon import TelegramClient
 from telethon.tl.types import User as TelethonUser
 
-from ..config import OWNER_ID, TENOR_API_KEY, GEMINI_API_KEY, LOG_CHAT_ID, ADMIN_LOG_CHAT_ID, DB_NAME
-from .database import (
-    is_dev_user, is_sudo_user, is_support_user,
+from ..config import OWNER_ID, GEMINI_API_KEY, GEMINI_MODEL, GIF_FILE_ID_POOL_SIZE, LOG_CHAT_ID, ADMIN_LOG_CHAT_ID, UNBAN_PROPAGATION_CONCURRENCY
+from .database import is_dev_user, is_sudo_user, is_support_user, get_gif_pool
+from .async_database import (
     get_user_from_db_by_id, get_user_from_db_by_username,
-    update_user_in_db
+    update_user_in_db, get_all_bot_chat_ids, get_ban_ledger_chats, remove_ban_records,
+    save_gif_file_id, remove_gif_file_id
 )
 from .async_utils import aioify
+from .admin_cache import get_admin_member
+from .tenor import tenor_client
+from .rate_limiter import Priority
 
 logger = logging.getLogger(__name__)
 
@@ -55,55 +57,54 @@ async def check_username_protection(target_mention: str, context: ContextTypes.D
     return is_protected, is_owner_match
 
 # --- THEMED GIFS ---
-async def get_themed_gif(context: ContextTypes.DEFAULT_TYPE, search_terms: list[str]) -> str | None:
-    if not TENOR_API_KEY: return None
+class ThemedGif:
+    """A GIF picked for a search term; `file_id` is set once Telegram has seen the URL."""
+
+    __slots__ = ("term", "url", "file_id")
+
+    def __init__(self, term: str, url: str, file_id: str | None = None):
+        self.term = term
+        self.url = url
+        self.file_id = file_id
+
+    @property
+    def media(self) -> str:
+        return self.file_id or self.url
+
+async def get_themed_gif(context: ContextTypes.DEFAULT_TYPE, search_terms: list[str]) -> ThemedGif | None:
     if not search_terms: logger.warning("No search terms for get_themed_gif."); return None
-    
-    search_term = random.choice(search_terms)
-    logger.info(f"Searching Tenor for BEST results: '{search_term}'")
-    
-    url = "https://tenor.googleapis.com/v2/search"
-    params = { 
-        "q": search_term, 
-        "key": TENOR_API_KEY, 
-        "client_key": "wuufbot_project_py", 
-        "limit": 50, 
-        "media_filter": "gif", 
-        "contentfilter": "off"
-    }
-    
-    try:
-        response = requests.get(url, params=params, timeout=7)
-        if response.status_code != 200:
-            logger.error(f"Tenor API failed for '{search_term}', status: {response.status_code}")
-            try: error_content = response.json(); logger.error(f"Tenor error content: {error_content}")
-            except requests.exceptions.JSONDecodeError: logger.error(f"Tenor error response (non-JSON): {response.text[:500]}")
-            return None
-        
-        data = response.json()
-        results = data.get("results")
-        
-        if results:
-            top_gifs = results[:5] 
-            selected_gif = random.choice(top_gifs)
-            
-            gif_url = selected_gif.get("media_formats", {}).get("gif", {}).get("url")
-            if not gif_url: gif_url = selected_gif.get("media_formats", {}).get("tinygif", {}).get("url")
-            
-            if gif_url: 
-                logger.info(f"Found high-quality GIF URL: {gif_url}")
-                return gif_url
-            else: 
-                logger.warning(f"Could not extract GIF URL from Tenor item for '{search_term}'.")
-        else: 
-            logger.warning(f"No results on Tenor for '{search_term}'.")
-            logger.debug(f"Tenor response (no results): {data}")
-            
-    except requests.exceptions.Timeout: logger.error(f"Timeout fetching GIF from Tenor for '{search_term}'.")
-    except requests.exceptions.RequestException as e: logger.error(f"Network/Request error fetching GIF from Tenor: {e}")
-    except Exception as e: logger.error(f"Unexpected error in get_themed_gif for '{search_term}': {e}", exc_info=True)
-    
-    return None
+
+    term = random.choice(search_terms)
+    pool = get_gif_pool(term)
+    if len(pool) >= GIF_FILE_ID_POOL_SIZE:
+        return ThemedGif(term, *random.choice(pool))
+
+    found = await tenor_client.random_gif(search_terms, term)
+    if not found:
+        return ThemedGif(term, *random.choice(pool)) if pool else None
+
+    found_term, url = found
+    file_id = next((known_id for known_url, known_id in get_gif_pool(found_term) if known_url == url), None)
+    return ThemedGif(found_term, url, file_id)
+
+async def remember_themed_gif(gif: ThemedGif, sent_message: telegram.Message | None) -> None:
+    """Stores the file_id Telegram assigned to a freshly uploaded GIF URL."""
+    if gif.file_id or not sent_message:
+        return
+    media = sent_message.animation or sent_message.document
+    if media:
+        await save_gif_file_id(gif.term, gif.url, media.file_id)
+
+UNUSABLE_FILE_ERRORS = ("wrong file identifier", "file_id", "wrong file type", "wrong type of the web page content", "type of file mismatch")
+
+def is_unusable_file_error(error: Exception) -> bool:
+    """True when Telegram rejected the file itself, not the request or the chat."""
+    return isinstance(error, BadRequest) and any(text in str(error).lower() for text in UNUSABLE_FILE_ERRORS)
+
+async def forget_themed_gif(gif: ThemedGif) -> None:
+    if gif.file_id:
+        logger.warning(f"Dropping unusable GIF file_id for '{gif.term}': {gif.url}")
+        await remove_gif_file_id(gif.term, gif.url)
 
 # --- CREATE PROFILE LINK ---
 def create_user_html_link(user: User) -> str:
@@ -177,7 +178,7 @@ async def resolve_user_with_telethon(context: ContextTypes.DEFAULT_TYPE, target_
                 if target_input.lstrip('@').lower() == mentioned_text.lstrip('@').lower():
                     if entity.user:
                         logger.info(f"Resolved '{target_input}' via Text Mention entity.")
-                        update_user_in_db(entity.user)
+                        await update_user_in_db(entity.user)
                         return entity.user
 
     identifier: str | int = target_input
@@ -188,9 +189,9 @@ async def resolve_user_with_telethon(context: ContextTypes.DEFAULT_TYPE, target_
 
     if isinstance(identifier, int):
         logger.info(f"Resolving '{target_input}' using DB...")
-        entity_from_db = get_user_from_db_by_id(identifier)
+        entity_from_db = await get_user_from_db_by_id(identifier)
     else:
-        entity_from_db = get_user_from_db_by_username(identifier)
+        entity_from_db = await get_user_from_db_by_username(identifier)
     
     if entity_from_db:
         return entity_from_db
@@ -202,7 +203,7 @@ async def resolve_user_with_telethon(context: ContextTypes.DEFAULT_TYPE, target_
         ptb_entity = await context.bot.get_chat(target_input)
         if ptb_entity:
             if isinstance(ptb_entity, User):
-                update_user_in_db(ptb_entity)
+                await update_user_in_db(ptb_entity)
             return ptb_entity
     except Exception as e:
         logger.warning(f"PTB failed for '{target_input}': {e}.")
@@ -222,7 +223,7 @@ async def resolve_user_with_telethon(context: ContextTypes.DEFAULT_TYPE, target_
         if isinstance(entity_from_telethon, TelethonUser):
             ptb_user = telethon_entity_to_ptb_user(entity_from_telethon)
             if ptb_user:
-                update_user_in_db(ptb_user)
+                await update_user_in_db(ptb_user)
                 return ptb_user
         
     except Exception as e:
@@ -242,6 +243,16 @@ def is_entity_a_user(entity: object | None) -> bool:
 
     return False
     
+# Only texts meaning the bot lost the chat itself; other 403s (missing rights, etc.) leave it alive.
+DEAD_CHAT_ERRORS = (
+    "bot was kicked", "bot is not a member", "chat not found", "group chat was deactivated",
+    "user is deactivated", "bot was blocked by the user",
+)
+
+def is_dead_chat_error(error: Exception) -> bool:
+    """True for API errors meaning the bot can no longer reach the chat at all."""
+    return isinstance(error, (telegram.error.Forbidden, BadRequest)) and any(text in str(error).lower() for text in DEAD_CHAT_ERRORS)
+
 def get_readable_time_delta(delta: timedelta) -> str:
     total_seconds = int(delta.total_seconds())
     if total_seconds < 0: 
@@ -362,12 +373,12 @@ async def _can_user_perform_action(
         return True
 
     try:
-        actor_chat_member = await context.bot.get_chat_member(chat.id, user.id)
+        actor_chat_member = await get_admin_member(context, chat.id, user.id)
         
-        if actor_chat_member.status == "creator":
+        if actor_chat_member and actor_chat_member.status == "creator":
             return True
 
-        if actor_chat_member.status == "administrator" and getattr(actor_chat_member, permission, False):
+        if actor_chat_member and actor_chat_member.status == "administrator" and getattr(actor_chat_member, permission, False):
             return True
             
     except TelegramError as e:
@@ -437,15 +448,7 @@ def is_owner_or_dev(user_id: int) -> bool:
     return is_dev_user(user_id)
 
 def is_privileged_user(user_id: int) -> bool:
-    if user_id == OWNER_ID:
-        return True
-    if is_dev_user(user_id):
-        return True
-    if is_sudo_user(user_id):
-        return True
-    if is_support_user(user_id):
-        return True
-    return False
+    return is_owner_or_dev(user_id) or is_sudo_user(user_id) or is_support_user(user_id)
 
 # --- TEXT FORMATING ---
 async def format_message_text(text: str, user: User, chat: Chat, context: ContextTypes.DEFAULT_TYPE) -> str:
@@ -480,18 +483,38 @@ async def format_message_text(text: str, user: User, chat: Chat, context: Contex
     return text
 
 # --- AI ---
+_gemini_model: genai.GenerativeModel | None = None
+
+def get_gemini_model() -> genai.GenerativeModel:
+    """Configures the Gemini SDK once and returns the process-wide model."""
+    global _gemini_model
+    if _gemini_model is None:
+        genai.configure(api_key=GEMINI_API_KEY)
+        _gemini_model = genai.GenerativeModel(GEMINI_MODEL)
+    return _gemini_model
+
 async def get_gemini_response(prompt: str) -> str:
     if not GEMINI_API_KEY:
         return "AI features are not configured by the bot owner."
     try:
-        genai.configure(api_key=GEMINI_API_KEY)
-        model = genai.GenerativeModel('gemini-2.5-flash-preview-05-20')
-        response = await model.generate_content_async(prompt)
+        response = await get_gemini_model().generate_content_async(prompt)
         return response.text
     except Exception as e:
         logger.error(f"Error communicating with Gemini AI: {e}", exc_info=True)
         return f"Sorry, I encountered an error while communicating with the AI: {type(e).__name__}"
 
+async def stream_gemini_response(prompt: str) -> AsyncIterator[str]:
+    """Yields the response text as Gemini produces it. Errors are left to the caller."""
+    response = await get_gemini_model().generate_content_async(prompt, stream=True)
+    async for chunk in response:
+        try:
+            text = chunk.text
+        except ValueError:
+            # Chunks without text parts (e.g. a final safety verdict) have no .text.
+            continue
+        if text:
+            yield text
+
 # --- SPEEDTEST ---
 def run_speed_test_blocking():
     try:
@@ -527,45 +550,52 @@ async def propagate_unban(context: ContextTypes.DEFAULT_TYPE) -> None:
     user_display = job_data['user_display']
     command_message_id = job_data['command_message_id']
 
-    chats_to_scan = []
-    try:
-        with sqlite3.connect(DB_NAME) as conn:
-            cursor = conn.cursor()
-            chats_to_scan = [row[0] for row in cursor.execute("SELECT chat_id FROM bot_chats")]
-    except sqlite3.Error as e:
-        logger.error(f"Failed to get chat list for unban propagation: {e}")
-        await context.bot.send_message(chat_id=command_chat_id, text="Error fetching chat list from database.")
-        return
+    chats_to_scan = await get_ban_ledger_chats(target_user_id)
+    if chats_to_scan is None:
+        # Bans from before the ledger existed, or an unreadable ledger, leave every live chat to try.
+        chats_to_scan = await get_all_bot_chat_ids()
+        if not chats_to_scan:
+            await context.bot.send_message(
+                chat_id=command_chat_id,
+                text="Could not get a chat list to propagate the unban, check the logs.",
+                reply_to_message_id=command_message_id
+            )
+            return
+        logger.info(f"No usable ban ledger rows for {target_user_id}, falling back to all {len(chats_to_scan)} chats.")
+    else:
+        logger.info(f"Starting unban propagation for {target_user_id} across {len(chats_to_scan)} ledger chats.")
 
-    if not chats_to_scan:
-        await context.bot.send_message(chat_id=command_chat_id, text="I don't seem to be in any chats to propagate the unban.")
-        return
+    slots = asyncio.Semaphore(UNBAN_PROPAGATION_CONCURRENCY)
 
-    successful_unbans = 0
-    
-    logger.info(f"Starting unban propagation for {target_user_id} across {len(chats_to_scan)} chats.")
-    
-    for chat_id in chats_to_scan:
-        try:
-            chat_member = await context.bot.get_chat_member(chat_id=chat_id, user_id=target_user_id)
-            
-            if chat_member.status == 'kicked':
-                success = await context.bot.unban_chat_member(chat_id=chat_id, user_id=target_user_id)
-                if success:
-                    successful_unbans += 1
-                    logger.info(f"Successfully unbanned {target_user_id} from chat {chat_id}.")
-            
-        except telegram.error.BadRequest as e:
-            if "user not found" not in str(e).lower():
+    async def unban_in(chat_id: int) -> bool:
+        """Returns True once the chat needs no further unban attempt."""
+        async with slots:
+            try:
+                await context.bot.unban_chat_member(chat_id=chat_id, user_id=target_user_id, only_if_banned=True, rate_limit_args=Priority.BULK)
+                # Telegram answers True whether or not the user was banned, so this may have been a no-op.
+                logger.debug(f"Unban of {target_user_id} processed in chat {chat_id}.")
+                return True
+            except (BadRequest, telegram.error.Forbidden) as e:
+                if "user not found" in str(e).lower() or is_dead_chat_error(e):
+                    return True
                 logger.warning(f"Could not process unban for {target_user_id} in {chat_id}: {e}")
-        except Exception as e:
-            logger.error(f"Unexpected error during unban propagation in {chat_id}: {e}")
-            
-        await asyncio.sleep(0.2)
+            except Exception as e:
+                logger.error(f"Unexpected error during unban propagation in {chat_id}: {e}")
+            return False
 
-    logger.info(f"Unban propagation finished for {target_user_id}. Succeeded in {successful_unbans} chats.")
+    results = await asyncio.gather(*(unban_in(chat_id) for chat_id in chats_to_scan))
+    finished = [chat_id for chat_id, done in zip(chats_to_scan, results) if done]
+    await remove_ban_records(target_user_id, finished)
 
-    success_message = f"✅ Done! {user_display} [<code>{target_user_id}</code>] has been <b>globally unbanned</b>."
+    logger.info(f"Unban propagation finished for {target_user_id}. Done in {len(finished)}/{len(chats_to_scan)} chats.")
+
+    if len(finished) == len(chats_to_scan):
+        success_message = f"✅ Done! {user_display} [<code>{target_user_id}</code>] has been <b>globally unbanned</b>."
+    else:
+        success_message = (
+            f"⚠️ {user_display} [<code>{target_user_id}</code>] has been <b>globally unbanned</b>, "
+            f"done in <code>{len(finished)}/{len(chats_to_scan)}</code> chats. The rest failed, check the logs."
+        )
     
     try:
         await context.bot.send_message(
@@ -0,0 +1,178 @@
+import asyncio
+import hmac
+import json
+import logging
+from telegram import Update
+from telegram.ext import Application
+
+from ..config import (
+    WEBHOOK_URL, WEBHOOK_LISTEN, WEBHOOK_PORT, WEBHOOK_PATH,
+    WEBHOOK_SECRET_TOKEN, WEBHOOK_MAX_CONNECTIONS,
+)
+
+logger = logging.getLogger(__name__)
+
+SECRET_HEADER = "x-telegram-bot-api-secret-token"
+MAX_HEADER_BYTES = 16 * 1024
+MAX_BODY_BYTES = 4 * 1024 * 1024
+IDLE_TIMEOUT = 75
+
+_REASONS = {
+    200: "OK", 400: "Bad Request", 403: "Forbidden", 404: "Not Found",
+    405: "Method Not Allowed", 411: "Length Required", 413: "Payload Too Large",
+}
+
+
+class _BadRequest(Exception):
+    def __init__(self, status: int):
+        super().__init__(status)
+        self.status = status
+
+
+# --- WEBHOOK SERVER ---
+class WebhookServer:
+    """
+    Minimal HTTP/1.1 endpoint for Telegram webhook POSTs. Each valid update is
+    put on application.update_queue, exactly where the polling updater puts it.
+    At most `max_connections` requests are served at once. TLS is expected to
+    be terminated by a reverse proxy in front of it.
+    """
+
+    def __init__(
+        self,
+        application: Application,
+        listen: str = WEBHOOK_LISTEN,
+        port: int = WEBHOOK_PORT,
+        path: str = WEBHOOK_PATH,
+        secret_token: str | None = WEBHOOK_SECRET_TOKEN,
+        max_connections: int = WEBHOOK_MAX_CONNECTIONS,
+    ):
+        self.application = application
+        self.listen = listen
+        self.port = port
+        self.path = path
+        self.secret_token = secret_token
+        self.max_connections = max_connections
+        self._slots = asyncio.Semaphore(max_connections)
+        self._server: asyncio.AbstractServer | None = None
+        self._connections: set[asyncio.Task] = set()
+
+    async def start(self) -> None:
+        self._server = await asyncio.start_server(self._serve_connection, self.listen, self.port, limit=MAX_HEADER_BYTES)
+        logger.info(f"Webhook server listening on {self.listen}:{self.port}{self.path} (max {self.max_connections} connections).")
+
+    async def stop(self) -> None:
+        if not self._server:
+            return
+        self._server.close()
+        for task in list(self._connections):
+            task.cancel()
+        await asyncio.gather(*self._connections, return_exceptions=True)
+        await self._server.wait_closed()
+        self._server = None
+        logger.info("Webhook server stopped.")
+
+    async def _serve_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        task = asyncio.current_task()
+        self._connections.add(task)
+        try:
+            while True:
+                request_line = await asyncio.wait_for(reader.readline(), IDLE_TIMEOUT)
+                if not request_line:
+                    break
+                # Idle keep-alive connections do not hold a slot, only requests being served do.
+                async with self._slots:
+                    try:
+                        keep_alive = await asyncio.wait_for(self._serve_request(request_line, reader, writer), IDLE_TIMEOUT)
+                    except _BadRequest as e:
+                        await self._respond(writer, e.status, keep_alive=False)
+                        break
+                if not keep_alive:
+                    break
+        except (asyncio.TimeoutError, asyncio.IncompleteReadError, asyncio.CancelledError, ConnectionError, ValueError):
+            pass
+        except Exception as e:
+            logger.error(f"Webhook connection failed: {e}", exc_info=True)
+        finally:
+            self._connections.discard(task)
+            writer.close()
+
+    async def _serve_request(self, request_line: bytes, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> bool:
+        """Handles one request and returns whether the connection stays open."""
+        try:
+            method, target, version = request_line.decode("latin-1").split()
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b"\n", b""):
+                    break
+                name, _, value = line.decode("latin-1").partition(":")
+                headers[name.strip().lower()] = value.strip()
+        except (ValueError, asyncio.LimitOverrunError):
+            raise _BadRequest(400)
+
+        keep_alive = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+
+        try:
+            length = int(headers["content-length"])
+        except (KeyError, ValueError):
+            raise _BadRequest(411)
+        if length > MAX_BODY_BYTES:
+            raise _BadRequest(413)
+        body = await reader.readexactly(length)
+
+        status = self._check_request(method, target, headers)
+        if status == 200:
+            status = await self._enqueue(body)
+        await self._respond(writer, status, keep_alive)
+        return keep_alive
+
+    def _check_request(self, method: str, target: str, headers: dict[str, str]) -> int:
+        if target.split("?", 1)[0] != self.path:
+            return 404
+        if method != "POST":
+            return 405
+        if self.secret_token and not hmac.compare_digest(headers.get(SECRET_HEADER, ""), self.secret_token):
+            logger.warning("Rejected webhook request with a missing or invalid secret token.")
+            return 403
+        return 200
+
+    async def _enqueue(self, body: bytes) -> int:
+        try:
+            update = Update.de_json(json.loads(body), self.application.bot)
+        except Exception as e:
+            logger.warning(f"Rejected malformed webhook update: {e}")
+            return 400
+        if update is None:
+            return 400
+        await self.application.update_queue.put(update)
+        return 200
+
+    @staticmethod
+    async def _respond(writer: asyncio.StreamWriter, status: int, keep_alive: bool) -> None:
+        writer.write(
+            f"HTTP/1.1 {status} {_REASONS[status]}\r\n"
+            f"Content-Length: 0\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode("latin-1")
+        )
+        await writer.drain()
+
+
+# --- REGISTRATION ---
+async def register_webhook(application: Application, max_connections: int = WEBHOOK_MAX_CONNECTIONS) -> bool:
+    """Points Telegram at WEBHOOK_URL. Without one the server only receives locally posted updates."""
+    if not WEBHOOK_URL:
+        logger.warning("WEBHOOK_URL not set, skipping setWebhook. Post update JSON to the server to test it locally.")
+        return False
+    try:
+        await application.bot.set_webhook(
+            url=WEBHOOK_URL,
+            allowed_updates=Update.ALL_TYPES,
+            max_connections=max_connections,
+            secret_token=WEBHOOK_SECRET_TOKEN,
+        )
+        logger.info(f"Webhook registered at {WEBHOOK_URL}.")
+        return True
+    except Exception as e:
+        logger.error(f"Failed to register webhook at {WEBHOOK_URL}: {e}")
+        return False
@@ -2,6 +2,7 @@ import asyncio
 import logging
 import os
 import io
+import signal
 import importlib
 import traceback
 import json
@@ -9,12 +10,19 @@ import html
 from datetime import datetime, timezone, timedelta
 from telegram import Update, constants
 from telegram.constants import ParseMode, UpdateType
-from telegram.ext import Application, ApplicationBuilder, JobQueue, ContextTypes, MessageHandler, filters, ApplicationHandlerStop, ChatMemberHandler, CommandHandler
+from telegram.ext import Application, ApplicationBuilder, JobQueue, ContextTypes, MessageHandler, filters, ApplicationHandlerStop, ChatMemberHandler, CommandHandler, TypeHandler
 from telegram.request import HTTPXRequest
 from telethon import TelegramClient
 
-from .config import SESSION_NAME, API_ID, API_HASH, LOG_CHAT_ID, OWNER_ID, BOT_TOKEN, ADMIN_LOG_CHAT_ID, DB_NAME
-from .core.database import init_db, disable_module, enable_module, get_disabled_modules
+from .config import SESSION_NAME, API_ID, API_HASH, LOG_CHAT_ID, OWNER_ID, BOT_TOKEN, ADMIN_LOG_CHAT_ID, DB_NAME, RUN_MODE, CHAT_ACTIVITY_FLUSH_INTERVAL
+from .core.admin_cache import invalidate_admin_cache
+from .core.webhook import WebhookServer, register_webhook
+from .core.update_processor import ChatOrderedUpdateProcessor
+from .core.tenor import tenor_client
+from .core.rate_limiter import OutboundScheduler
+from .core.chat_liveness import dead_chat_tracker, flush_chat_activity, record_inbound_activity
+from .core.database import init_db, close_db, get_disabled_modules
+from .core.async_database import disable_module, enable_module, checkpoint_db
 from .core.utils import is_owner_or_dev, safe_escape, send_critical_log
 from .core.handlers import get_custom_command_handler, custom_handler
 
@@ -22,7 +30,7 @@ from .modules.chatblacklists import check_blacklisted_chat_on_join
 from .modules.mutes import handle_bot_permission_changes
 from .modules.bans import handle_bot_banned
 from .modules.blacklists import check_blacklist_handler
-from .modules.userlogger import log_user_from_interaction
+from .modules.userlogger import log_user_from_interaction, flush_user_buffer
 from .modules.globalbans import check_gban_on_message, check_gban_on_entry
 from .modules.afk import check_afk_return, afk_reply_handler, afk_brb_handler
 from .modules.notes import handle_note_trigger
@@ -124,7 +132,7 @@ async def disable_module_command(update: Update, context: ContextTypes.DEFAULT_T
         return
 
     module_name = context.args[0]
-    if disable_module(module_name):
+    if await disable_module(module_name):
         await update.message.reply_text(f"✅ Module '<code>{safe_escape(module_name)}</code>' has been disabled.", parse_mode=ParseMode.HTML)
     else:
         await update.message.reply_text(f"Module '<code>{safe_escape(module_name)}</code>' was already disabled or an error occurred.", parse_mode=ParseMode.HTML)
@@ -142,7 +150,7 @@ async def enable_module_command(update: Update, context: ContextTypes.DEFAULT_TY
         return
         
     module_name = context.args[0]
-    if enable_module(module_name):
+    if await enable_module(module_name):
         await update.message.reply_text(f"✅ Module '<code>{safe_escape(module_name)}</code>' has been enabled.", parse_mode=ParseMode.HTML)
     else:
         await update.message.reply_text(f"Module '<code>{safe_escape(module_name)}</code>' was already enabled or an error occurred.", parse_mode=ParseMode.HTML)
@@ -176,6 +184,7 @@ async def backup_db_command(update: Update, context: ContextTypes.DEFAULT_TYPE)
     message = await update.message.reply_text("Performing backup and sending the file...")
 
     try:
+        await checkpoint_db()
         await context.bot.send_document(
             chat_id=OWNER_ID,
             document=open(DB_NAME, 'rb'),
@@ -242,86 +251,134 @@ async def error_handler(update: object, context: ContextTypes.DEFAULT_TYPE) -> N
             logger.critical(f"CRITICAL: Could not send error log with file to {target_id}: {e}")
             await send_critical_log(context, short_message)
 
+def register_core_handlers(application: Application) -> None:
+    """Registers the layered handlers that live outside the module loader."""
+    # --- LAYER 1: TOP PRIORITY - SECURITY AND IGNORANCE ---
+    application.add_handler(ChatMemberHandler(invalidate_admin_cache, ChatMemberHandler.ANY_CHAT_MEMBER), group=-250)
+    application.add_handler(ChatMemberHandler(check_blacklisted_chat_on_join, ChatMemberHandler.MY_CHAT_MEMBER), group=-200)
+    application.add_handler(ChatMemberHandler(handle_bot_permission_changes, ChatMemberHandler.MY_CHAT_MEMBER), group=-100)
+    application.add_handler(ChatMemberHandler(handle_bot_banned, ChatMemberHandler.MY_CHAT_MEMBER), group=-100)
+    application.add_handler(MessageHandler(filters.UpdateType.EDITED_MESSAGE & filters.COMMAND, ignore_edited_commands), group=-50)
+
+    # --- LAYER 2: USER FILTERING - BLACKLISTS - GBANS - JOINFILTER ---
+    application.add_handler(MessageHandler(filters.StatusUpdate.NEW_CHAT_MEMBERS, check_gban_on_entry), group=-20)
+    application.add_handler(MessageHandler(filters.StatusUpdate.NEW_CHAT_MEMBERS, check_new_member), group=-15)
+    application.add_handler(MessageHandler(filters.COMMAND, check_blacklist_handler), group=-10)
+    application.add_handler(MessageHandler(filters.TEXT | filters.COMMAND | filters.Sticker.ALL | filters.PHOTO | filters.VIDEO | filters.VOICE | filters.ANIMATION & filters.ChatType.GROUPS, check_gban_on_message), group=-10)
+
+    # --- LAYER 3: PASSIVE MECHANISMS - AFK ---
+    application.add_handler(MessageHandler(filters.Regex(r'^(brb|BRB|Brb|bRB|brB|BRb|bRb)'), afk_brb_handler), group=-6)
+    application.add_handler(MessageHandler(filters.TEXT | filters.COMMAND | filters.Sticker.ALL | filters.PHOTO | filters.VIDEO | filters.VOICE | filters.ANIMATION, check_afk_return), group=-5)
+    application.add_handler(MessageHandler(filters.TEXT & (~filters.COMMAND) & (filters.REPLY | filters.Entity(constants.MessageEntityType.MENTION) | filters.Entity(constants.MessageEntityType.TEXT_MENTION)), afk_reply_handler), group=-4)
+
+    # --- LAYER 4: MAIN LOGIC - COMMANDS AND INTERACTIONS ---
+    application.add_handler(get_custom_command_handler(), group=-1)
+    application.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, handle_note_trigger), group=0)
+    application.add_handler(MessageHandler(filters.TEXT & (~filters.COMMAND) & filters.ChatType.GROUPS, check_message_for_filters), group=3)
+
+    # --- LAYER 5: GROUP MEMBERS SERVICING ---
+    application.add_handler(MessageHandler(filters.StatusUpdate.NEW_CHAT_MEMBERS, handle_new_group_members), group=5)
+    application.add_handler(MessageHandler(filters.StatusUpdate.LEFT_CHAT_MEMBER, handle_left_group_member), group=5)
+
+    # --- LAYER 6: LOWEST PRIORITY - PASSIVE LOGIN ---
+    application.add_handler(MessageHandler(filters.ALL & (~filters.UpdateType.EDITED_MESSAGE), log_user_from_interaction), group=10)
+    application.add_handler(TypeHandler(Update, record_inbound_activity), group=11)
+
+    # --- LAYER 7: COMMANDS - HANDLERS ---
+    application.add_handler(CommandHandler("disablemodule", disable_module_command))
+    application.add_handler(CommandHandler("enablemodule", enable_module_command))
+    application.add_handler(CommandHandler("listmodules", list_modules_command))
+    application.add_handler(CommandHandler("backupdb", backup_db_command))
+
 async def main() -> None:
+    _cancel_on_sigterm()
     init_db()
 
     async with TelegramClient(SESSION_NAME, API_ID, API_HASH) as telethon_client:
         logger.info("Telethon client started.")
 
         custom_request_settings = HTTPXRequest(connect_timeout=20.0, read_timeout=80.0, write_timeout=80.0, pool_timeout=20.0)
-        
+        outbound_scheduler = OutboundScheduler()
+
         application = (
             ApplicationBuilder()
             .token(BOT_TOKEN)
             .request(custom_request_settings)
             .job_queue(JobQueue())
+            .concurrent_updates(ChatOrderedUpdateProcessor())
+            .rate_limiter(outbound_scheduler)
             .build()
         )
+        outbound_scheduler.on_chat_error = dead_chat_tracker(application)
 
         # --- GLOBAL LAYER: TRACEBACKS - MODULE LOADER ---
         application.add_error_handler(error_handler)
         discover_and_register_handlers(application)
-
-        # --- LAYER 1: TOP PRIORITY - SECURITY AND IGNORANCE ---
-        application.add_handler(ChatMemberHandler(check_blacklisted_chat_on_join, ChatMemberHandler.MY_CHAT_MEMBER), group=-200)
-        application.add_handler(ChatMemberHandler(handle_bot_permission_changes, ChatMemberHandler.MY_CHAT_MEMBER), group=-100)
-        application.add_handler(ChatMemberHandler(handle_bot_banned, ChatMemberHandler.MY_CHAT_MEMBER), group=-100)
-        application.add_handler(MessageHandler(filters.UpdateType.EDITED_MESSAGE & filters.COMMAND, ignore_edited_commands), group=-50)
-
-        # --- LAYER 2: USER FILTERING - BLACKLISTS - GBANS - JOINFILTER ---
-        application.add_handler(MessageHandler(filters.StatusUpdate.NEW_CHAT_MEMBERS, check_gban_on_entry), group=-20)
-        application.add_handler(MessageHandler(filters.StatusUpdate.NEW_CHAT_MEMBERS, check_new_member), group=-15)
-        application.add_handler(MessageHandler(filters.COMMAND, check_blacklist_handler), group=-10)
-        application.add_handler(MessageHandler(filters.TEXT | filters.COMMAND | filters.Sticker.ALL | filters.PHOTO | filters.VIDEO | filters.VOICE | filters.ANIMATION & filters.ChatType.GROUPS, check_gban_on_message), group=-10)
-
-        # --- LAYER 3: PASSIVE MECHANISMS - AFK ---
-        application.add_handler(MessageHandler(filters.Regex(r'^(brb|BRB|Brb|bRB|brB|BRb|bRb)'), afk_brb_handler), group=-6)
-        application.add_handler(MessageHandler(filters.TEXT | filters.COMMAND | filters.Sticker.ALL | filters.PHOTO | filters.VIDEO | filters.VOICE | filters.ANIMATION, check_afk_return), group=-5)
-        application.add_handler(MessageHandler(filters.TEXT & (~filters.COMMAND) & (filters.REPLY | filters.Entity(constants.MessageEntityType.MENTION) | filters.Entity(constants.MessageEntityType.TEXT_MENTION)), afk_reply_handler), group=-4)
-
-        # --- LAYER 4: MAIN LOGIC - COMMANDS AND INTERACTIONS ---
-        application.add_handler(get_custom_command_handler(), group=-1)
-        application.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, handle_note_trigger), group=0)
-        application.add_handler(MessageHandler(filters.TEXT & (~filters.COMMAND) & filters.ChatType.GROUPS, check_message_for_filters), group=3)
-
-        # --- LAYER 5: GROUP MEMBERS SERVICING ---
-        application.add_handler(MessageHandler(filters.StatusUpdate.NEW_CHAT_MEMBERS, handle_new_group_members), group=5)
-        application.add_handler(MessageHandler(filters.StatusUpdate.LEFT_CHAT_MEMBER, handle_left_group_member), group=5)
-
-        # --- LAYER 6: LOWEST PRIORITY - PASSIVE LOGIN ---
-        application.add_handler(MessageHandler(filters.ALL & (~filters.UpdateType.EDITED_MESSAGE), log_user_from_interaction), group=10)
-
-        # --- LAYER 7: COMMANDS - HANDLERS ---
-        application.add_handler(CommandHandler("disablemodule", disable_module_command))
-        application.add_handler(CommandHandler("enablemodule", enable_module_command))
-        application.add_handler(CommandHandler("listmodules", list_modules_command))
-        application.add_handler(CommandHandler("backupdb", backup_db_command))
+        register_core_handlers(application)
 
         application.bot_data["telethon_client"] = telethon_client
         logger.info("Telethon client has been injected into bot_data.")
 
         if application.job_queue:
             application.job_queue.run_once(send_startup_log, when=1)
+            application.job_queue.run_repeating(flush_chat_activity, interval=CHAT_ACTIVITY_FLUSH_INTERVAL, first=CHAT_ACTIVITY_FLUSH_INTERVAL)
             logger.info("Startup message job scheduled to run in 1 second.")
         else:
             logger.warning("JobQueue not available, cannot schedule startup message.")
 
-        logger.info(f"Bot starting polling... Owner ID: {OWNER_ID}")
+        logger.info(f"Bot starting in {RUN_MODE} mode... Owner ID: {OWNER_ID}")
         
         await application.initialize()
         await application.start()
-        await application.updater.start_polling(allowed_updates=Update.ALL_TYPES)
-        await telethon_client.run_until_disconnected()
 
-        await application.updater.stop()
-        await application.stop()
-        logger.info("Bot shutdown process completed.")
+        webhook_server = None
+        try:
+            if RUN_MODE == "webhook":
+                webhook_server = WebhookServer(application)
+                await webhook_server.start()
+                await register_webhook(application)
+            else:
+                await application.updater.start_polling(allowed_updates=Update.ALL_TYPES)
+
+            await telethon_client.run_until_disconnected()
+        finally:
+            await shutdown(application, webhook_server)
+
+async def shutdown(application: Application, webhook_server: WebhookServer | None) -> None:
+    """Stops intake first, then flushes buffered writes and closes the DB. Runs on signals too."""
+    steps = []
+    if webhook_server:
+        steps.append(("webhook server", webhook_server.stop))
+    elif application.updater and application.updater.running:
+        steps.append(("updater", application.updater.stop))
+    if application.running:
+        steps.append(("application", application.stop))
+    steps += [
+        ("application shutdown", application.shutdown),
+        ("Tenor client", tenor_client.close),
+        ("user buffer", flush_user_buffer),
+        ("chat activity buffer", flush_chat_activity),
+    ]
+    for name, step in steps:
+        try:
+            await step()
+        except Exception as e:
+            logger.error(f"Error while stopping {name}: {e}", exc_info=True)
+    close_db()
+    logger.info("Bot shutdown process completed.")
 
+def _cancel_on_sigterm() -> None:
+    """Lets SIGTERM unwind main() like Ctrl-C does, so shutdown() still runs."""
+    task = asyncio.current_task()
+    try:
+        asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, task.cancel)
+    except (NotImplementedError, RuntimeError):
+        pass
 
 if __name__ == "__main__":
     try:
         asyncio.run(main())
-    except (KeyboardInterrupt, SystemExit):
+    except (KeyboardInterrupt, SystemExit, asyncio.CancelledError):
         logger.info("Bot stopped by user.")
     except Exception as e:
         logger.critical(f"Bot crashed unexpectedly at top level: {e}", exc_info=True)
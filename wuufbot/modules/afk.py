@@ -5,7 +5,8 @@ from telegram.constants import ChatMemberStatus
 from telegram.error import TelegramError
 from telegram.ext import Application, CommandHandler, MessageHandler, filters, ContextTypes, ApplicationHandlerStop
 
-from ..core.database import set_afk, get_afk_status, clear_afk, get_user_from_db_by_username
+from ..core.database import get_afk_status, has_afk_users
+from ..core.async_database import set_afk, clear_afk, get_user_from_db_by_username
 from ..core.utils import send_safe_reply, get_readable_time_delta, create_user_html_link, safe_escape
 from ..core.decorators import check_module_enabled, command_control
 from ..core.handlers import custom_handler
@@ -29,7 +30,7 @@ async def afk_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> Non
 
     reason = " ".join(context.args) if context.args else "No reason"
     user_display_name = safe_escape(user.full_name or user.first_name)
-    if set_afk(user.id, reason):
+    if await set_afk(user.id, reason):
         await message.reply_html(f"{user_display_name} is now AFK!\n<b>Reason:</b> {safe_escape(reason)}")
     else:
         await message.reply_text("Could not set AFK status due to a database error.")
@@ -52,7 +53,7 @@ async def afk_brb_handler(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
         parts = message.text.split(' ', 1)
         reason = parts[1] if len(parts) > 1 else "No reason"
         user_display_name = safe_escape(user.full_name or user.first_name)
-        if set_afk(user.id, reason):
+        if await set_afk(user.id, reason):
             await message.reply_html(f"{user_display_name} is now AFK!\n<b>Reason:</b> {safe_escape(reason)}")
             
             raise ApplicationHandlerStop
@@ -69,7 +70,7 @@ async def check_afk_return(update: Update, context: ContextTypes.DEFAULT_TYPE) -
 
     afk_status = get_afk_status(user.id)
     if afk_status:
-        clear_afk(user.id)
+        await clear_afk(user.id)
         user_display_name = safe_escape(user.full_name or user.first_name)
         afk_since_str = afk_status[1]
         try:
@@ -87,7 +88,7 @@ async def check_afk_return(update: Update, context: ContextTypes.DEFAULT_TYPE) -
 async def afk_reply_handler(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     message = update.effective_message
     chat = update.effective_chat
-    if not message:
+    if not message or not has_afk_users():
         return
     
     users_to_check = set()
@@ -101,7 +102,7 @@ async def afk_reply_handler(update: Update, context: ContextTypes.DEFAULT_TYPE)
                 users_to_check.add(entity.user.id)
             elif entity.type == constants.MessageEntityType.MENTION:
                 username = message.text[entity.offset:entity.offset + entity.length]
-                mentioned_user = get_user_from_db_by_username(username)
+                mentioned_user = await get_user_from_db_by_username(username)
                 if mentioned_user:
                     users_to_check.add(mentioned_user.id)
 
@@ -1,18 +1,103 @@
 import logging
 import asyncio
-from telegram import Update
+import time
+from telegram import Update, Message
 from telegram.constants import ParseMode
-from telegram.error import BadRequest
+from telegram.error import BadRequest, TelegramError
 from telegram.ext import Application, CommandHandler, ContextTypes
 
-from ..config import GEMINI_API_KEY, OWNER_ID, PUBLIC_AI_ENABLED
-from ..core.utils import is_privileged_user, is_owner_or_dev, markdown_to_html, get_gemini_response
+from ..config import GEMINI_API_KEY, OWNER_ID, PUBLIC_AI_ENABLED, AI_STREAM_RESPONSES, AI_STREAM_EDIT_INTERVAL
+from ..core.utils import is_privileged_user, is_owner_or_dev, markdown_to_html, get_gemini_response, stream_gemini_response, safe_escape
 from ..core.decorators import check_module_enabled, command_control
 from ..core.handlers import custom_handler
 
 logger = logging.getLogger(__name__)
 
 
+MAX_MESSAGE_LENGTH = 4096
+STREAM_CURSOR = " ▌"
+STREAM_INTERRUPTED_NOTE = "(response interrupted)"
+
+
+# --- STREAMED REPLIES ---
+async def _edit_status(status_message: Message, text: str, parse_mode: str | None = ParseMode.HTML) -> None:
+    try:
+        await status_message.edit_text(text, parse_mode=parse_mode, disable_web_page_preview=True)
+    except BadRequest as e:
+        if "not modified" not in str(e).lower():
+            raise
+
+async def _send_chunks(update: Update, context: ContextTypes.DEFAULT_TYPE, status_message: Message, text: str, parse_mode: str | None) -> None:
+    """Replaces the status message with the first chunk and sends the rest as follow-ups."""
+    chunks = [text[i:i + MAX_MESSAGE_LENGTH] for i in range(0, len(text), MAX_MESSAGE_LENGTH)]
+    await _edit_status(status_message, chunks[0], parse_mode)
+    for chunk in chunks[1:]:
+        await asyncio.sleep(0.5)
+        await context.bot.send_message(
+            chat_id=update.effective_chat.id,
+            text=chunk,
+            parse_mode=parse_mode,
+            disable_web_page_preview=True
+        )
+
+async def _stream_ai_reply(update: Update, context: ContextTypes.DEFAULT_TYPE, status_message: Message, prompt: str) -> None:
+    """
+    Edits the "Thinking..." message as Gemini streams its answer. Previews are
+    escaped plain text, because half-finished markdown does not convert to valid
+    HTML. The first preview is shown as soon as it arrives, and later ones at most
+    every AI_STREAM_EDIT_INTERVAL seconds to stay within Telegram's edit limits.
+    An answer cut off by a stream error is sent with a visible interruption note.
+    """
+    response_markdown = ""
+    shown_preview = ""
+    last_edit = 0.0
+    interrupted = False
+
+    stream = stream_gemini_response(prompt)
+    while True:
+        try:
+            piece = await anext(stream)
+        except StopAsyncIteration:
+            break
+        except Exception as e:
+            logger.error(f"Error streaming Gemini response: {e}", exc_info=True)
+            if not response_markdown:
+                await _edit_status(status_message, f"💥 Houston, we have a problem! My AI core malfunctioned: {type(e).__name__}", None)
+                return
+            interrupted = True
+            break
+
+        response_markdown += piece
+        now = time.monotonic()
+        if now - last_edit < AI_STREAM_EDIT_INTERVAL or len(response_markdown) > MAX_MESSAGE_LENGTH:
+            continue
+        preview = safe_escape(response_markdown) + STREAM_CURSOR
+        if len(preview) <= MAX_MESSAGE_LENGTH and preview != shown_preview:
+            last_edit = now
+            # A failed preview only costs one update; generation carries on.
+            try:
+                await _edit_status(status_message, preview)
+                shown_preview = preview
+            except TelegramError as e:
+                logger.warning(f"Could not update AI stream preview: {e}")
+
+    if not response_markdown.strip():
+        await _edit_status(status_message, "🤷 The AI returned an empty response.", None)
+        return
+
+    html_text = markdown_to_html(response_markdown)
+    plain_text = response_markdown
+    if interrupted:
+        html_text += f"\n\n<i>{STREAM_INTERRUPTED_NOTE}</i>"
+        plain_text += f"\n\n{STREAM_INTERRUPTED_NOTE}"
+
+    try:
+        await _send_chunks(update, context, status_message, html_text, ParseMode.HTML)
+    except BadRequest as e:
+        logger.warning(f"HTML parsing failed for AI response: {e}. Sending as plain text.")
+        await _send_chunks(update, context, status_message, plain_text, None)
+
+
 # --- AI COMMAND FUNCTIONS ---
 @check_module_enabled("ai")
 @custom_handler("setai")
@@ -71,6 +156,14 @@ async def ask_ai_command(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
     prompt = " ".join(context.args)
     
     status_message = await update.message.reply_html("🤔 <code>Thinking...</code>")
+
+    if AI_STREAM_RESPONSES:
+        try:
+            await _stream_ai_reply(update, context, status_message, prompt)
+        except Exception as e:
+            logger.error(f"Failed to process /askai request: {e}", exc_info=True)
+            await update.message.reply_text(f"💥 Houston, we have a problem! My AI core malfunctioned: {type(e).__name__}")
+        return
     
     try:
         ai_response_markdown = await get_gemini_response(prompt)
@@ -81,7 +174,6 @@ async def ask_ai_command(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
         except Exception as delete_error:
             logger.warning(f"Could not delete 'Thinking...' message: {delete_error}")
 
-        MAX_MESSAGE_LENGTH = 4096
         chunks = [ai_response_html[i:i + MAX_MESSAGE_LENGTH] for i in range(0, len(ai_response_html), MAX_MESSAGE_LENGTH)]
         
         if chunks:
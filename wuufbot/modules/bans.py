@@ -5,8 +5,9 @@ from telegram.constants import ChatType, ChatMemberStatus, ParseMode
 from telegram.error import TelegramError
 from telegram.ext import Application, CommandHandler, ContextTypes, ChatMemberHandler
 
-from ..core.database import remove_chat_from_db
+from ..core.async_database import remove_chat_from_db, record_ban, remove_ban_records
 from ..core.utils import _can_user_perform_action, resolve_user_with_telethon, parse_duration_to_timedelta, create_user_html_link, send_safe_reply, safe_escape, is_entity_a_user
+from ..core.admin_cache import is_chat_admin
 from ..core.decorators import check_module_enabled
 from ..core.handlers import custom_handler
 
@@ -80,8 +81,7 @@ async def ban_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> Non
 
     if is_entity_a_user(target_entity):
         try:
-            member = await context.bot.get_chat_member(chat.id, target_entity.id)
-            if member.status in [ChatMemberStatus.ADMINISTRATOR, ChatMemberStatus.OWNER]:
+            if await is_chat_admin(context, chat.id, target_entity.id):
                 await send_safe_reply(update, context, text="Chat Creator and Administrators cannot be banned.")
                 return
         except TelegramError: pass
@@ -94,6 +94,7 @@ async def ban_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> Non
 
     try:
         await context.bot.ban_chat_member(chat_id=chat.id, user_id=target_entity.id, until_date=until_date_for_api)
+        await record_ban(target_entity.id, chat.id, "ban", until_date_for_api)
         display_name = create_user_html_link(target_entity)
         entity_type_str = "User"
         banned = True
@@ -149,8 +150,7 @@ async def dban_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> No
 
     if is_entity_a_user(target_entity):
         try:
-            member = await chat.get_member(target_entity.id)
-            if member.status in [ChatMemberStatus.ADMINISTRATOR, ChatMemberStatus.OWNER]:
+            if await is_chat_admin(context, chat.id, target_entity.id):
                 await send_safe_reply(update, context, text="Chat Creator and Administrators cannot be banned.")
                 return
         except TelegramError: pass
@@ -163,6 +163,7 @@ async def dban_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> No
 
         try:
             await context.bot.ban_chat_member(chat_id=chat.id, user_id=target_entity.id)
+            await record_ban(target_entity.id, chat.id, "dban")
             display_name = create_user_html_link(target_entity)
             entity_type_str = "User"
         except (TelegramError, ValueError):
@@ -245,14 +246,14 @@ async def tban_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> No
         await send_safe_reply(update, context, text="Nuh uh... You can't tban yourself."); return
 
     try:
-        member = await context.bot.get_chat_member(chat.id, target_entity.id)
-        if member.status in [ChatMemberStatus.ADMINISTRATOR, ChatMemberStatus.OWNER]:
+        if await is_chat_admin(context, chat.id, target_entity.id):
             await send_safe_reply(update, context, text="Chat admins and creators cannot be banned.")
             return
     except TelegramError: pass
 
     try:
         await context.bot.ban_chat_member(chat_id=chat.id, user_id=target_entity.id, until_date=until_date_for_api)
+        await record_ban(target_entity.id, chat.id, "tban", until_date_for_api)
         
         display_name = create_user_html_link(target_entity)
         response_lines = ["Success: User Banned"]
@@ -305,6 +306,7 @@ async def unban_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> N
 
     try:
         await context.bot.unban_chat_member(chat_id=chat.id, user_id=target_entity.id, only_if_banned=True)
+        await remove_ban_records(target_entity.id, [chat.id])
         display_name = create_user_html_link(target_entity)
         entity_type_str = "User"
         unbanned = True
@@ -334,7 +336,7 @@ async def handle_bot_banned(update: Update, context: ContextTypes.DEFAULT_TYPE)
         
         chat = update_data.chat
         logger.warning(f"Bot was banned from chat {chat.title} [{chat.id}]. Removing from DB.")
-        remove_chat_from_db(chat.id)
+        await remove_chat_from_db(chat.id)
 
 
 # --- HANDLER LOADER ---
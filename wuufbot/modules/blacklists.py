@@ -6,7 +6,8 @@ from telegram.constants import ParseMode, ChatType
 from telegram.ext import Application, CommandHandler, MessageHandler, filters, ContextTypes, ApplicationHandlerStop
 
 from ..config import OWNER_ID, APPEAL_CHAT_ID
-from ..core.database import add_to_blacklist, remove_from_blacklist, get_blacklist_reason, is_user_blacklisted, is_whitelisted, is_sudo_user 
+from ..core.database import is_sudo_user, is_user_blacklisted, is_whitelisted
+from ..core.async_database import add_to_blacklist, remove_from_blacklist, get_blacklist_reason
 from ..core.utils import is_privileged_user, is_owner_or_dev, resolve_user_with_telethon, create_user_html_link, safe_escape, send_operational_log, is_entity_a_user
 from ..core.decorators import check_module_enabled
 from ..core.handlers import custom_handler
@@ -70,7 +71,7 @@ async def blacklist_user_command(update: Update, context: ContextTypes.DEFAULT_T
 
     user_display = create_user_html_link(target_entity)
 
-    existing_blist_reason = get_blacklist_reason(target_entity.id)
+    existing_blist_reason = await get_blacklist_reason(target_entity.id)
     if existing_blist_reason:
         await message.reply_html(
             f"ℹ️ User {user_display} [<code>{target_entity.id}</code>] is already <b>blacklisted</b>.\n"
@@ -82,7 +83,7 @@ async def blacklist_user_command(update: Update, context: ContextTypes.DEFAULT_T
     await message.reply_html(prepare_message)
     await asyncio.sleep(1.0)
 
-    if add_to_blacklist(target_entity.id, user.id, reason):
+    if await add_to_blacklist(target_entity.id, user.id, reason):
         success_message = f"✅ Done! {user_display} [<code>{target_entity.id}</code>] has been <b>blacklisted</b>.\n<b>Reason:</b> {safe_escape(reason)}"
         await message.reply_html(success_message)
         
@@ -149,7 +150,7 @@ async def unblacklist_user_command(update: Update, context: ContextTypes.DEFAULT
     await message.reply_html(prepare_message)
     await asyncio.sleep(1.0)
 
-    if remove_from_blacklist(target_entity.id):
+    if await remove_from_blacklist(target_entity.id):
         success_message = f"✅ Done! {user_display} [<code>{target_entity.id}</code>] has been <b>unblacklisted</b>."
         await message.reply_html(success_message)
         
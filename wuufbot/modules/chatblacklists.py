@@ -5,7 +5,7 @@ from telegram.ext import Application, CommandHandler, ChatMemberHandler, Context
 from telegram.constants import ParseMode, ChatType
 from telegram.error import TelegramError
 
-from ..core.database import blacklist_chat, unblacklist_chat, get_blacklisted_chats, is_chat_blacklisted, remove_chat_from_db
+from ..core.async_database import blacklist_chat, unblacklist_chat, get_blacklisted_chats, is_chat_blacklisted, remove_chat_from_db
 from ..core.utils import is_owner_or_dev, safe_escape
 from ..core.decorators import check_module_enabled
 from ..core.handlers import custom_handler
@@ -22,11 +22,11 @@ async def check_blacklisted_chat_on_join(update: Update, context: ContextTypes.D
     
     was_added = new_member_status.status in ["member", "administrator"]
 
-    if was_added and is_chat_blacklisted(chat.id):
+    if was_added and await is_chat_blacklisted(chat.id):
         logger.warning(f"Bot was added to a blacklisted chat: {chat.title} ({chat.id}). Leaving immediately.")
         try:
             await context.bot.leave_chat(chat.id)
-            remove_chat_from_db(chat.id)
+            await remove_chat_from_db(chat.id)
         except Exception as e:
             logger.error(f"Failed to leave blacklisted chat {chat.id}: {e}")
 
@@ -60,7 +60,7 @@ async def blacklist_chat_command(update: Update, context: ContextTypes.DEFAULT_T
     chat_id = chat_to_bl.id
     chat_name = chat_to_bl.title or chat_to_bl.first_name or f"Unknown Chat"
 
-    if blacklist_chat(chat_id, chat_name):
+    if await blacklist_chat(chat_id, chat_name):
         await update.message.reply_html(f"✅ Done! Chat <code>{chat_id}</code> has been blacklisted.")
         try:
             await context.bot.leave_chat(chat_id)
@@ -86,7 +86,7 @@ async def unblacklist_chat_command(update: Update, context: ContextTypes.DEFAULT
             await update.message.reply_text("Invalid chat ID.")
             return
 
-    if unblacklist_chat(chat_id_to_unbl):
+    if await unblacklist_chat(chat_id_to_unbl):
         await update.message.reply_html(f"✅ Done! Chat <code>{chat_id_to_unbl}</code> has been unblacklisted.")
     else:
         await update.message.reply_html("This chat was not on the blacklist.")
@@ -99,7 +99,7 @@ async def list_blacklisted_chats_command(update: Update, context: ContextTypes.D
       logger.warning(f"Unauthorized /blchats attempt by user {user.id}.")
       return
 
-    blacklisted = get_blacklisted_chats()
+    blacklisted = await get_blacklisted_chats()
     if not blacklisted:
         await update.message.reply_text("No chats are currently blacklisted.")
         return
@@ -15,21 +15,26 @@ from telegram.constants import ParseMode, ChatType, ChatMemberStatus
 from telegram.error import TelegramError
 from telegram.ext import Application, CommandHandler, ContextTypes
 
-from ..config import BOT_START_TIME, DB_NAME, OWNER_ID, ADMIN_LOG_CHAT_ID
-from ..core.database import (
+from ..config import BOT_START_TIME, OWNER_ID, ADMIN_LOG_CHAT_ID, CHAT_SWEEP_INTERVAL
+from ..core.database import is_dev_user, is_sudo_user, is_support_user, is_whitelisted
+from ..core.async_database import (
     get_all_bot_chats_from_db, remove_chat_from_db_by_id,
     get_all_dev_users_from_db, add_dev_user, remove_dev_user,
     get_all_sudo_users_from_db, add_sudo_user, remove_sudo_user,
     get_all_support_users_from_db, add_support_user, remove_support_user,
     get_all_whitelist_users_from_db, add_to_whitelist, remove_from_whitelist,
-    is_dev_user, is_sudo_user, is_support_user,
-    is_whitelisted, get_gban_reason, get_blacklist_reason,
-    get_user_from_db_by_username, delete_user_from_db
+    get_gban_reason, get_blacklist_reason,
+    get_user_from_db_by_username, delete_user_from_db, get_table_counts,
+    create_broadcast, set_broadcast_status_message, get_recent_chat_sweeps, count_live_bot_chats
 )
 from ..core.utils import (
     is_owner_or_dev, get_readable_time_delta, safe_escape, resolve_user_with_telethon,
     create_user_html_link, send_operational_log, is_privileged_user, run_speed_test_async, is_entity_a_user
 )
+from ..core.admin_cache import get_bot_member
+from ..core.broadcast import start_broadcast, cancel_broadcast, get_running_broadcast_jobs, resume_broadcasts
+from ..core.chat_sweeper import start_chat_sweep, get_current_sweep, run_scheduled_chat_sweep
+from ..core.rate_limiter import OutboundScheduler
 from ..core.constants import LEAVE_TEXTS
 from ..core.decorators import check_module_enabled
 from ..core.handlers import custom_handler
@@ -108,51 +113,19 @@ async def stats_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> N
         logger.warning(f"Unauthorized /stats attempt by user {user.id}.")
         return
 
-    known_users_count = "N/A"
-    blacklisted_count = "N/A"
-    developer_users_count = "N/A"
-    sudo_users_count = "N/A"
-    support_users_count = "N/A"
-    whitelist_users_count = "N/A"
-    blacklisted_chats_count = "N/A"
-    gban_count = "N/A"
-    chat_count = "N/A"
+    counts = await get_table_counts()
+    default_count = "N/A" if counts is not None else "DB Error"
+    counts = counts or {}
 
-    try:
-        with sqlite3.connect(DB_NAME) as conn:
-            cursor = conn.cursor()
-            
-            cursor.execute("SELECT COUNT(*) FROM users")
-            known_users_count = str(cursor.fetchone()[0])
-
-            cursor.execute("SELECT COUNT(*) FROM blacklist")
-            blacklisted_count = str(cursor.fetchone()[0])
-
-            cursor.execute("SELECT COUNT(*) FROM dev_users")
-            developer_users_count = str(cursor.fetchone()[0])
-                
-            cursor.execute("SELECT COUNT(*) FROM sudo_users")
-            sudo_users_count = str(cursor.fetchone()[0])
-
-            cursor.execute("SELECT COUNT(*) FROM support_users")
-            support_users_count = str(cursor.fetchone()[0])
-
-            cursor.execute("SELECT COUNT(*) FROM whitelist_users")
-            whitelist_users_count = str(cursor.fetchone()[0])
-
-            cursor.execute("SELECT COUNT(*) FROM chat_blacklist")
-            blacklisted_chats_count = str(cursor.fetchone()[0])
-
-            cursor.execute("SELECT COUNT(*) FROM global_bans")
-            gban_count = str(cursor.fetchone()[0])
-                
-            cursor.execute("SELECT COUNT(*) FROM bot_chats")
-            chat_count = str(cursor.fetchone()[0])
-            
-    except sqlite3.Error as e:
-        logger.error(f"SQLite error fetching counts for /stats: {e}", exc_info=True)
-        (known_users_count, blacklisted_count, developer_users_count, sudo_users_count, 
-         support_users_count, whitelist_users_count, blacklisted_chats_count, gban_count, chat_count) = ("DB Error",) * 7
+    known_users_count = str(counts.get("users", default_count))
+    blacklisted_count = str(counts.get("blacklist", default_count))
+    developer_users_count = str(counts.get("dev_users", default_count))
+    sudo_users_count = str(counts.get("sudo_users", default_count))
+    support_users_count = str(counts.get("support_users", default_count))
+    whitelist_users_count = str(counts.get("whitelist_users", default_count))
+    blacklisted_chats_count = str(counts.get("chat_blacklist", default_count))
+    gban_count = str(counts.get("global_bans", default_count))
+    chat_count = str(counts.get("bot_chats", default_count))
 
     stats_lines = [
         "<b>📊 Bot Database Stats:</b>\n",
@@ -167,6 +140,17 @@ async def stats_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> N
         f"<b>• 🌍 Globally Banned Users:</b> <code>{gban_count}</code>"
     ]
 
+    scheduler = context.bot.rate_limiter
+    if isinstance(scheduler, OutboundScheduler):
+        outbound = scheduler.stats()
+        queued = ", ".join(f"{name} {depth}" for name, depth in outbound["queued_by_priority"].items())
+        stats_lines += [
+            "\n<b>📤 Outbound Queue:</b>\n",
+            f"<b>• Queued:</b> <code>{outbound['queued']}</code> ({queued})",
+            f"<b>• API calls:</b> <code>{outbound['granted']}</code> (429 retries: <code>{outbound['retries']}</code>)",
+            f"<b>• Wait avg/p95/max:</b> <code>{outbound['wait_avg_ms']:.0f} / {outbound['wait_p95_ms']:.0f} / {outbound['wait_max_ms']:.0f} ms</code>",
+        ]
+
     stats_msg = "\n".join(stats_lines)
     await update.message.reply_html(stats_msg)
 
@@ -205,7 +189,7 @@ async def permissions_command(update: Update, context: ContextTypes.DEFAULT_TYPE
         return
 
     try:
-        bot_member = await context.bot.get_chat_member(chat.id, context.bot.id)
+        bot_member = await get_bot_member(context, chat.id)
     except Exception as e:
         await message.reply_text(f"Could not fetch my own permissions. Error: {safe_escape(str(e))}")
         return
@@ -539,7 +523,7 @@ async def list_sudo_users_command(update: Update, context: ContextTypes.DEFAULT_
         logger.warning(f"Unauthorized /listsudo attempt by user {user.id}.")
         return
 
-    sudo_user_tuples = get_all_sudo_users_from_db()
+    sudo_user_tuples = await get_all_sudo_users_from_db()
 
     if not sudo_user_tuples:
         await update.message.reply_text("There are currently no users with sudo privileges.")
@@ -560,7 +544,7 @@ async def list_sudo_users_command(update: Update, context: ContextTypes.DEFAULT_
             if name_parts:
                 user_display_name = " ".join(name_parts) + f" [<code>{user_id}</code>]"
         except Exception:
-            user_obj_from_db = get_user_from_db_by_username(str(user_id))
+            user_obj_from_db = await get_user_from_db_by_username(str(user_id))
             if user_obj_from_db:
                 display_name_parts = []
                 if user_obj_from_db.first_name: display_name_parts.append(safe_escape(user_obj_from_db.first_name))
@@ -594,7 +578,7 @@ async def listsupport_command(update: Update, context: ContextTypes.DEFAULT_TYPE
         logger.warning(f"Unauthorized /listsupport attempt by user {user.id}.")
         return
 
-    support_user_tuples = get_all_support_users_from_db()
+    support_user_tuples = await get_all_support_users_from_db()
 
     if not support_user_tuples:
         await update.message.reply_text("There are currently no users in the Support team.")
@@ -615,7 +599,7 @@ async def listsupport_command(update: Update, context: ContextTypes.DEFAULT_TYPE
             if name_parts:
                 user_display_name = " ".join(name_parts) + f" [<code>{user_id}</code>]"
         except Exception:
-            user_obj_from_db = get_user_from_db_by_username(str(user_id))
+            user_obj_from_db = await get_user_from_db_by_username(str(user_id))
             if user_obj_from_db:
                 display_name_parts = []
                 if user_obj_from_db.first_name: display_name_parts.append(safe_escape(user_obj_from_db.first_name))
@@ -644,7 +628,7 @@ async def listwhitelist_command(update: Update, context: ContextTypes.DEFAULT_TY
         logger.warning(f"Unauthorized /listwhitelist attempt by user {user.id}.")
         return
 
-    whitelist_user_tuples = get_all_whitelist_users_from_db()
+    whitelist_user_tuples = await get_all_whitelist_users_from_db()
 
     if not whitelist_user_tuples:
         await update.message.reply_text("There are currently no users in the Whitelist.")
@@ -665,7 +649,7 @@ async def listwhitelist_command(update: Update, context: ContextTypes.DEFAULT_TY
             if name_parts:
                 user_display_name = " ".join(name_parts) + f" [<code>{user_id}</code>]"
         except Exception:
-            user_obj_from_db = get_user_from_db_by_username(str(user_id))
+            user_obj_from_db = await get_user_from_db_by_username(str(user_id))
             if user_obj_from_db:
                 display_name_parts = []
                 if user_obj_from_db.first_name: display_name_parts.append(safe_escape(user_obj_from_db.first_name))
@@ -693,7 +677,7 @@ async def listdevs_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -
     if not is_owner_or_dev(user.id):
         return
 
-    dev_user_tuples = get_all_dev_users_from_db()
+    dev_user_tuples = await get_all_dev_users_from_db()
 
     if not dev_user_tuples:
         await update.message.reply_text("There are currently no users with Developer role.")
@@ -714,7 +698,7 @@ async def listdevs_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -
             if name_parts:
                 user_display_name = " ".join(name_parts) + f" [<code>{user_id}</code>]"
         except Exception:
-            user_obj_from_db = get_user_from_db_by_username(str(user_id))
+            user_obj_from_db = await get_user_from_db_by_username(str(user_id))
             if user_obj_from_db:
                 display_name_parts = []
                 if user_obj_from_db.first_name: display_name_parts.append(safe_escape(user_obj_from_db.first_name))
@@ -743,7 +727,7 @@ async def list_groups_command(update: Update, context: ContextTypes.DEFAULT_TYPE
         logger.warning(f"Unauthorized /listgroups attempt by user {user.id}.")
         return
 
-    bot_chats = get_all_bot_chats_from_db()
+    bot_chats = await get_all_bot_chats_from_db()
 
     if not bot_chats:
         await update.message.reply_text("The bot is not currently in any known groups.")
@@ -793,7 +777,7 @@ async def del_groups_command(update: Update, context: ContextTypes.DEFAULT_TYPE)
     for chat_id_str in context.args:
         try:
             chat_id_to_delete = int(chat_id_str)
-            if remove_chat_from_db_by_id(chat_id_to_delete):
+            if await remove_chat_from_db_by_id(chat_id_to_delete):
                 deleted_chats.append(f"<code>{chat_id_to_delete}</code>")
             else:
                 failed_chats.append(f"<code>{chat_id_to_delete}</code> (not found)")
@@ -824,56 +808,54 @@ async def clean_groups_command(update: Update, context: ContextTypes.DEFAULT_TYP
         logger.warning(f"Unauthorized /cleangroups attempt by user {user.id}.")
         return
 
-    status_message = await update.message.reply_html("🧹 Starting group cache cleanup... This may take a while. Please wait.")
+    action = context.args[0].lower() if context.args else None
+    current = get_current_sweep()
 
-    all_chat_ids_from_db = [chat[0] for chat in get_all_bot_chats_from_db()]
-    
-    if not all_chat_ids_from_db:
-        await status_message.edit_text("✅ Chat cache is already empty. Nothing to do.")
+    if action == "status":
+        lines = ["🧹 <b>Chat cleanup status</b>\n"]
+        if current:
+            lines.append(
+                f"<b>Running:</b> <code>#{current.id}</code> — checked <code>{current.checked}/{current.total}</code>, "
+                f"removed <code>{current.removed}</code>\n"
+            )
+        sweeps = await get_recent_chat_sweeps()
+        if not sweeps:
+            lines.append("No cleanup has run yet.")
+        for sweep in sweeps:
+            started = datetime.fromisoformat(sweep["started_at"]).strftime("%Y-%m-%d %H:%M UTC")
+            lines.append(
+                f"<code>#{sweep['id']}</code> {sweep['trigger']}, {started}: <b>{sweep['state']}</b> — "
+                f"checked <code>{sweep['checked']}/{sweep['total']}</code>, removed <code>{sweep['removed']}</code>, "
+                f"errors <code>{sweep['errors']}</code>"
+            )
+        await update.message.reply_html("\n".join(lines))
         return
 
-    logger.info(f"Starting cleanup for {len(all_chat_ids_from_db)} chats...")
-    
-    removed_chats_count = 0
-    checked_chats_count = 0
-    
-    chunk_size = 50 
-    for i in range(0, len(all_chat_ids_from_db), chunk_size):
-        chunk = all_chat_ids_from_db[i:i + chunk_size]
-        
-        status_text = (
-            f"🧹 Checking chats <code>{checked_chats_count+1}-{checked_chats_count+len(chunk)} / {len(all_chat_ids_from_db)}</code>\n"
-            f"🗑️ Removed so far: <code>{removed_chats_count}</code>"
+    if action in ("cancel", "stop"):
+        if current:
+            current.cancelled = True
+            await update.message.reply_html(f"🛑 Stopping cleanup <code>#{current.id}</code> after the current batch.")
+        else:
+            await update.message.reply_text("No cleanup is running.")
+        return
+
+    if current:
+        await update.message.reply_html(
+            f"Cleanup <code>#{current.id}</code> is already running ({current.checked}/{current.total}). "
+            f"Use <code>/cleangroups status</code> to follow it."
         )
-        try:
-            await status_message.edit_text(status_text, parse_mode=ParseMode.HTML)
-        except Exception as e:
-            logger.warning(f"Could not edit status message: {e}")
+        return
 
-        for chat_id in chunk:
-            try:
-                await context.bot.get_chat(chat_id)
-            except TelegramError as e:
-                if "not found" in str(e).lower() or "forbidden" in str(e).lower() or "chat not found" in str(e).lower():
-                    logger.info(f"Chat {chat_id} not found or access is forbidden. Removing from cache.")
-                    if remove_chat_from_db_by_id(chat_id):
-                        removed_chats_count += 1
-                else:
-                    logger.warning(f"Unexpected API error while checking chat {chat_id}: {e}")
-            
-            checked_chats_count += 1
-            await asyncio.sleep(0.2)
+    sweep = await start_chat_sweep(context.application, f"manual by {user.id}")
+    if not sweep:
+        await update.message.reply_text("✅ Chat cache is already empty. Nothing to do.")
+        return
 
-    final_report = (
-        f"✅ <b>Cleanup complete!</b>\n\n"
-        f"• Checked: <code>{checked_chats_count}</code> chats\n"
-        f"• Removed: <code>{removed_chats_count}</code> inactive/invalid entries"
+    status_message = await update.message.reply_html(
+        f"🧹 Started cleanup <code>#{sweep.id}</code> of <code>{sweep.total}</code> chats in the background.\n"
+        f"Use <code>/cleangroups status</code> or <code>/cleangroups cancel</code>."
     )
-    
-    try:
-        await status_message.edit_text(final_report, parse_mode=ParseMode.HTML)
-    except Exception as e:
-        logger.error(f"Could not edit final report message: {e}")
+    sweep.status_chat_id, sweep.status_message_id = status_message.chat_id, status_message.message_id
 
 @check_module_enabled("core")
 @custom_handler("broadcast")
@@ -886,51 +868,66 @@ async def broadcast_command(update: Update, context: ContextTypes.DEFAULT_TYPE)
         logger.warning(f"Unauthorized /broadcast attempt by user {user.id}.")
         return
 
-    if not context.args:
-        await message.reply_text("Usage: /broadcast <message to send>")
+    source = message.reply_to_message
+    if not context.args and not source:
+        await message.reply_text(
+            "Usage: /broadcast <message to send>\n"
+            "Or reply to a message with /broadcast to copy it to every chat.\n"
+            "/broadcastcancel [id] stops a running broadcast."
+        )
         return
 
-    text_to_broadcast = " ".join(context.args)
+    running = get_running_broadcast_jobs()
+    if running:
+        await message.reply_html(
+            f"Broadcast <code>#{running[0].id}</code> is still running ({running[0].processed}/{running[0].total}). "
+            f"Use <code>/broadcastcancel</code> to stop it first."
+        )
+        return
 
-    all_chats = get_all_bot_chats_from_db()
-    if not all_chats:
+    total = await count_live_bot_chats()
+    if not total:
         await message.reply_text("I'm not in any chats to broadcast to.")
         return
 
+    if source:
+        broadcast_id = await create_broadcast(user.id, None, source.chat_id, source.message_id, total)
+    else:
+        broadcast_id = await create_broadcast(user.id, " ".join(context.args), None, None, total)
+    if broadcast_id is None:
+        await message.reply_text("Could not start the broadcast, check the logs.")
+        return
+
     status_message = await message.reply_html(
-        f"📢 Starting broadcast to <code>{len(all_chats)}</code> chats..."
+        f"📢 Starting broadcast <code>#{broadcast_id}</code> to <code>{total}</code> chats..."
     )
+    await set_broadcast_status_message(broadcast_id, status_message.chat_id, status_message.message_id)
+    await start_broadcast(context.application, broadcast_id)
 
-    sent_count = 0
-    failed_count = 0
-    
-    for chat_id, chat_title, _ in all_chats:
-        try:
-            await context.bot.send_message(chat_id=chat_id, text=text_to_broadcast)
-            sent_count += 1
-            logger.info(f"Broadcast sent to: {chat_title} ({chat_id})")
-        except Exception as e:
-            failed_count += 1
-            logger.error(f"Failed to send broadcast to {chat_title} ({chat_id}): {e}")
-            if isinstance(e, (telegram.error.Forbidden, telegram.error.BadRequest)):
-                if "forbidden" in str(e).lower() or "bot is not a member" in str(e).lower() or "chat not found" in str(e).lower():
-                    remove_chat_from_db(chat_id)
-        
-        await asyncio.sleep(0.2)
+@check_module_enabled("core")
+@custom_handler("broadcastcancel")
+async def broadcast_cancel_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    user = update.effective_user
+    message = update.effective_message
+    if not message: return
 
-    final_report = (
-        f" complete!\n\n"
-        f"✅ <b>Sent to:</b> <code>{sent_count}</code> chats.\n"
-        f"❌ <b>Failed for:</b> <code>{failed_count}</code> chats."
-    )
-    
-    try:
-        await status_message.edit_text(
-            text=f"📢 Broadcast to <code>{len(all_chats)}</code> chats" + final_report,
-            parse_mode=ParseMode.HTML
-        )
-    except Exception as e:
-        logger.error(f"Failed to edit final broadcast report: {e}")
+    if not is_owner_or_dev(user.id):
+        logger.warning(f"Unauthorized /broadcastcancel attempt by user {user.id}.")
+        return
+
+    target_id = None
+    if context.args:
+        if len(context.args) > 1 or not context.args[0].lstrip("#").isdigit():
+            await message.reply_text("Usage: /broadcastcancel [id]")
+            return
+        target_id = int(context.args[0].lstrip("#"))
+
+    stopped = await cancel_broadcast(target_id)
+    if stopped:
+        ids = ", ".join(f"<code>#{broadcast_id}</code>" for broadcast_id in stopped)
+        await message.reply_html(f"🛑 Stopping broadcast {ids} after the current batch.")
+    else:
+        await message.reply_text("No broadcast is running.")
 
 @check_module_enabled("core")
 @custom_handler(["shell", "sh"])
@@ -1043,8 +1040,8 @@ async def addsudo_command(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
         await message.reply_text("This user cannot be a sudo.")
         return
     
-    gban_reason = get_gban_reason(target_user.id)
-    blist_reason = get_blacklist_reason(target_user.id)
+    gban_reason = await get_gban_reason(target_user.id)
+    blist_reason = await get_blacklist_reason(target_user.id)
 
     if gban_reason:
         error_message = (
@@ -1068,7 +1065,7 @@ async def addsudo_command(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
         await message.reply_html(error_message)
         return
 
-    if add_sudo_user(target_user.id, user.id):
+    if await add_sudo_user(target_user.id, user.id):
         await message.reply_html(f"✅ Done! {user_display} [<code>{target_user.id}</code>] has been granted <b>Sudo</b> powers.")
         
         try:
@@ -1143,7 +1140,7 @@ async def delsudo_command(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
         await message.reply_html(f"ℹ️ User {user_display} [<code>{target_user.id}</code>] does not have <b>Sudo</b> powers.")
         return
 
-    if remove_sudo_user(target_user.id):
+    if await remove_sudo_user(target_user.id):
         await message.reply_html(f"✅ Done! <b>Sudo</b> powers for user {user_display} [<code>{target_user.id}</code>] have been revoked.")
         
         try:
@@ -1249,17 +1246,17 @@ async def setrank_command(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
         await message.reply_text(f"User is already a {new_role_full_name}. No changes made.")
         return
 
-    remove_support_user(target_user.id)
-    remove_sudo_user(target_user.id)
-    remove_dev_user(target_user.id)
+    await remove_support_user(target_user.id)
+    await remove_sudo_user(target_user.id)
+    await remove_dev_user(target_user.id)
 
     success = False
     if new_role_shortcut == "support":
-        success = add_support_user(target_user.id, user.id)
+        success = await add_support_user(target_user.id, user.id)
     elif new_role_shortcut == "sudo":
-        success = add_sudo_user(target_user.id, user.id)
+        success = await add_sudo_user(target_user.id, user.id)
     elif new_role_shortcut == "dev":
-        success = add_dev_user(target_user.id, user.id)
+        success = await add_dev_user(target_user.id, user.id)
 
     if success:
         user_display = create_user_html_link(target_user)
@@ -1332,7 +1329,7 @@ async def addsupport_command(update: Update, context: ContextTypes.DEFAULT_TYPE)
         await message.reply_text("This user cannot be a Support.")
         return
     
-    gban_reason = get_gban_reason(target_user.id)
+    gban_reason = await get_gban_reason(target_user.id)
     if gban_reason:
         await message.reply_html(
             f"❌ <b>Promotion Failed!</b>\n\n"
@@ -1342,7 +1339,7 @@ async def addsupport_command(update: Update, context: ContextTypes.DEFAULT_TYPE)
             f"Please remove global ban first using /ungban if you wish to proceed.</i>"
         )
         return
-    blist_reason = get_blacklist_reason(target_user.id)
+    blist_reason = await get_blacklist_reason(target_user.id)
     if blist_reason:
         await message.reply_html(
             f"❌ <b>Promotion Failed!</b>\n\n"
@@ -1353,7 +1350,7 @@ async def addsupport_command(update: Update, context: ContextTypes.DEFAULT_TYPE)
         )
         return
 
-    if add_support_user(target_user.id, user.id):
+    if await add_support_user(target_user.id, user.id):
         await message.reply_html(f"✅ Done! {user_display} [<code>{target_user.id}</code>] has been granted <b>Support</b> powers.")
         
         try:
@@ -1421,7 +1418,7 @@ async def delsupport_command(update: Update, context: ContextTypes.DEFAULT_TYPE)
         await message.reply_html(f"ℹ️ User {user_display} [<code>{target_user.id}</code>] is not in Support.")
         return
 
-    if remove_support_user(target_user.id):
+    if await remove_support_user(target_user.id):
         await message.reply_html(f"✅ Done! <b>Support</b> role for user {user_display} [<code>{target_user.id}</code>] has been revoked.")
         
         try:
@@ -1496,7 +1493,7 @@ async def adddev_command(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
         await message.reply_text("This user cannot be a Developer.")
         return
     
-    gban_reason = get_gban_reason(target_user.id)
+    gban_reason = await get_gban_reason(target_user.id)
     if gban_reason:
         await message.reply_html(
             f"❌ <b>Promotion Failed!</b>\n\n"
@@ -1506,7 +1503,7 @@ async def adddev_command(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
             f"Please remove global ban first using /ungban if you wish to proceed.</i>"
         )
         return
-    blist_reason = get_blacklist_reason(target_user.id)
+    blist_reason = await get_blacklist_reason(target_user.id)
     if blist_reason:
         await message.reply_html(
             f"❌ <b>Promotion Failed!</b>\n\n"
@@ -1517,7 +1514,7 @@ async def adddev_command(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
         )
         return
 
-    if add_dev_user(target_user.id, user.id):
+    if await add_dev_user(target_user.id, user.id):
         await message.reply_html(f"✅ Done! {user_display} [<code>{target_user.id}</code>] has been granted <b>Developer</b> powers.")
         
         try:
@@ -1582,7 +1579,7 @@ async def deldev_command(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
         await message.reply_html(f"ℹ️ User {user_display} [<code>{target_user.id}</code>] is not a Developer.")
         return
 
-    if remove_dev_user(target_user.id):
+    if await remove_dev_user(target_user.id):
         await message.reply_html(f"✅ Done! <b>Developer</b> role for user {user_display} [<code>{target_user.id}</code>] has been revoked.")
         
         try:
@@ -1646,7 +1643,7 @@ async def whitelist_user_command(update: Update, context: ContextTypes.DEFAULT_T
         await message.reply_html(f"User {user_display} already has a privileged or protected role and cannot be whitelisted.")
         return
 
-    gban_reason = get_gban_reason(target_user.id)
+    gban_reason = await get_gban_reason(target_user.id)
     if gban_reason:
         await message.reply_html(
             f"❌ <b>Promotion Failed!</b>\n\n"
@@ -1656,7 +1653,7 @@ async def whitelist_user_command(update: Update, context: ContextTypes.DEFAULT_T
             f"Please remove global ban first using /ungban if you wish to proceed.</i>"
         )
         return
-    blist_reason = get_blacklist_reason(target_user.id)
+    blist_reason = await get_blacklist_reason(target_user.id)
     if blist_reason:
         await message.reply_html(
             f"❌ <b>Promotion Failed!</b>\n\n"
@@ -1675,7 +1672,7 @@ async def whitelist_user_command(update: Update, context: ContextTypes.DEFAULT_T
     await message.reply_html(prepare_message)
     await asyncio.sleep(1.0)
 
-    if add_to_whitelist(target_user.id, user.id):
+    if await add_to_whitelist(target_user.id, user.id):
         await message.reply_html(f"✅ Done! {user_display} [<code>{target_user.id}</code>] has been <b>whitelisted</b>.")
         
         try:
@@ -1739,7 +1736,7 @@ async def unwhitelist_user_command(update: Update, context: ContextTypes.DEFAULT
     await asyncio.sleep(1.0)
 
     user_display = create_user_html_link(target_user)
-    if remove_from_whitelist(target_user.id):
+    if await remove_from_whitelist(target_user.id):
         await update.message.reply_html(f"✅ Done! {user_display} [<code>{target_user.id}</code>] has been <b>unwhitelisted</b>.")
 
         try:
@@ -1777,7 +1774,7 @@ async def remove_cached_user_command(update: Update, context: ContextTypes.DEFAU
         await update.message.reply_text("Please provide a valid user ID.")
         return
 
-    if delete_user_from_db(user_id_to_delete):
+    if await delete_user_from_db(user_id_to_delete):
         await update.message.reply_html(
             f"✅ User <b>{user_id_to_delete}</b> has been cleared from the local database cache.\n"
             "The next command used on this user will fetch fresh data from Telegram."
@@ -1814,6 +1811,10 @@ def load_handlers(application: Application):
     application.add_handler(CommandHandler("listsupport", listsupport_command))
     application.add_handler(CommandHandler("listwhitelist", listwhitelist_command))
     application.add_handler(CommandHandler("broadcast", broadcast_command))
+    application.add_handler(CommandHandler("broadcastcancel", broadcast_cancel_command))
     application.add_handler(CommandHandler(["shell", "sh"], shell_command))
     application.add_handler(CommandHandler(["execute", "exe"], execute_script_command))
     application.add_handler(CommandHandler("rmcacheduser", remove_cached_user_command))
+    if application.job_queue:
+        application.job_queue.run_once(resume_broadcasts, when=5)
+        application.job_queue.run_repeating(run_scheduled_chat_sweep, interval=CHAT_SWEEP_INTERVAL, first=600)
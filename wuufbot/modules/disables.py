@@ -5,7 +5,8 @@ from telegram.ext import Application, CommandHandler, ContextTypes
 from collections import defaultdict
 
 from ..core.constants import DISABLES_HELP_TEXT
-from ..core.database import disable_command_in_chat, enable_command_in_chat, get_disabled_commands_in_chat
+from ..core.database import get_disabled_commands_in_chat
+from ..core.async_database import disable_command_in_chat, enable_command_in_chat
 from ..core.utils import safe_escape, _can_user_perform_action, send_safe_reply
 from ..core.decorators import check_module_enabled, command_control
 from ..core.handlers import custom_handler
@@ -36,7 +37,7 @@ async def disable_command(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
 
         disabled_count = 0
         for command_name in manageable_commands:
-            if disable_command_in_chat(chat.id, command_name):
+            if await disable_command_in_chat(chat.id, command_name):
                 disabled_count += 1
         
         await update.message.reply_html(
@@ -52,7 +53,7 @@ async def disable_command(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
         )
         return
 
-    if disable_command_in_chat(update.effective_chat.id, command_to_disable):
+    if await disable_command_in_chat(update.effective_chat.id, command_to_disable):
         await update.message.reply_text(
             f"✅ <code>{safe_escape(command_to_disable)}</code> is now disabled for non-admins in this chat.",
             parse_mode=ParseMode.HTML
@@ -84,7 +85,7 @@ async def enable_command(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
 
         enabled_count = 0
         for command_name in disabled_in_chat:
-            if enable_command_in_chat(chat.id, command_name):
+            if await enable_command_in_chat(chat.id, command_name):
                 enabled_count += 1
         
         await update.message.reply_html(
@@ -97,7 +98,7 @@ async def enable_command(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
         await update.message.reply_html("Usage: /enable &lt;command name&gt;\nThat command doesn't exist or isn't managed.")
         return
         
-    if enable_command_in_chat(update.effective_chat.id, command_to_enable):
+    if await enable_command_in_chat(update.effective_chat.id, command_to_enable):
         await update.message.reply_text(
             f"✅ <code>{safe_escape(command_to_enable)}</code> is now enabled for everyone in this chat.",
             parse_mode=ParseMode.HTML
@@ -1,12 +1,12 @@
 import logging
 import re
 import json
-import time
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup, User, Chat
 from telegram.ext import Application, CommandHandler, MessageHandler, filters, ContextTypes
 from telegram.constants import ParseMode, ChatType
 
-from ..core.database import add_or_update_filter, remove_filter, get_all_filters_for_chat
+from ..core.database import filter_versions
+from ..core.async_database import add_or_update_filter, remove_filter, get_all_filters_for_chat
 from ..core.utils import _can_user_perform_action, safe_escape, send_safe_reply
 from ..core.decorators import check_module_enabled, command_control
 from ..core.handlers import custom_handler
@@ -14,6 +14,87 @@ from ..core.constants import FILTERS_HELP_TEXT
 
 logger = logging.getLogger(__name__)
 
+_PUNCTUATION_RE = re.compile(r'[^\w\s]')
+# Group references (\1, (?P=name), (?(1)...)) would point at the wrong group inside the shared alternation.
+_BACKREFERENCE_RE = re.compile(r'\\[1-9]|\(\?P[=<]|\(\?\(')
+
+
+# --- COMPILED MATCHER ---
+class FilterMatcher:
+    """
+    Matches a message against all filters of one chat, keeping the original
+    rule that the first filter (in DB order) that matches wins.
+
+    Keyword filters are a word -> index map looked up once per message token.
+    Wildcard and regex filters are compiled once; the ones that can be safely
+    joined into a single alternation share a prefilter, so a message that
+    matches none of them costs one regex search.
+    """
+
+    __slots__ = ("version", "filters", "keywords", "patterns", "prefilter")
+
+    def __init__(self, chat_id: int, all_filters: list[dict], version: int = 0):
+        self.version = version
+        self.filters = all_filters
+        self.keywords: dict[str, int] = {}
+        self.patterns: list[tuple[int, re.Pattern, bool]] = []
+        self.prefilter: re.Pattern | None = None
+
+        for index, f in enumerate(all_filters):
+            keyword = f['keyword']
+            filter_type = f['filter_type']
+            if filter_type == 'keyword':
+                self.keywords.setdefault(keyword.lower(), index)
+                continue
+
+            if filter_type == 'wildcard':
+                source = re.escape(keyword).replace(r'\*', '.*')
+            elif filter_type == 'regex':
+                source = keyword
+            else:
+                continue
+
+            try:
+                compiled = re.compile(source, re.IGNORECASE)
+            except re.error as e:
+                logger.warning(f"Invalid regex pattern in filter for chat {chat_id}: {keyword} | Error: {e}")
+                continue
+            self.patterns.append((index, compiled, not _BACKREFERENCE_RE.search(source)))
+
+        combinable = [compiled.pattern for _, compiled, can_combine in self.patterns if can_combine]
+        if combinable:
+            try:
+                self.prefilter = re.compile("|".join(f"(?:{source})" for source in combinable), re.IGNORECASE)
+            except re.error:
+                self.prefilter = None
+        if self.prefilter is None:
+            self.patterns = [(index, compiled, False) for index, compiled, _ in self.patterns]
+
+    def __bool__(self) -> bool:
+        return bool(self.filters)
+
+    def match(self, text: str) -> dict | None:
+        best: int | None = None
+
+        if self.keywords:
+            for word in _PUNCTUATION_RE.sub('', text).lower().split():
+                index = self.keywords.get(word)
+                if index is not None and (best is None or index < best):
+                    best = index
+
+        if self.patterns:
+            prefilter_hit = self.prefilter is None or self.prefilter.search(text) is not None
+            for index, compiled, combined in self.patterns:
+                if best is not None and index > best:
+                    break
+                if combined and not prefilter_hit:
+                    continue
+                if compiled.search(text):
+                    best = index
+                    break
+
+        return self.filters[best] if best is not None else None
+
 
 def fill_reply_template(text: str | None, user: User, chat: Chat) -> str:
     if not text:
@@ -83,45 +164,18 @@ async def check_message_for_filters(update: Update, context: ContextTypes.DEFAUL
 
     if not chat or not message or not message.text or chat.type == ChatType.PRIVATE:
         return
-    current_time = time.time()
-    if 'filters_cache' not in context.chat_data or context.chat_data.get('filters_last_update', 0) < (current_time - 60):
-        context.chat_data['filters_cache'] = get_all_filters_for_chat(chat.id)
-        context.chat_data['filters_last_update'] = current_time
+    version = filter_versions.get(chat.id)
+    matcher: FilterMatcher | None = context.chat_data.get('filters_matcher')
+    if matcher is None or matcher.version != version:
+        matcher = FilterMatcher(chat.id, await get_all_filters_for_chat(chat.id), version)
+        context.chat_data['filters_matcher'] = matcher
     
-    all_filters = context.chat_data.get('filters_cache', [])
-    if not all_filters:
+    if not matcher:
         return
     
-    message_text = message.text
-    for f in all_filters:
-        keyword = f['keyword']
-        filter_type = f['filter_type']
-        
-        match = False
-        try:
-            if filter_type == 'keyword':
-                normalized_text = re.sub(r'[^\w\s]', '', message_text)
-                words_in_message = normalized_text.lower().split()
-                
-                if keyword.lower() in words_in_message:
-                    match = True
-            
-            elif filter_type == 'wildcard':
-                pattern = re.escape(keyword).replace(r'\*', '.*')
-                if re.search(pattern, message_text, re.IGNORECASE):
-                    match = True
-            
-            elif filter_type == 'regex':
-                if re.search(keyword, message_text, re.IGNORECASE):
-                    match = True
-
-        except re.error as e:
-            logger.warning(f"Invalid regex pattern in filter for chat {chat.id}: {keyword} | Error: {e}")
-            continue
-
-        if match:
-            await send_filter_reply(update, context, f)
-            return
+    matched_filter = matcher.match(message.text)
+    if matched_filter:
+        await send_filter_reply(update, context, matched_filter)
 
 @check_module_enabled("filters")
 @custom_handler(["addfilter", "filter"])
@@ -205,8 +259,7 @@ async def add_filter_command(update: Update, context: ContextTypes.DEFAULT_TYPE)
         filter_data['reply_type'] = 'text'
         filter_data['reply_text'] = reply_text
 
-    if add_or_update_filter(msg.chat_id, keyword, filter_data):
-        context.chat_data.pop('filters_cache', None)
+    if await add_or_update_filter(msg.chat_id, keyword, filter_data):
         await msg.reply_text(f"✅ Filter for '<code>{safe_escape(keyword)}</code>' has been saved with type <code>{filter_type}</code>.", parse_mode=ParseMode.HTML)
     else:
         await msg.reply_text("An error occurred while saving the filter.")
@@ -232,8 +285,7 @@ async def remove_filter_command(update: Update, context: ContextTypes.DEFAULT_TY
         await update.message.reply_html("Usage: /delfilter 'keyword'")
         return
         
-    if remove_filter(update.effective_chat.id, keyword_to_remove):
-        context.chat_data.pop('filters_cache', None)
+    if await remove_filter(update.effective_chat.id, keyword_to_remove):
         await update.message.reply_text(f"✅ Filter for '<code>{safe_escape(keyword_to_remove)}</code>' has been removed.", parse_mode=ParseMode.HTML)
     else:
         await update.message.reply_text("This filter doesn't exist or an error occurred while removing it.")
@@ -253,7 +305,7 @@ async def list_filters_command(update: Update, context: ContextTypes.DEFAULT_TYP
     if not can_see:
         return
     
-    all_filters = get_all_filters_for_chat(update.effective_chat.id)
+    all_filters = await get_all_filters_for_chat(update.effective_chat.id)
     if not all_filters:
         await update.message.reply_text("There are no active filters in this chat.")
         return
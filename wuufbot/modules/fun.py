@@ -8,9 +8,10 @@ from telegram.constants import ParseMode
 from telegram.ext import Application, CommandHandler, ContextTypes
 
 from ..config import OWNER_ID
-from ..core.utils import get_themed_gif, check_target_protection, check_username_protection, send_safe_reply, safe_escape
+from ..core.utils import get_themed_gif, remember_themed_gif, forget_themed_gif, is_unusable_file_error, check_target_protection, check_username_protection, send_safe_reply, safe_escape
 from ..core.constants import KILL_TEXTS, SLAP_TEXTS, PUNCH_TEXTS, PAT_TEXTS, BONK_TEXTS, CANT_TARGET_OWNER_TEXTS, CANT_TARGET_SELF_TEXTS
 from ..core.decorators import check_module_enabled, command_control
+from ..core.rate_limiter import Priority, prioritized
 from ..core.handlers import custom_handler
 
 logger = logging.getLogger(__name__)
@@ -19,6 +20,7 @@ logger = logging.getLogger(__name__)
 # --- FUN COMMANDS HELPER ---
 @check_module_enabled("fun")
 @command_control("fun")
+@prioritized(Priority.BACKGROUND)
 async def _handle_action_command(update, context, texts, gifs, name, req_target=True, msg=""):
     message = update.effective_message
     target_mention = None
@@ -35,11 +37,17 @@ async def _handle_action_command(update, context, texts, gifs, name, req_target=
         else: await update.message.reply_text(msg); return
     
     text = random.choice(texts).format(target=target_mention or "someone")
-    gif_url = await get_themed_gif(context, gifs)
-    try:
-        if gif_url: await update.message.reply_animation(gif_url, caption=text, parse_mode=ParseMode.HTML)
-        else: await update.message.reply_html(text)
-    except Exception as e: logger.error(f"Error sending {name} action: {e}"); await update.message.reply_html(text)
+    gif = await get_themed_gif(context, gifs)
+    if gif:
+        try:
+            sent = await update.message.reply_animation(gif.media, caption=text, parse_mode=ParseMode.HTML)
+        except Exception as e:
+            logger.error(f"Error sending {name} action: {e}")
+            if is_unusable_file_error(e): await forget_themed_gif(gif)
+        else:
+            await remember_themed_gif(gif, sent)
+            return
+    await update.message.reply_html(text)
 
 @check_module_enabled("fun")
 @command_control("fun")
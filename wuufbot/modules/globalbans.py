@@ -1,14 +1,15 @@
 import logging
 import asyncio
-import sqlite3
 from datetime import datetime, timezone, timedelta
 from telegram import Update, User, Chat
 from telegram.constants import ParseMode, ChatType, ChatMemberStatus
 from telegram.ext import Application, CommandHandler, MessageHandler, filters, ContextTypes, ApplicationHandlerStop
 
-from ..config import APPEAL_CHAT_USERNAME, DB_NAME
-from ..core.database import is_gban_enforced, get_gban_reason, add_to_gban, remove_from_gban, is_whitelisted, add_chat_to_db
+from ..config import APPEAL_CHAT_USERNAME
+from ..core.database import is_whitelisted, is_gbanned
+from ..core.async_database import is_gban_enforced, get_chat_settings, get_gban_reason, add_to_gban, remove_from_gban, set_gban_enforcement, record_ban
 from ..core.utils import is_privileged_user, resolve_user_with_telethon, create_user_html_link, safe_escape, send_operational_log, propagate_unban, is_entity_a_user
+from ..core.admin_cache import get_admin_member, get_bot_member, is_chat_admin
 from ..core.decorators import check_module_enabled
 from ..core.handlers import custom_handler
 
@@ -21,15 +22,17 @@ async def check_gban_on_entry(update: Update, context: ContextTypes.DEFAULT_TYPE
     new_members = update.message.new_chat_members if update.message else []
     chat = update.effective_chat
 
-    if not new_members or not chat or not is_gban_enforced(chat.id):
+    gbanned_members = [member for member in new_members if is_gbanned(member.id)]
+    if not gbanned_members or not chat or not (await get_chat_settings(chat.id)).enforce_gban:
         return
     
-    for member in new_members:
-        gban_reason = get_gban_reason(member.id)
+    for member in gbanned_members:
+        gban_reason = await get_gban_reason(member.id)
         if gban_reason and not is_privileged_user(member.id):
             logger.info(f"Gbanned user {member.id} detected in {chat.id}. Enforcing ban.")
             try:
                 await context.bot.ban_chat_member(chat_id=chat.id, user_id=member.id)
+                await record_ban(member.id, chat.id, "gban")
                 
                 message_text = (
                     f"⚠️ <b>Alert!</b> This user is globally banned.\n"
@@ -48,28 +51,26 @@ async def check_gban_on_message(update: Update, context: ContextTypes.DEFAULT_TY
         return
     
     chat = update.effective_chat
-    
-    if not is_gban_enforced(chat.id):
+    user = update.effective_user
+    if not user or not is_gbanned(user.id):
         return
 
-    user = update.effective_user
-    if not user or is_privileged_user(user.id):
+    if not (await get_chat_settings(chat.id)).enforce_gban or is_privileged_user(user.id):
         return
         
-    gban_reason = get_gban_reason(user.id)
+    gban_reason = await get_gban_reason(user.id)
     if gban_reason:
         message = update.effective_message
         
         try:
-            bot_member = await context.bot.get_chat_member(chat.id, context.bot.id)
-            user_member = await context.bot.get_chat_member(chat.id, user.id)
-
-            if user_member.status in ["creator", "administrator"]:
+            bot_member = await get_bot_member(context, chat.id)
+            if await is_chat_admin(context, chat.id, user.id):
                 return
 
             if bot_member.status == "administrator" and bot_member.can_restrict_members:
                 
                 await context.bot.ban_chat_member(chat.id, user.id)
+                await record_ban(user.id, chat.id, "gban")
                 
                 if bot_member.can_delete_messages:
                     try:
@@ -142,7 +143,7 @@ async def gban_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> No
         return
 
     user_display = create_user_html_link(target_entity)
-    existing_gban_reason = get_gban_reason(target_entity.id)
+    existing_gban_reason = await get_gban_reason(target_entity.id)
     if existing_gban_reason:
         await message.reply_html(
             f"ℹ️ User {user_display} [<code>{target_entity.id}</code>] is already <b>globally banned</b>.\n"
@@ -154,10 +155,11 @@ async def gban_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> No
     await message.reply_html(prepare_message)
     await asyncio.sleep(1.0)
 
-    if add_to_gban(target_entity.id, user_who_gbans.id, reason):
-        if chat.type != ChatType.PRIVATE and is_gban_enforced(chat.id):
+    if await add_to_gban(target_entity.id, user_who_gbans.id, reason):
+        if chat.type != ChatType.PRIVATE and await is_gban_enforced(chat.id):
             try:
                 await context.bot.ban_chat_member(chat.id, target_entity.id)
+                await record_ban(target_entity.id, chat.id, "gban")
             except Exception as e:
                 logger.warning(f"Could not enforce local ban for gban: {e}")
 
@@ -231,11 +233,11 @@ async def ungban_command(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
 
     user_display = create_user_html_link(target_entity)
 
-    if not get_gban_reason(target_entity.id):
+    if not await get_gban_reason(target_entity.id):
         await message.reply_html(f"ℹ️ User {user_display} [<code>{target_entity.id}</code>] is not <b>globally banned</b>.")
         return
 
-    if remove_from_gban(target_entity.id):
+    if await remove_from_gban(target_entity.id):
         prepare_message = f"Let’s give him next chance!"
         await message.reply_html(prepare_message)
     
@@ -278,8 +280,8 @@ async def enforce_gban_command(update: Update, context: ContextTypes.DEFAULT_TYP
         return
 
     try:
-        member = await chat.get_member(user.id)
-        if member.status != "creator":
+        member = await get_admin_member(context, chat.id, user.id)
+        if not member or member.status != "creator":
             await update.message.reply_text("Only the chat Creator can use this command.")
             return
     except Exception as e:
@@ -291,12 +293,12 @@ async def enforce_gban_command(update: Update, context: ContextTypes.DEFAULT_TYP
         return
     
     choice = context.args[0].lower()
-    current_status_bool = is_gban_enforced(chat.id)
+    current_status_bool = await is_gban_enforced(chat.id)
 
     if choice == 'yes' or choice == 'on':
         permission_notice = ""
         try:
-            bot_member = await context.bot.get_chat_member(chat.id, context.bot.id)
+            bot_member = await get_bot_member(context, chat.id)
             if not (bot_member.status == "administrator" and bot_member.can_restrict_members):
                 permission_notice = (
                     "\n\n<b>⚠️ Notice:</b> I do not have the 'can_restrict_members' permission in this chat. "
@@ -312,17 +314,7 @@ async def enforce_gban_command(update: Update, context: ContextTypes.DEFAULT_TYP
             )
             return
         
-        setting = 1
-        try:
-            with sqlite3.connect(DB_NAME) as conn:
-                cursor = conn.cursor()
-                cursor.execute("UPDATE bot_chats SET enforce_gban = ? WHERE chat_id = ?", (setting, chat.id))
-                if cursor.rowcount == 0:
-                    add_chat_to_db(chat.id, chat.title or f"Chat {chat.id}")
-                    cursor.execute("UPDATE bot_chats SET enforce_gban = ? WHERE chat_id = ?", (setting, chat.id))
-                conn.commit()
-        except sqlite3.Error as e:
-            logger.error(f"Failed to update gban enforcement for chat {chat.id}: {e}")
+        if not await set_gban_enforcement(chat.id, True, chat.title):
             await update.message.reply_text("An error occurred while updating the setting.")
             return
 
@@ -338,14 +330,7 @@ async def enforce_gban_command(update: Update, context: ContextTypes.DEFAULT_TYP
             await update.message.reply_html("ℹ️ Global Ban enforcement is already <b>DISABLED</b> for this chat.")
             return
         
-        setting = 0
-        try:
-            with sqlite3.connect(DB_NAME) as conn:
-                cursor = conn.cursor()
-                cursor.execute("UPDATE bot_chats SET enforce_gban = ? WHERE chat_id = ?", (setting, chat.id))
-                conn.commit()
-        except sqlite3.Error as e:
-            logger.error(f"Failed to update gban enforcement for chat {chat.id}: {e}")
+        if not await set_gban_enforcement(chat.id, False):
             await update.message.reply_text("An error occurred while updating the setting.")
             return
         
@@ -4,7 +4,7 @@ from telegram import Update, ChatPermissions
 from telegram.ext import Application, CommandHandler, MessageHandler, filters, ContextTypes
 from telegram.constants import ParseMode, ChatType
 
-from ..core.database import get_chat_join_settings, update_chat_join_settings
+from ..core.async_database import get_chat_join_settings, update_chat_join_settings, record_ban
 from ..core.utils import _can_user_perform_action, safe_escape, create_user_html_link, send_safe_reply
 from ..core.decorators import check_module_enabled
 from ..core.handlers import custom_handler
@@ -17,7 +17,7 @@ async def check_new_member(update: Update, context: ContextTypes.DEFAULT_TYPE) -
     if not chat or not update.message.new_chat_members:
         return
 
-    join_filters, action_to_take = get_chat_join_settings(chat.id)
+    join_filters, action_to_take = await get_chat_join_settings(chat.id)
     if not join_filters:
         return
 
@@ -34,6 +34,7 @@ async def check_new_member(update: Update, context: ContextTypes.DEFAULT_TYPE) -
                 
                 if action_to_take == "ban":
                     await context.bot.ban_chat_member(chat.id, member.id)
+                    await record_ban(member.id, chat.id, "joinfilter")
                     await context.bot.send_message(
                         chat_id=chat.id,
                         text=f"User {user_link} has been <b>banned</b>. {reason}",
@@ -83,12 +84,12 @@ async def add_filter_command(update: Update, context: ContextTypes.DEFAULT_TYPE)
     if not context.args: await update.message.reply_html("Usage: /addjoinfilter &lt;filter&gt;"); return
     
     chat_id = update.effective_chat.id
-    filters, _ = get_chat_join_settings(chat_id)
+    filters, _ = await get_chat_join_settings(chat_id)
     filter_text = " ".join(context.args).lower()
     
     if filter_text not in filters:
         filters.append(filter_text)
-        if update_chat_join_settings(chat_id, filters=filters):
+        if await update_chat_join_settings(chat_id, filters=filters):
             await update.message.reply_text(f"✅ Filter '<code>{safe_escape(filter_text)}</code>' added.", parse_mode=ParseMode.HTML)
         else:
             await update.message.reply_text("An error occurred while saving the filter.")
@@ -108,12 +109,12 @@ async def remove_filter_command(update: Update, context: ContextTypes.DEFAULT_TY
     if not context.args: await update.message.reply_html("Usage: /deljoinfilter &lt;filter&gt;"); return
 
     chat_id = update.effective_chat.id
-    filters, _ = get_chat_join_settings(chat_id)
+    filters, _ = await get_chat_join_settings(chat_id)
     filter_text = " ".join(context.args).lower()
 
     if filter_text in filters:
         filters.remove(filter_text)
-        if update_chat_join_settings(chat_id, filters=filters):
+        if await update_chat_join_settings(chat_id, filters=filters):
             await update.message.reply_text(f"✅ Filter '<code>{safe_escape(filter_text)}</code>' removed.", parse_mode=ParseMode.HTML)
         else:
             await update.message.reply_text("An error occurred while saving the filter.")
@@ -131,7 +132,7 @@ async def list_filters_command(update: Update, context: ContextTypes.DEFAULT_TYP
   
     if not await _can_user_perform_action(update, context, 'can_manage_chat', "Why should I listen to a person with no privileges for this? You need 'can_manage_chat' permission.", allow_bot_privileged_override=True): return
     
-    filters, action = get_chat_join_settings(update.effective_chat.id)
+    filters, action = await get_chat_join_settings(update.effective_chat.id)
     
     message = "<b>Join Filter Settings</b>\n\n"
     message += "This feature automatically takes action on users who join with a name or username containing specific keywords.\n\n"
@@ -163,7 +164,7 @@ async def set_action_command(update: Update, context: ContextTypes.DEFAULT_TYPE)
     if action_to_set not in actions:
         await update.message.reply_html("Usage: /setjoinaction &lt;ban/mute/kick&gt;"); return
         
-    if update_chat_join_settings(update.effective_chat.id, action=action_to_set):
+    if await update_chat_join_settings(update.effective_chat.id, action=action_to_set):
         await update.message.reply_text(f"✅ Join filter action has been set to <b>{action_to_set.upper()}</b>.", parse_mode=ParseMode.HTML)
     else:
         await update.message.reply_text("An error occurred while setting the action.")
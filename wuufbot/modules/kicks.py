@@ -5,6 +5,7 @@ from telegram.error import TelegramError
 from telegram.ext import Application, CommandHandler, ContextTypes
 
 from ..core.utils import _can_user_perform_action, resolve_user_with_telethon, create_user_html_link, send_safe_reply, safe_escape, is_entity_a_user
+from ..core.admin_cache import get_bot_member, is_chat_admin
 from ..core.decorators import check_module_enabled, command_control
 from ..core.handlers import custom_handler
 
@@ -126,8 +127,7 @@ async def dkick_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> N
         await send_safe_reply(update, context, text="Nuh uh... You can't dkick yourself."); return
 
     try:
-        member = await chat.get_member(target_user.id)
-        if member.status in [ChatMemberStatus.ADMINISTRATOR, ChatMemberStatus.OWNER]:
+        if await is_chat_admin(context, chat.id, target_user.id):
             await send_safe_reply(update, context, text="Chat Creator and Administrators cannot be kicked.")
             return
     except TelegramError: pass
@@ -170,7 +170,7 @@ async def kickme_command(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
         return
 
     try:
-        bot_member = await context.bot.get_chat_member(chat.id, context.bot.id)
+        bot_member = await get_bot_member(context, chat.id)
         if not (bot_member.status == "administrator" and getattr(bot_member, 'can_restrict_members', False)):
             await update.message.reply_text("Error: I can't kick users here because I'm not an admin with ban/kick permissions 🤓.")
             return
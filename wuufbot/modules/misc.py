@@ -8,8 +8,13 @@ from telegram.error import TelegramError
 from telegram.ext import Application, CommandHandler, ContextTypes, CallbackQueryHandler, MessageHandler, filters
 
 from ..config import OWNER_ID, APPEAL_CHAT_USERNAME, LOG_CHAT_USERNAME
-from ..core.database import get_rules, is_dev_user, is_sudo_user, is_support_user, is_whitelisted, get_blacklist_reason, get_gban_reason, is_gban_enforced, update_user_in_db
+from ..core.database import is_dev_user, is_sudo_user, is_support_user, is_whitelisted
+from ..core.async_database import (
+    get_rules, get_blacklist_reason, get_gban_reason, is_gban_enforced,
+    update_user_in_db
+)
 from ..core.utils import is_privileged_user, safe_escape, resolve_user_with_telethon, create_user_html_link, send_safe_reply, is_owner_or_dev
+from ..core.admin_cache import get_bot_member
 from ..core.constants import START_TEXT, HELP_MAIN_TEXT, GENERAL_COMMANDS, USER_CHAT_INFO, MODERATION_COMMANDS, ADMIN_TOOLS, NOTES, CHAT_SETTINGS, CHAT_SECURITY, AI_COMMANDS, FUN_COMMANDS, ADMIN_NOTE_TEXT, SUPPORT_COMMANDS_TEXT, SUDO_COMMANDS_TEXT, DEVELOPER_COMMANDS_TEXT, OWNER_COMMANDS_TEXT, FILTERS
 from ..core.decorators import check_module_enabled, command_control
 from ..core.handlers import custom_handler
@@ -79,7 +84,7 @@ async def start_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> N
         elif arg.startswith('rules_'):
             try:
                 chat_id = int(arg.split('_')[1])
-                rules_text = get_rules(chat_id)
+                rules_text = await get_rules(chat_id)
                 if rules_text:
                     await message.reply_html(rules_text, disable_web_page_preview=True)
                 else:
@@ -348,7 +353,7 @@ async def entity_info_command(update: Update, context: ContextTypes.DEFAULT_TYPE
         return
 
     if isinstance(target_entity, User):
-        update_user_in_db(target_entity)
+        await update_user_in_db(target_entity)
 
     is_target_bot_flag = (target_entity.id == context.bot.id)
     is_target_owner_flag = (target_entity.id == OWNER_ID)
@@ -356,8 +361,8 @@ async def entity_info_command(update: Update, context: ContextTypes.DEFAULT_TYPE
     is_target_sudo_flag = is_sudo_user(target_entity.id)
     is_target_support_flag = is_support_user(target_entity.id)
     is_target_whitelist_flag = is_whitelisted(target_entity.id)
-    blacklist_reason_str = get_blacklist_reason(target_entity.id)
-    gban_reason_str = get_gban_reason(target_entity.id)
+    blacklist_reason_str = await get_blacklist_reason(target_entity.id)
+    gban_reason_str = await get_gban_reason(target_entity.id)
     chat_member_obj: telegram.ChatMember | None = None
     
     if isinstance(target_entity, User) and update.effective_chat.type in [ChatType.GROUP, ChatType.SUPERGROUP]:
@@ -483,11 +488,11 @@ async def chat_info_command(update: Update, context: ContextTypes.DEFAULT_TYPE)
     if chat.type in [ChatType.GROUP, ChatType.SUPERGROUP]:
         status_line = "<b>• Gban Enforcement:</b> "
         
-        if not is_gban_enforced(chat.id):
+        if not await is_gban_enforced(chat.id):
             status_line += "<code>Disabled</code>"
         else:
             try:
-                bot_member = await context.bot.get_chat_member(chat.id, context.bot.id)
+                bot_member = await get_bot_member(context, chat.id)
                 if bot_member.status == "administrator" and bot_member.can_restrict_members:
                     status_line += "<code>Enabled</code>"
                 else:
@@ -6,6 +6,7 @@ from telegram.error import TelegramError
 from telegram.ext import Application, CommandHandler, ContextTypes, ChatMemberHandler
 
 from ..core.utils import _can_user_perform_action, resolve_user_with_telethon, parse_duration_to_timedelta, create_user_html_link, send_safe_reply, safe_escape, send_critical_log, is_entity_a_user
+from ..core.admin_cache import is_chat_admin
 from ..core.decorators import check_module_enabled
 from ..core.handlers import custom_handler
 
@@ -144,8 +145,7 @@ async def dmute_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> N
         await send_safe_reply(update, context, text="Nuh uh... You can't dmute yourself."); return
 
     try:
-        member = await chat.get_member(target_user.id)
-        if member.status in [ChatMemberStatus.ADMINISTRATOR, ChatMemberStatus.OWNER]:
+        if await is_chat_admin(context, chat.id, target_user.id):
             await send_safe_reply(update, context, text="Chat Creator and Administrators cannot be muted.")
             return
     except TelegramError: pass
@@ -233,8 +233,7 @@ async def tmute_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> N
         await send_safe_reply(update, context, text="Nuh uh... You can't tmute yourself."); return
 
     try:
-        member = await chat.get_member(target_user.id)
-        if member.status in [ChatMemberStatus.ADMINISTRATOR, ChatMemberStatus.OWNER]:
+        if await is_chat_admin(context, chat.id, target_user.id):
             await send_safe_reply(update, context, text="Chat Creator and Administrators cannot be muted.")
             return
     except TelegramError: pass
@@ -5,6 +5,7 @@ from telegram.error import TelegramError
 from telegram.ext import Application, CommandHandler, ContextTypes
 
 from ..core.utils import _can_user_perform_action, send_safe_reply, safe_escape
+from ..core.admin_cache import get_bot_member
 from ..core.decorators import check_module_enabled
 from ..core.handlers import custom_handler
 
@@ -28,7 +29,7 @@ async def pin_message_command(update: Update, context: ContextTypes.DEFAULT_TYPE
         return
 
     try:
-        bot_member = await context.bot.get_chat_member(chat.id, context.bot.id)
+        bot_member = await get_bot_member(context, chat.id)
         if not (bot_member.status == "administrator" and getattr(bot_member, 'can_pin_messages', False)):
             await update.message.reply_text("Error: I need to be an admin with the 'can_pin_messages' permission in this chat.")
             return
@@ -89,7 +90,7 @@ async def unpin_message_command(update: Update, context: ContextTypes.DEFAULT_TY
         return
 
     try:
-        bot_member = await context.bot.get_chat_member(chat.id, context.bot.id)
+        bot_member = await get_bot_member(context, chat.id)
         if not (bot_member.status == ChatMemberStatus.ADMINISTRATOR and getattr(bot_member, 'can_pin_messages', False)):
             await update.message.reply_text("Error: I need to be an admin with 'can_pin_messages' permission in this chat.")
             return
@@ -5,6 +5,7 @@ from telegram.error import TelegramError
 from telegram.ext import Application, CommandHandler, ContextTypes
 
 from ..core.utils import _can_user_perform_action, resolve_user_with_telethon, create_user_html_link, safe_escape, is_entity_a_user
+from ..core.admin_cache import admin_cache
 from ..core.decorators import check_module_enabled
 from ..core.handlers import custom_handler
 
@@ -75,6 +76,7 @@ async def promote_command(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
             if provided_custom_title:
                 title_to_set = provided_custom_title[:16]
                 await context.bot.set_chat_administrator_custom_title(chat.id, target_user.id, title_to_set)
+                admin_cache.invalidate(chat.id)
                 await message.reply_html(f"✅ User {user_display}'s title has been updated to '<i>{safe_escape(title_to_set)}</i>'.")
             else:
                 await message.reply_html(f"ℹ️ User {user_display} is already an admin.")
@@ -93,6 +95,7 @@ async def promote_command(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
             can_restrict_members=True, can_change_info=True, can_invite_users=True,
             can_pin_messages=True, can_manage_topics=(chat.is_forum if hasattr(chat, 'is_forum') else None)
         )
+        admin_cache.invalidate(chat.id)
         await context.bot.set_chat_administrator_custom_title(chat.id, target_user.id, title_to_set)
         
         user_display = create_user_html_link(target_user)
@@ -164,6 +167,7 @@ async def demote_command(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
             can_manage_video_chats=False, can_restrict_members=False, can_promote_members=False,
             can_change_info=False, can_invite_users=False, can_pin_messages=False, can_manage_topics=False
         )
+        admin_cache.invalidate(chat.id)
         await message.reply_html(f"✅ User {user_display} has been demoted to a regular member.")
 
     except TelegramError as e:
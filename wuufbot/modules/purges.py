@@ -1,4 +1,3 @@
-import asyncio
 import logging
 from datetime import datetime
 from telegram import Update
@@ -7,6 +6,7 @@ from telegram.error import TelegramError
 from telegram.ext import Application, CommandHandler, ContextTypes
 
 from ..core.utils import _can_user_perform_action, safe_escape
+from ..core.admin_cache import get_bot_member
 from ..core.decorators import check_module_enabled
 from ..core.handlers import custom_handler
 
@@ -31,7 +31,7 @@ async def purge_messages_command(update: Update, context: ContextTypes.DEFAULT_T
         return
 
     try:
-        bot_member = await context.bot.get_chat_member(chat.id, context.bot.id)
+        bot_member = await get_bot_member(context, chat.id)
         if not (bot_member.status == "administrator" and getattr(bot_member, 'can_delete_messages', False)):
             await context.bot.send_message(chat.id, "Error: I need to be an admin with the 'can_delete_messages' permission in this chat.")
             return
@@ -69,8 +69,6 @@ async def purge_messages_command(update: Update, context: ContextTypes.DEFAULT_T
             if not success:
                 errors_occurred = True
                 logger.warning(f"A batch purge in chat {chat.id} failed or partially failed.")
-            if len(message_ids_to_delete) > 100 and i + 100 < len(message_ids_to_delete):
-                await asyncio.sleep(1.1)
         except TelegramError as e:
             logger.error(f"TelegramError during purge batch in chat {chat.id}: {e}")
             errors_occurred = True
@@ -5,6 +5,7 @@ from telegram.error import TelegramError
 from telegram.ext import Application, CommandHandler, ContextTypes
 
 from ..core.utils import resolve_user_with_telethon, create_user_html_link, safe_escape
+from ..core.admin_cache import is_chat_admin
 from ..core.decorators import check_module_enabled, command_control
 from ..core.handlers import custom_handler
 
@@ -24,8 +25,7 @@ async def report_command(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
         return
 
     try:
-        reporter_member = await chat.get_member(reporter.id)
-        if reporter_member.status in [ChatMemberStatus.ADMINISTRATOR, ChatMemberStatus.OWNER]:
+        if await is_chat_admin(context, chat.id, reporter.id):
             logger.info(f"Report command ignored: used by admin {reporter.id} in chat {chat.id}.")
             return
     except TelegramError as e:
@@ -47,8 +47,7 @@ async def report_command(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
     reason = " ".join(args_for_reason) if args_for_reason else "No specific reason provided."
 
     try:
-        target_member = await chat.get_member(target_entity.id)
-        if target_member.status in [ChatMemberStatus.ADMINISTRATOR, ChatMemberStatus.OWNER]:
+        if await is_chat_admin(context, chat.id, target_entity.id):
             logger.info(f"Report command ignored: target {target_entity.id} is an admin in chat {chat.id}.")
             return
     except TelegramError as e:
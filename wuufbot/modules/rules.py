@@ -3,7 +3,7 @@ from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.constants import ChatType
 from telegram.ext import Application, CommandHandler, ContextTypes
 
-from ..core.database import set_rules, get_rules, clear_rules
+from ..core.async_database import set_rules, get_rules, clear_rules
 from ..core.utils import _can_user_perform_action
 from ..core.decorators import check_module_enabled, command_control
 from ..core.handlers import custom_handler
@@ -39,7 +39,7 @@ async def set_rules_command(update: Update, context: ContextTypes.DEFAULT_TYPE)
         await message.reply_text("The rules text cannot be empty.")
         return
 
-    if set_rules(chat.id, rules_text):
+    if await set_rules(chat.id, rules_text):
         await message.reply_html("✅ The rules for this group have been set successfully.")
     else:
         await message.reply_text("A database error occurred while setting the rules.")
@@ -58,7 +58,7 @@ async def clear_rules_command(update: Update, context: ContextTypes.DEFAULT_TYPE
     if not await _can_user_perform_action(update, context, 'can_change_info', "Why should I listen to a person with no privileges for this? You need 'can_change_members' permission."):
         return
 
-    if clear_rules(chat.id):
+    if await clear_rules(chat.id):
         await message.reply_html("✅ The rules for this group have been cleared.")
     else:
         await message.reply_text("A database error occurred while clearing the rules.")
@@ -76,7 +76,7 @@ async def rules_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> N
         return
 
     if chat.type != ChatType.PRIVATE:
-        rules_text = get_rules(chat.id)
+        rules_text = await get_rules(chat.id)
         if rules_text:
             bot_username = context.bot.username
             deep_link_url = f"https://t.me/{bot_username}?start=rules_{chat.id}"
@@ -1,44 +1,106 @@
+import asyncio
 import logging
-import sqlite3
-from telegram import Update
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from telegram import Update, User
 from telegram.constants import ChatType
 from telegram.ext import Application, MessageHandler, filters, ContextTypes
 
-from ..config import DB_NAME
-from ..core.database import update_user_in_db, add_chat_to_db
+from ..config import USERLOGGER_FLUSH_INTERVAL, USERLOGGER_LAST_SEEN_INTERVAL, USERLOGGER_TRACKED_USERS
+from ..core.database import user_to_row
+from ..core.async_database import update_users_in_db, ensure_chat_in_db, get_all_bot_chat_ids
 from ..core.decorators import check_module_enabled
 
 logger = logging.getLogger(__name__)
 
+_known_chats_lock = asyncio.Lock()
+
+
+# --- WRITE-BEHIND USER BUFFER ---
+class UserWriteBuffer:
+    """
+    Coalesces passive user upserts by user_id and writes them in one batch.
+    A user whose profile is unchanged is only rewritten once their last_seen
+    is older than USERLOGGER_LAST_SEEN_INTERVAL.
+    """
+
+    def __init__(self, last_seen_interval: float = USERLOGGER_LAST_SEEN_INTERVAL, max_tracked: int = USERLOGGER_TRACKED_USERS):
+        self.last_seen_interval = last_seen_interval
+        self.max_tracked = max_tracked
+        self._pending: dict[int, tuple] = {}
+        self._written: OrderedDict[int, tuple[tuple, float]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def add(self, user: User) -> None:
+        row = user_to_row(user, datetime.now(timezone.utc).isoformat())
+        profile = row[1:6]
+        written = self._written.get(user.id)
+        if written and written[0] == profile and time.monotonic() - written[1] < self.last_seen_interval:
+            return
+        self._pending[user.id] = row
+
+    async def flush(self) -> int:
+        if not self._pending:
+            return 0
+        batch, self._pending = self._pending, {}
+        if not await update_users_in_db(list(batch.values())):
+            for user_id, row in batch.items():
+                self._pending.setdefault(user_id, row)
+            return 0
+
+        now = time.monotonic()
+        for user_id, row in batch.items():
+            self._written[user_id] = (row[1:6], now)
+            self._written.move_to_end(user_id)
+        while len(self._written) > self.max_tracked:
+            self._written.popitem(last=False)
+        return len(batch)
+
+user_buffer = UserWriteBuffer()
+
+async def flush_user_buffer(context: ContextTypes.DEFAULT_TYPE | None = None) -> None:
+    written = await user_buffer.flush()
+    if written:
+        logger.debug(f"Flushed {written} buffered user(s) to DB.")
+
 
 # --- PASSIVE USER AND CHAT LOGGING FUNCTION ---
+async def _get_known_chats(context: ContextTypes.DEFAULT_TYPE) -> set[int]:
+    """Loads the known chat ids once; concurrent first callers wait for the same load."""
+    known_chats = context.bot_data.get('known_chats')
+    if known_chats is not None:
+        return known_chats
+    async with _known_chats_lock:
+        known_chats = context.bot_data.get('known_chats')
+        if known_chats is None:
+            known_chats = set(await get_all_bot_chat_ids())
+            context.bot_data['known_chats'] = known_chats
+            logger.info(f"Loaded {len(known_chats)} known chats into cache.")
+    return known_chats
+
 @check_module_enabled("userlogger")
 async def log_user_from_interaction(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     if update.effective_user:
-        update_user_in_db(update.effective_user)
-    
+        user_buffer.add(update.effective_user)
+
     if update.message and update.message.reply_to_message and update.message.reply_to_message.from_user:
-        update_user_in_db(update.message.reply_to_message.from_user)
+        user_buffer.add(update.message.reply_to_message.from_user)
 
     chat = update.effective_chat
     if chat and chat.type in [ChatType.GROUP, ChatType.SUPERGROUP]:
-        if 'known_chats' not in context.bot_data:
-            context.bot_data['known_chats'] = set()
-            try:
-                with sqlite3.connect(DB_NAME) as conn:
-                    cursor = conn.cursor()
-                    known_ids = {row[0] for row in cursor.execute("SELECT chat_id FROM bot_chats")}
-                    context.bot_data['known_chats'] = known_ids
-                    logger.info(f"Loaded {len(known_ids)} known chats into cache.")
-            except sqlite3.Error as e:
-                logger.error(f"Could not preload known chats into cache: {e}")
-
-        if chat.id not in context.bot_data['known_chats']:
+        known_chats = await _get_known_chats(context)
+        if chat.id not in known_chats:
             logger.info(f"Passively discovered and adding new chat to DB: {chat.title} ({chat.id})")
-            add_chat_to_db(chat.id, chat.title or f"Untitled Chat {chat.id}")
-            context.bot_data['known_chats'].add(chat.id)
+            await ensure_chat_in_db(chat.id, chat.title or f"Untitled Chat {chat.id}")
+            known_chats.add(chat.id)
 
 
 # --- HANDLER LOADER ---
 def load_handlers(application: Application):
-    pass
+    if application.job_queue:
+        application.job_queue.run_repeating(flush_user_buffer, interval=USERLOGGER_FLUSH_INTERVAL, first=USERLOGGER_FLUSH_INTERVAL)
+    else:
+        logger.warning("JobQueue not available, buffered users will only be written at shutdown.")
@@ -4,8 +4,9 @@ from telegram.constants import ChatType, ChatMemberStatus, ParseMode
 from telegram.error import TelegramError
 from telegram.ext import Application, CommandHandler, ContextTypes, CallbackQueryHandler
 
-from ..core.database import add_warning, remove_warning_by_id, get_warnings, reset_warnings, set_warn_limit, get_warn_limit
+from ..core.async_database import add_warning, remove_warning_by_id, get_warnings, reset_warnings, set_warn_limit, get_warn_limit, record_ban
 from ..core.utils import _can_user_perform_action, resolve_user_with_telethon, create_user_html_link, send_safe_reply, safe_escape, is_entity_a_user
+from ..core.admin_cache import is_chat_admin
 from ..core.decorators import check_module_enabled, command_control
 from ..core.handlers import custom_handler
 
@@ -65,23 +66,21 @@ async def warn_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> No
     reason = " ".join(reason_parts) or "No reason provided."
 
     try:
-        target_member = await context.bot.get_chat_member(chat.id, target_user.id)
-        
-        if target_member.status in [ChatMemberStatus.OWNER, ChatMemberStatus.ADMINISTRATOR]:
+        if await is_chat_admin(context, chat.id, target_user.id):
             await message.reply_text("Chat Creator and Administrators cannot be warned.")
             return
     except TelegramError as e:
         if "user not found" not in str(e).lower():
             logger.warning(f"Could not get chat member status for warn target {target_user.id}: {e}")
 
-    new_warn_id, warn_count = add_warning(chat.id, target_user.id, reason, warner.id)
+    new_warn_id, warn_count = await add_warning(chat.id, target_user.id, reason, warner.id)
     user_display = create_user_html_link(target_user)
 
     if new_warn_id == -1:
         await message.reply_text("A database error occurred while adding the warning.")
         return
 
-    limit = get_warn_limit(chat.id)
+    limit = await get_warn_limit(chat.id)
 
 
     keyboard = InlineKeyboardMarkup(
@@ -99,10 +98,11 @@ async def warn_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> No
             context.bot_data.setdefault('recently_removed_users', set()).add(target_user.id)
             
             await context.bot.ban_chat_member(chat.id, target_user.id)
+            await record_ban(target_user.id, chat.id, "warns")
             await message.reply_html(
                 f"🚨 User {user_display} has reached {warn_count}/{limit} warnings and has been banned."
             )
-            reset_warnings(chat.id, target_user.id)
+            await reset_warnings(chat.id, target_user.id)
         except Exception as e:
             await message.reply_text(f"Failed to ban user after reaching max warnings: {e}")
 
@@ -139,8 +139,7 @@ async def dwarn_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> N
         await send_safe_reply(update, context, text="Nuh uh... You can't warn yourself."); return
         
     try:
-        target_member = await context.bot.get_chat_member(chat.id, target_user.id)
-        if target_member.status in [ChatMemberStatus.OWNER, ChatMemberStatus.ADMINISTRATOR]:
+        if await is_chat_admin(context, chat.id, target_user.id):
             await message.reply_text("Chat Creator and Administrators cannot be warned.")
             return
     except TelegramError as e:
@@ -152,14 +151,14 @@ async def dwarn_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> N
     except TelegramError as e:
         logger.warning(f"Could not delete message in dwarn: {e}")
 
-    new_warn_id, warn_count = add_warning(chat.id, target_user.id, reason, warner.id)
+    new_warn_id, warn_count = await add_warning(chat.id, target_user.id, reason, warner.id)
     user_display = create_user_html_link(target_user)
 
     if new_warn_id == -1:
         await message.reply_text("A database error occurred while adding the warning.")
         return
 
-    limit = get_warn_limit(chat.id)
+    limit = await get_warn_limit(chat.id)
 
     keyboard = InlineKeyboardMarkup(
         [[InlineKeyboardButton("Delete Warn [Admin Only]", callback_data=f"undo_warn_{new_warn_id}")]]
@@ -175,10 +174,11 @@ async def dwarn_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> N
         try:
             context.bot_data.setdefault('recently_removed_users', set()).add(target_user.id)
             await context.bot.ban_chat_member(chat.id, target_user.id)
+            await record_ban(target_user.id, chat.id, "warns")
             await message.reply_html(
                 f"🚨 User {user_display} has reached {warn_count}/{limit} warnings and has been banned."
             )
-            reset_warnings(chat.id, target_user.id)
+            await reset_warnings(chat.id, target_user.id)
         except Exception as e:
             await message.reply_text(f"Failed to ban user after reaching max warnings: {e}")
 
@@ -190,8 +190,7 @@ async def undo_warn_callback(update: Update, context: ContextTypes.DEFAULT_TYPE)
     user_who_clicked = query.from_user
     
     try:
-        member = await context.bot.get_chat_member(query.message.chat_id, user_who_clicked.id)
-        if member.status not in [ChatMemberStatus.ADMINISTRATOR, ChatMemberStatus.OWNER]:
+        if not await is_chat_admin(context, query.message.chat_id, user_who_clicked.id):
             await query.answer("You must be an admin to undo this action.", show_alert=True)
             return
     except Exception:
@@ -204,7 +203,7 @@ async def undo_warn_callback(update: Update, context: ContextTypes.DEFAULT_TYPE)
         await query.edit_message_text("Error: Invalid callback data.")
         return
 
-    if remove_warning_by_id(warn_id_to_remove):
+    if await remove_warning_by_id(warn_id_to_remove):
         new_text = query.message.text_html + "\n\n<i>(Warn deleted by " + user_who_clicked.mention_html() + ")</i>"
         await query.edit_message_text(new_text, parse_mode=ParseMode.HTML, reply_markup=None)
     else:
@@ -243,9 +242,9 @@ async def warnings_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -
         await update.message.reply_text("Could not find that user. Please provide a valid User ID, @username, or reply to a message.")
         return
         
-    user_warnings = get_warnings(update.effective_chat.id, target_user.id)
+    user_warnings = await get_warnings(update.effective_chat.id, target_user.id)
     user_display = create_user_html_link(target_user)
-    limit = get_warn_limit(update.effective_chat.id)
+    limit = await get_warn_limit(update.effective_chat.id)
 
     if not user_warnings:
         await update.message.reply_html(f"User {user_display} has no warnings in this chat.")
@@ -281,7 +280,7 @@ async def reset_warnings_command(update: Update, context: ContextTypes.DEFAULT_T
         await update.message.reply_text("Usage: /resetwarns <ID/@username/reply>")
         return
         
-    if reset_warnings(update.effective_chat.id, target_user.id):
+    if await reset_warnings(update.effective_chat.id, target_user.id):
         user_display = create_user_html_link(target_user)
         await update.message.reply_html(f"✅ Warnings for {user_display} have been reset.")
     else:
@@ -300,7 +299,7 @@ async def set_warn_limit_command(update: Update, context: ContextTypes.DEFAULT_T
         return
 
     if not context.args:
-        limit = get_warn_limit(chat.id)
+        limit = await get_warn_limit(chat.id)
         await update.message.reply_html(f"The current warning limit in this chat is <b>{limit}</b>.")
         return
 
@@ -310,7 +309,7 @@ async def set_warn_limit_command(update: Update, context: ContextTypes.DEFAULT_T
             await update.message.reply_text("The warning limit must be at least 1.")
             return
             
-        if set_warn_limit(chat.id, limit):
+        if await set_warn_limit(chat.id, limit):
             await update.message.reply_html(f"✅ The warning limit for this chat has been set to <b>{limit}</b>.")
         else:
             await update.message.reply_text("Failed to set the warning limit.")
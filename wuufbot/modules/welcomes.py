@@ -1,18 +1,19 @@
 import logging
 import random
-import sqlite3
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.constants import ChatType, ParseMode
 from telegram.ext import Application, CommandHandler, ContextTypes, MessageHandler, filters
 
-from ..config import OWNER_ID, DB_NAME, APPEAL_CHAT_USERNAME
-from ..core.database import (
-    set_welcome_setting, get_welcome_settings, set_goodbye_setting, get_goodbye_settings,
+from ..config import OWNER_ID, APPEAL_CHAT_USERNAME
+from ..core.database import is_dev_user, is_sudo_user, is_support_user, is_gbanned
+from ..core.async_database import (
+    set_welcome_setting, set_welcome_enabled, get_welcome_settings, set_goodbye_setting, get_goodbye_settings,
     set_clean_service, should_clean_service, add_chat_to_db, remove_chat_from_db,
-    is_dev_user, is_sudo_user, is_support_user, is_chat_blacklisted, update_user_in_db,
-    is_gban_enforced, get_gban_reason
+    is_chat_blacklisted, update_user_in_db, get_chat_settings
 )
 from ..core.utils import _can_user_perform_action, send_safe_reply, safe_escape, format_message_text, send_critical_log
+from ..core.admin_cache import get_bot_member
+from ..core.rate_limiter import Priority, prioritized
 from ..core.constants import OWNER_WELCOME_TEXTS, DEV_WELCOME_TEXTS, SUDO_WELCOME_TEXTS, SUPPORT_WELCOME_TEXTS, GENERIC_WELCOME_TEXTS, GENERIC_GOODBYE_TEXTS
 from ..core.decorators import check_module_enabled, command_control
 from ..core.handlers import custom_handler
@@ -35,25 +36,22 @@ async def welcome_command(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
 
     if context.args and context.args[0].lower() in ['yes', 'on', 'off', 'no']:
         is_on = context.args[0].lower() == 'on' or context.args[0].lower() == 'yes'
-        try:
-            with sqlite3.connect(DB_NAME) as conn:
-                 conn.execute("UPDATE bot_chats SET welcome_enabled = ? WHERE chat_id = ?", (1 if is_on else 0, chat.id))
+        if await set_welcome_enabled(chat.id, is_on):
             status_text = "ENABLED" if is_on else "DISABLED"
             await update.message.reply_html(f"✅ Welcome messages have been <b>{status_text}</b>.")
-        except sqlite3.Error as e:
-            logger.error(f"Error toggling welcome for chat {chat.id}: {e}")
+        else:
             await update.message.reply_text("An error occurred while updating the setting.")
         return
 
     if context.args and context.args[0].lower() == 'noformat':
-        _, custom_text = get_welcome_settings(chat.id)
+        _, custom_text = await get_welcome_settings(chat.id)
         if custom_text:
             await update.message.reply_text(custom_text)
         else:
             await update.message.reply_text("No custom welcome message is set for this chat.")
         return
 
-    enabled, custom_text = get_welcome_settings(chat.id)
+    enabled, custom_text = await get_welcome_settings(chat.id)
     status = "enabled" if enabled else "disabled"
     
     if custom_text:
@@ -85,7 +83,7 @@ async def set_welcome_command(update: Update, context: ContextTypes.DEFAULT_TYPE
         return
         
     custom_text = update.message.text.split(' ', 1)[1]
-    if set_welcome_setting(chat.id, enabled=True, text=custom_text):
+    if await set_welcome_setting(chat.id, enabled=True, text=custom_text):
         await update.message.reply_html("✅ Custom welcome message has been set!")
     else:
         await update.message.reply_text("Failed to set welcome message.")
@@ -102,7 +100,7 @@ async def reset_welcome_command(update: Update, context: ContextTypes.DEFAULT_TY
     if not await _can_user_perform_action(update, context, 'can_change_info', "Why should I listen to a person with no privileges for this? You need 'can_change_info' permission.", allow_bot_privileged_override=False):
         return
 
-    if set_welcome_setting(chat.id, enabled=True, text=None):
+    if await set_welcome_setting(chat.id, enabled=True, text=None):
         await update.message.reply_text("✅ Welcome message has been reset to default.")
     else:
         await update.message.reply_text("Failed to reset welcome message.")
@@ -121,20 +119,20 @@ async def goodbye_command(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
 
     if context.args and context.args[0].lower() in ['yes', 'on', 'off', 'no']:
         is_on = context.args[0].lower() == 'on' or context.args[0].lower() == 'yes'
-        set_goodbye_setting(chat.id, enabled=is_on)
+        await set_goodbye_setting(chat.id, enabled=is_on)
         status_text = "ENABLED" if is_on else "DISABLED"
         await update.message.reply_html(f"✅ Goodbye messages have been <b>{status_text}</b>.")
         return
 
     if context.args and context.args[0].lower() == 'noformat':
-        _, custom_text = get_goodbye_settings(chat.id)
+        _, custom_text = await get_goodbye_settings(chat.id)
         if custom_text:
             await update.message.reply_text(custom_text)
         else:
             await update.message.reply_text("No custom goodbye message is set for this chat.")
         return
 
-    enabled, custom_text = get_goodbye_settings(chat.id)
+    enabled, custom_text = await get_goodbye_settings(chat.id)
     status = "enabled" if enabled else "disabled"
     
     if custom_text:
@@ -166,7 +164,7 @@ async def set_goodbye_command(update: Update, context: ContextTypes.DEFAULT_TYPE
         return
         
     custom_text = update.message.text.split(' ', 1)[1]
-    if set_goodbye_setting(chat.id, enabled=True, text=custom_text):
+    if await set_goodbye_setting(chat.id, enabled=True, text=custom_text):
         await update.message.reply_html("✅ Custom goodbye message has been set!")
     else:
         await update.message.reply_text("Failed to set goodbye message.")
@@ -183,7 +181,7 @@ async def reset_goodbye_command(update: Update, context: ContextTypes.DEFAULT_TY
     if not await _can_user_perform_action(update, context, 'can_change_info', "Why should I listen to a person with no privileges for this? You need 'can_change_info' permission.", allow_bot_privileged_override=False):
         return
         
-    if set_goodbye_setting(chat.id, enabled=True, text=None):
+    if await set_goodbye_setting(chat.id, enabled=True, text=None):
         await update.message.reply_text("✅ Goodbye message has been reset to default.")
     else:
         await update.message.reply_text("Failed to reset goodbye message.")
@@ -226,7 +224,7 @@ async def set_clean_service_command(update: Update, context: ContextTypes.DEFAUL
         return
 
     if not context.args:
-        is_enabled = should_clean_service(chat.id)
+        is_enabled = await should_clean_service(chat.id)
         status = "ENABLED" if is_enabled else "DISABLED"
         await update.message.reply_html(f"Automatic cleaning of service messages is currently <b>{status}</b>.")
         return
@@ -239,7 +237,7 @@ async def set_clean_service_command(update: Update, context: ContextTypes.DEFAUL
     
     if is_on:
         try:
-            bot_member = await chat.get_member(context.bot.id)
+            bot_member = await get_bot_member(context, chat.id)
             if not bot_member.can_delete_messages:
                 await update.message.reply_text("I can't enable this feature because I don't have permission to delete messages in this chat.")
                 return
@@ -248,24 +246,25 @@ async def set_clean_service_command(update: Update, context: ContextTypes.DEFAUL
             await update.message.reply_text("Could not verify my permissions to enable this feature.")
             return
             
-    if set_clean_service(chat.id, enabled=is_on):
+    if await set_clean_service(chat.id, enabled=is_on):
         status_text = "ENABLED" if is_on else "DISABLED"
         await update.message.reply_html(f"✅ Automatic cleaning of service messages has been <b>{status_text}</b>.")
     else:
         await update.message.reply_text("An error occurred while saving the setting.")
 
 @check_module_enabled("welcomes")
+@prioritized(Priority.BACKGROUND)
 async def handle_new_group_members(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     if not update.message or not update.message.new_chat_members:
         return
     chat = update.effective_chat
 
-    if is_chat_blacklisted(chat.id):
+    if await is_chat_blacklisted(chat.id):
         return
     
     if any(member.id == context.bot.id for member in update.message.new_chat_members):
         logger.info(f"Bot joined chat: {chat.title} ({chat.id})")
-        add_chat_to_db(chat.id, chat.title or f"Untitled Chat {chat.id}")
+        await add_chat_to_db(chat.id, chat.title or f"Untitled Chat {chat.id}")
         if OWNER_ID:
             safe_chat_title = safe_escape(chat.title or f"Chat ID {chat.id}")
             link_line = f"\n<b>Link:</b> @{chat.username}" if chat.username else ""
@@ -297,17 +296,18 @@ async def handle_new_group_members(update: Update, context: ContextTypes.DEFAULT
             logger.error(f"Failed to send introduction message to new group {chat.id}: {e}")
         return
 
-    if should_clean_service(chat.id):
+    settings = await get_chat_settings(chat.id)
+    if settings.clean_service:
         try:
             await update.message.delete()
         except Exception:
             pass
 
-    welcome_enabled, custom_text = get_welcome_settings(chat.id)
+    welcome_enabled, custom_text = settings.welcome_enabled, settings.custom_welcome
 
     for member in update.message.new_chat_members:
-        update_user_in_db(member)
-        if is_gban_enforced(chat.id) and get_gban_reason(member.id):
+        await update_user_in_db(member)
+        if settings.enforce_gban and is_gbanned(member.id):
             continue
 
         base_text = ""
@@ -394,36 +394,38 @@ async def handle_new_group_members(update: Update, context: ContextTypes.DEFAULT
                 else:
                     logger.error(f"Failed to send welcome message for user {member.id} in chat {chat.id}: {e}")
 
-    if should_clean_service(chat.id):
+    if settings.clean_service:
         try:
             await update.message.delete()
         except Exception:
             pass
 
 @check_module_enabled("welcomes")
+@prioritized(Priority.BACKGROUND)
 async def handle_left_group_member(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     if not update.message or not update.message.left_chat_member:
         return
     
     chat = update.effective_chat
     left_member = update.message.left_chat_member
-    update_user_in_db(left_member)
+    await update_user_in_db(left_member)
 
     if left_member.id == context.bot.id:
         logger.info(f"Bot removed from group cache {chat.id}.")
-        remove_chat_from_db(chat.id)
+        await remove_chat_from_db(chat.id)
         return
 
-    if should_clean_service(chat.id):
+    settings = await get_chat_settings(chat.id)
+    if settings.clean_service:
         try:
             await update.message.delete()
         except Exception:
             pass
 
-    if is_gban_enforced(chat.id) and get_gban_reason(left_member.id):
+    if settings.enforce_gban and is_gbanned(left_member.id):
         return
 
-    is_enabled, custom_text = get_goodbye_settings(chat.id)
+    is_enabled, custom_text = settings.goodbye_enabled, settings.custom_goodbye
     if not is_enabled:
         return
 
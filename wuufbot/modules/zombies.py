@@ -6,6 +6,8 @@ from telegram.ext import Application, CommandHandler, ContextTypes
 from telethon import TelegramClient
 
 from ..core.utils import _can_user_perform_action, send_safe_reply, safe_escape
+from ..core.admin_cache import get_bot_member
+from ..core.rate_limiter import Priority, outbound_priority
 from ..core.decorators import check_module_enabled
 from ..core.handlers import custom_handler
 
@@ -33,13 +35,12 @@ async def _find_and_process_zombies(update: Update, context: ContextTypes.DEFAUL
                 
                 if not dry_run:
                     try:
-                        await context.bot.ban_chat_member(chat.id, member.id)
-                        await context.bot.unban_chat_member(chat.id, member.id)
+                        with outbound_priority(Priority.BULK):
+                            await context.bot.ban_chat_member(chat.id, member.id)
+                            await context.bot.unban_chat_member(chat.id, member.id)
                         kicked_count += 1
                     except Exception as e:
                         failed_count += 1
-                    
-                    await asyncio.sleep(0.1)
 
     except Exception as e:
         await status_message.edit_text(f"An error occurred while scanning members: {safe_escape(str(e))}")
@@ -80,7 +81,7 @@ async def zombies_command(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
 
     chat = update.effective_chat
     try:
-        bot_member = await chat.get_member(context.bot.id)
+        bot_member = await get_bot_member(context, chat.id)
         if bot_member.status != ChatMemberStatus.ADMINISTRATOR:
             await update.message.reply_text("Error: I can't clean zombies here because I'm not an administrator.")
             return